@@ -0,0 +1,118 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import ConnectionHandler
+from environ import Env
+
+QUERY = (
+    "SELECT id, name FROM products_product WHERE is_active = %s ORDER BY name LIMIT 9"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the request throughput of the PostgreSQL connection modes: "
+        "a connection per request, persistent connections, the psycopg pool, "
+        "the pool with the settings of the pgbouncer switch against the server "
+        "itself, and, given --pgbouncer-url, the pool through pgbouncer."
+    )
+
+    modes = (
+        "direct",
+        "persistent",
+        "pool",
+        "pool-pgbouncer-flags",
+        "pool-pgbouncer",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--queries-per-request", type=int, default=5)
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--mode", choices=self.modes, action="append")
+        parser.add_argument(
+            "--pgbouncer-url",
+            help="A database URL of a pgbouncer in front of the same database.",
+        )
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES[options["database"]]
+        if database["ENGINE"] != "django.db.backends.postgresql":
+            msg = "The connection benchmark requires a PostgreSQL database."
+            raise CommandError(msg)
+        modes = options["mode"] or [
+            mode
+            for mode in self.modes
+            if mode != "pool-pgbouncer" or options["pgbouncer_url"]
+        ]
+        if "pool-pgbouncer" in modes and not options["pgbouncer_url"]:
+            msg = "The pool-pgbouncer mode requires --pgbouncer-url."
+            raise CommandError(msg)
+        for mode in modes:
+            handler = ConnectionHandler(
+                {DEFAULT_DB_ALIAS: self.get_settings(database, mode, options)},
+            )
+            try:
+                elapsed = self.run(handler, options)
+            finally:
+                handler[DEFAULT_DB_ALIAS].close_pool()
+            total = options["threads"] * options["requests"]
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{mode:>20}: {total / elapsed:8.0f} requests/s, "
+                    f"{elapsed / total * 1000 * options['threads']:6.2f} ms/request",
+                ),
+            )
+
+    def get_settings(self, database, mode, options) -> dict:
+        database = deepcopy(database)
+        database.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True)
+        database["OPTIONS"] = {
+            key: value
+            for key, value in database.get("OPTIONS", {}).items()
+            if key not in ("pool", "prepare_threshold")
+        }
+        if mode == "persistent":
+            database["CONN_MAX_AGE"] = None
+        if mode.startswith("pool"):
+            database["OPTIONS"]["pool"] = {
+                "min_size": options["pool_size"],
+                "max_size": options["pool_size"],
+            }
+        if mode == "pool-pgbouncer":
+            url = Env.db_url_config(options["pgbouncer_url"])
+            database.update(
+                {key: url[key] for key in ("NAME", "USER", "PASSWORD", "HOST", "PORT")},
+            )
+        if mode.startswith("pool-pgbouncer"):
+            database["DISABLE_SERVER_SIDE_CURSORS"] = True
+            database["OPTIONS"]["prepare_threshold"] = None
+        return database
+
+    def run(self, handler, options) -> float:
+        def work():
+            connection = handler[DEFAULT_DB_ALIAS]
+            try:
+                for _ in range(options["requests"]):
+                    with connection.cursor() as cursor:
+                        for _ in range(options["queries_per_request"]):
+                            cursor.execute(QUERY, [True])
+                            cursor.fetchall()
+                    # What `close_old_connections()` does when a request ends.
+                    connection.close_if_unusable_or_obsolete()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(options["threads"]) as executor:
+            start = time.perf_counter()
+            futures = [executor.submit(work) for _ in range(options["threads"])]
+            for future in futures:
+                future.result()
+            return time.perf_counter() - start
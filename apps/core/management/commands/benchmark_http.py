@@ -0,0 +1,77 @@
+import http.client
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server with concurrent GET requests and report the "
+        "throughput and latency, to compare the WSGI and ASGI deployments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="+")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--htmx", action="store_true")
+
+    def handle(self, *args, **options):
+        urls = [urlsplit(url) for url in options["url"]]
+        if any(url.scheme != "http" for url in urls):
+            msg = "Only plain http:// URLs are supported."
+            raise CommandError(msg)
+        headers = {"HX-Request": "true"} if options["htmx"] else {}
+        concurrency = options["concurrency"]
+        per_client = options["requests"] // concurrency
+
+        def client(index):
+            timings, errors = [], 0
+            connection = None
+            for number in range(per_client):
+                url = urls[(index + number) % len(urls)]
+                path = url.path + (f"?{url.query}" if url.query else "")
+                if connection is None:
+                    connection = http.client.HTTPConnection(url.netloc, timeout=60)
+                start = time.perf_counter()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = None
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - start)
+                if response.status >= 400:  # noqa: PLR2004
+                    errors += 1
+                if response.will_close:
+                    connection.close()
+                    connection = None
+            if connection is not None:
+                connection.close()
+            return timings, errors
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(client, range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+        timings = sorted(timing for result, _ in results for timing in result)
+        errors = sum(errors for _, errors in results)
+        if not timings:
+            msg = "Every request failed."
+            raise CommandError(msg)
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(timings) / elapsed:.0f} requests/s with {concurrency} "
+                f"clients, p50 {percentiles[49] * 1000:.1f} ms, "
+                f"p95 {percentiles[94] * 1000:.1f} ms, {errors} errors.",
+            ),
+        )
@@ -0,0 +1,86 @@
+import os
+import time
+
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+
+# Each process records its metrics in memory. To aggregate the processes of
+# multi-process gunicorn and the Celery prefork pool, set the
+# `PROMETHEUS_MULTIPROC_DIR` environment variable of the web and worker
+# processes to a directory they share, emptied on deploy: each process then
+# writes its samples to files there, which `render_metrics()` merges.
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by URL name.",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_queries",
+    "Queries run by the view of a request, by URL name.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Lookups of the catalog caches, by cache and result.",
+    ["cache", "result"],
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Time to run a Celery task, by task name and final state.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, float("inf")),
+)
+
+# Request methods recorded as is, others are recorded as "other".
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# The start time of the tasks running in this worker process, by task id.
+task_starts = {}
+
+
+def is_multiprocess() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def record_request(request, response, timings, total_time) -> None:
+    """Record the duration and queries of a request, timed by the middleware."""
+    match = request.resolver_match
+    view = match.view_name if match else "unresolved"
+    REQUEST_DURATION.labels(
+        view,
+        request.method if request.method in METHODS else "other",
+        f"{response.status_code // 100}xx",
+    ).observe(total_time / 1000)
+    REQUEST_QUERIES.labels(view).observe(timings.queries)
+
+
+def record_cache_lookup(cache, *, hit) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_task_start(task_id) -> None:
+    task_starts[task_id] = time.perf_counter()
+
+
+def record_task_end(task_id, task_name, state) -> None:
+    start = task_starts.pop(task_id, None)
+    if start is not None:
+        TASK_DURATION.labels(task_name, state).observe(time.perf_counter() - start)
+
+
+def get_registry() -> CollectorRegistry:
+    """Return the registry of this process, or of all of them in multiprocess mode."""
+    if not is_multiprocess():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> bytes:
+    """Return the metrics in the Prometheus text format."""
+    return generate_latest(get_registry())
@@ -1,17 +1,57 @@
 import json
+import logging
+import time
 
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.messages import get_messages
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import record_request
+from .queries import record_request_queries
+from .queries import stop_recording_request_queries
+from .querybudgets import QueryBudget
+from .querybudgets import get_query_budget
+from .querybudgets import violations
+from .routers import get_replica_state
+from .routers import has_replica
+from .routers import reset_replica_state
+from .routers import start_replica_state
+from .servertiming import RequestTimings
+from .servertiming import current_timings
+from .servertiming import instrument_caches
+from .servertiming import instrument_templates
+from .servertiming import log_timings
+
+logger = logging.getLogger(__name__)
 
 
 class HtmxMessagesMiddleware:
     """Middleware to add Django messages to HTMX responses."""
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if not request.htmx or request.htmx.boosted:
+            return response
+        # Reading the messages may load the session from the database.
+        return await sync_to_async(self.process_response)(request, response)
 
+    def process_response(self, request, response):
         if not request.htmx or request.htmx.boosted:
             return response
 
@@ -39,3 +79,185 @@ class HtmxMessagesMiddleware:
         triggers["messages"] = messages
         response.headers["HX-Trigger"] = json.dumps(triggers)
         return response
+
+
+class ServerTimingMiddleware:
+    """Report where the time of a request was spent.
+
+    The queries run from `process_view()` on, read from the `QueryRecorder` of
+    the request, the cache calls and the template renders are recorded in the
+    `RequestTimings` of the request. They are sent in a `Server-Timing` header,
+    which the browser devtools show next to the request, in a log line of the
+    `apps.core.servertiming` logger, and to the request metrics exposed by
+    `MetricsView`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        instrument_caches()
+        instrument_templates()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_recording_request_queries(request)
+            current_timings.reset(token)
+        return self.process_response(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_recording_request_queries(request)
+            current_timings.reset(token)
+        return self.process_response(request, response, timings, start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # For async requests, this runs in the thread running the sync code,
+        # which holds the connections the queries of the view are run on.
+        timings = current_timings.get()
+        if timings is not None:
+            timings.recorder = record_request_queries(request)
+
+    def process_response(self, request, response, timings, start):
+        total_time = (time.perf_counter() - start) * 1000
+        response.headers["Server-Timing"] = timings.get_header(total_time)
+        log_timings(request, response, timings, total_time)
+        record_request(request, response, timings, total_time)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Pin the reads of a request to the primary database when needed.
+
+    `ReplicaRouter` sends catalog reads to the replica, which may lag behind.
+    A request is pinned to the primary for staff users, so the admin always
+    sees current data, and for clients that wrote to the database in the last
+    `DATABASE_REPLICA_PIN_SECONDS`, tracked through a short-lived cookie, so
+    users read their own writes. Not used when no replica is configured.
+    """
+
+    cookie_name = "pin_primary"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not has_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = getattr(request, "user", None)
+        token = start_replica_state(pinned=self.must_pin(request, user))
+        try:
+            response = self.get_response(request)
+            self.process_response(response)
+        finally:
+            reset_replica_state(token)
+        return response
+
+    async def __acall__(self, request):
+        auser = getattr(request, "auser", None)
+        user = await auser() if auser else None
+        token = start_replica_state(pinned=self.must_pin(request, user))
+        try:
+            response = await self.get_response(request)
+            self.process_response(response)
+        finally:
+            reset_replica_state(token)
+        return response
+
+    def must_pin(self, request, user) -> bool:
+        if self.cookie_name in request.COOKIES:
+            return True
+        return bool(user and user.is_staff)
+
+    def process_response(self, response) -> None:
+        state = get_replica_state()
+        if state is not None and state.written:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+
+class QueryBudgetMiddleware:
+    """Count the queries of the views declaring a `query_budget`.
+
+    The queries are read from the `QueryRecorder` of the request, shared with
+    `ServerTimingMiddleware`, from `process_view()` until the response is
+    rendered. When a view runs more than its budget, the violation is counted
+    in `querybudgets.violations` and logged with the fingerprints of the most
+    repeated queries, which point to the N+1 that caused it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.check_budget(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            self.check_budget(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        limit = get_query_budget(view_func)
+        if limit is None:
+            return
+        request.query_budget = QueryBudget(
+            request.resolver_match.view_name,
+            limit,
+            record_request_queries(request),
+        )
+
+    def check_budget(self, request) -> None:
+        budget = getattr(request, "query_budget", None)
+        if budget is None:
+            return
+        stop_recording_request_queries(request)
+        if budget.exceeded:
+            violations[budget.view] += 1
+            logger.warning(
+                "Query budget exceeded: %s",
+                budget,
+                extra={
+                    "view": budget.view,
+                    "queries": len(budget.queries),
+                    "budget": budget.limit,
+                    "fingerprints": budget.get_fingerprints(),
+                },
+            )
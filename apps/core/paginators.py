@@ -0,0 +1,240 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from functools import reduce
+from operator import attrgetter
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage(Sequence):
+    """A single page of results produced by `CursorPaginator`.
+
+    Mirrors the parts of `django.core.paginator.Page` that make sense without
+    page numbers: `has_next()`, `has_previous()` and `has_other_pages()`. The
+    `next_cursor` and `previous_cursor` attributes hold the opaque tokens to
+    request the adjacent pages, or `None` when there is no such page.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        paginator,
+        *,
+        next_cursor=None,
+        previous_cursor=None,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate a queryset by seeking past a position instead of using OFFSET.
+
+    The ordering is taken from the queryset (or the model's `Meta.ordering`) and
+    the primary key is appended as a tie-breaker, so every row has a unique
+    position. Each page is fetched with a `WHERE (key) > (last key)` condition
+    and a `LIMIT`, which costs the same regardless of how deep the page is.
+
+    Ordering fields must be plain field or annotation names (optionally prefixed
+    with `-`). NULL values are placed the way PostgreSQL does by default (last
+    when ascending, first when descending) so that B-tree indexes stay usable.
+
+    Cursors are URL-safe base64 encoded JSON documents holding the position of
+    the boundary row, the direction of travel and the ordering they belong to.
+    They are opaque to clients and are only meaningful for the same ordering.
+    The values of a position are converted with the `to_python()` of their
+    fields, so a cursor made up by hand fails as `InvalidCursor` instead of
+    while the page is queried.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = self._get_ordering()
+
+    def _get_ordering(self) -> list[tuple[str, bool]]:
+        query = self.object_list.query
+        ordering = list(query.order_by) or list(query.get_meta().ordering)
+        keys = []
+        for field in ordering:
+            if not isinstance(field, str):
+                msg = f"CursorPaginator cannot seek on ordering expression {field!r}."
+                raise TypeError(msg)
+            keys.append((field.removeprefix("-"), field.startswith("-")))
+        pk_name = query.get_meta().pk.name
+        if not any(name in ("pk", pk_name) for name, _ in keys):
+            keys.append(("pk", keys[-1][1] if keys else False))
+        return keys
+
+    def _get_field(self, name):
+        """Return the model field or annotation output field ordered by `name`."""
+        query = self.object_list.query
+        if name in query.annotations:
+            return query.annotations[name].output_field
+        opts = query.get_meta()
+        if name == "pk":
+            return opts.pk
+        field = None
+        for part in name.split("__"):
+            if opts is None:
+                return None
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            opts = field.related_model._meta if field.related_model else None  # noqa: SLF001
+        return field
+
+    def _to_python(self, position) -> list:
+        """Return `position` converted to the types of the ordering fields.
+
+        Raises:
+            InvalidCursor: If a value does not fit its field.
+        """
+        values = []
+        for (name, _descending), value in zip(self.ordering, position, strict=True):
+            field = self._get_field(name)
+            if value is None or field is None:
+                values.append(value)
+                continue
+            try:
+                values.append(field.to_python(value))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(_("The cursor is malformed.")) from None
+        return values
+
+    def _get_order_by(self, keys):
+        return [
+            F(name).desc(nulls_first=True)
+            if descending
+            else F(name).asc(nulls_last=True)
+            for name, descending in keys
+        ]
+
+    def _get_seek_filter(self, keys, position) -> Q:
+        """Return a condition matching the rows that come after `position`."""
+        branches = []
+        equal = Q()
+        for (name, descending), value in zip(keys, position, strict=True):
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if descending else None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if not descending:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if after is not None:
+                branches.append(equal & after)
+            equal &= same
+        return reduce(or_, branches) if branches else Q(pk__in=[])
+
+    def _get_position(self, obj) -> list:
+        return [attrgetter(name.replace("__", "."))(obj) for name, _ in self.ordering]
+
+    def _get_signature(self) -> list[str]:
+        return [f"-{name}" if desc else name for name, desc in self.ordering]
+
+    def encode_cursor(self, position, *, reverse=False) -> str:
+        payload = {"o": self._get_signature(), "p": position, "r": reverse}
+        data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor) -> tuple[list, bool]:
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(data)
+            signature, position = payload["o"], payload["p"]
+            reverse = bool(payload.get("r"))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise InvalidCursor(_("The cursor is malformed.")) from None
+        if (
+            signature != self._get_signature()
+            or not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise InvalidCursor(_("The cursor does not match the current ordering."))
+        return self._to_python(position), reverse
+
+    def _get_page_queryset(self, position, reverse):
+        keys = [(name, desc != reverse) for name, desc in self.ordering]
+        queryset = self.object_list.order_by(*self._get_order_by(keys))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._get_seek_filter(keys, position))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(_("The cursor is malformed.")) from None
+        return queryset[: self.per_page + 1]
+
+    def _get_page(self, rows, position, *, reverse) -> CursorPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, True
+        else:
+            has_next, has_previous = has_more, position is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(self._get_position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(
+                self._get_position(rows[0]),
+                reverse=True,
+            )
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    def page(self, cursor=None) -> CursorPage:
+        """Return the page that starts after (or ends before) `cursor`."""
+        position, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+        rows = list(self._get_page_queryset(position, reverse))
+        if reverse and len(rows) <= self.per_page:
+            # Walked back to the start: serve a full first page instead.
+            return self.page()
+        return self._get_page(rows, position, reverse=reverse)
+
+    async def apage(self, cursor=None) -> CursorPage:
+        """See `page()`."""
+        position, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+        rows = [row async for row in self._get_page_queryset(position, reverse)]
+        if reverse and len(rows) <= self.per_page:
+            return await self.apage()
+        return self._get_page(rows, position, reverse=reverse)
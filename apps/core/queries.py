@@ -0,0 +1,57 @@
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+from django.db import connections
+
+
+@dataclass(eq=False, slots=True)
+class QueryRecorder:
+    """The SQL of the queries run on every connection, and their time in ms.
+
+    An instance is an execute wrapper. It keeps the connections it was
+    installed on, to be uninstalled from the same ones when the code between
+    ran in another thread, like the views of async requests.
+    """
+
+    queries: list[str] = field(default_factory=list)
+    sql_time: float = 0.0
+    installed: list = field(default_factory=list, repr=False)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += (time.perf_counter() - start) * 1000
+            self.queries.append(sql)
+
+    def install(self) -> None:
+        self.installed = list(connections.all())
+        for connection in self.installed:
+            connection.execute_wrappers.append(self)
+
+    def uninstall(self) -> None:
+        for connection in self.installed:
+            connection.execute_wrappers.remove(self)
+        self.installed = []
+
+
+def record_request_queries(request) -> QueryRecorder:
+    """Start recording the queries of `request`, unless already recording.
+
+    The middleware reading the queries of a request share its recorder, so a
+    single execute wrapper is installed however many of them read it.
+    """
+    recorder = getattr(request, "query_recorder", None)
+    if recorder is None:
+        recorder = request.query_recorder = QueryRecorder()
+        recorder.install()
+    return recorder
+
+
+def stop_recording_request_queries(request) -> None:
+    """Stop recording the queries of `request`. Calling it again is harmless."""
+    recorder = getattr(request, "query_recorder", None)
+    if recorder is not None:
+        recorder.uninstall()
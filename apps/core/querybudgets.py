@@ -0,0 +1,92 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from .queries import QueryRecorder
+
+# The budget violations counted since the process started, by view name.
+violations = Counter()
+
+FINGERPRINT_PATTERNS = [
+    # Quoted literals, numbers and lists of placeholders, whose length varies.
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)"), "(...)"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint_sql(sql) -> str:
+    """Return `sql` without its values, so repeated queries group together."""
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_query_budget(view_func) -> int | None:
+    """Return the `query_budget` declared for `view_func`, if any.
+
+    Class-based views declare an int. Model admins declare an int for all
+    their views or a dict by view method name, like `{"changelist_view": 6}`.
+    """
+    owner = getattr(view_func, "view_class", None) or getattr(
+        view_func,
+        "model_admin",
+        None,
+    )
+    budget = getattr(owner, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(view_func.__name__)
+    return budget
+
+
+@dataclass(eq=False, slots=True)
+class QueryBudget:
+    """The queries run by a view against its budget.
+
+    The queries are read from the `QueryRecorder` of the request, recording
+    from `process_view()` until the response is rendered.
+    """
+
+    view: str
+    limit: int
+    recorder: QueryRecorder
+
+    @property
+    def queries(self) -> list[str]:
+        return self.recorder.queries
+
+    @property
+    def exceeded(self) -> bool:
+        return len(self.queries) > self.limit
+
+    def get_fingerprints(self, limit=5) -> list[tuple[str, int]]:
+        """Return the most repeated query fingerprints with their counts."""
+        return Counter(map(fingerprint_sql, self.queries)).most_common(limit)
+
+    def __str__(self):
+        lines = [
+            f"{self.view} ran {len(self.queries)} queries for a budget of "
+            f"{self.limit}. The most repeated queries:",
+        ]
+        lines += [
+            f"  {count} x {fingerprint}"
+            for fingerprint, count in self.get_fingerprints()
+        ]
+        return "\n".join(lines)
+
+
+def assert_query_budget(response) -> None:
+    """Fail when the view that served `response` exceeded its query budget.
+
+    The budget is checked by `QueryBudgetMiddleware`, so the queries counted
+    are the same as in production.
+    """
+    request = getattr(response, "wsgi_request", None) or response.asgi_request
+    budget = getattr(request, "query_budget", None)
+    if budget is None:
+        msg = f"No query budget was checked for {request.path}."
+        raise AssertionError(msg)
+    if budget.exceeded:
+        raise AssertionError(str(budget))
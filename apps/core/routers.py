@@ -0,0 +1,88 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+
+
+@dataclass(slots=True)
+class ReplicaState:
+    """Whether the reads of the current context must go to the primary."""
+
+    pinned: bool = False
+    written: bool = False
+
+
+_replica_state: ContextVar[ReplicaState | None] = ContextVar(
+    "replica_state",
+    default=None,
+)
+
+
+def get_replica_state() -> ReplicaState | None:
+    """Return the replica state of the current context, if one was started."""
+    return _replica_state.get()
+
+
+def start_replica_state(*, pinned=False):
+    """Start a fresh replica state, returning the token to reset it with."""
+    return _replica_state.set(ReplicaState(pinned=pinned))
+
+
+def reset_replica_state(token) -> None:
+    _replica_state.reset(token)
+
+
+def pin_to_primary() -> None:
+    """Send the remaining reads of the current context to the primary."""
+    state = get_replica_state()
+    if state is not None:
+        state.pinned = True
+
+
+def has_replica() -> bool:
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Route reads of the catalog apps to the read replica.
+
+    Reads of models in `route_app_labels` go to the `replica` alias within a
+    replica state, started for each request by `ReplicaPinningMiddleware`,
+    unless the state is pinned to the primary, which happens once it writes to
+    the database and for the requests pinned by the middleware. Outside of a
+    state, such as in Celery tasks and management commands, which often read
+    what was just committed, every read goes to the primary. Every write, and
+    the reads of other apps, go to the primary. Nothing is migrated on the
+    replica, which receives the schema through replication.
+    """
+
+    route_app_labels = {"products"}
+
+    def db_for_read(self, model, **hints):
+        app_label = model._meta.app_label  # noqa: SLF001
+        if app_label not in self.route_app_labels or not has_replica():
+            return None
+        state = get_replica_state()
+        if state is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = get_replica_state()
+        if state is not None:
+            state.pinned = state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:  # noqa: SLF001
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
@@ -0,0 +1,235 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import cache
+from functools import wraps
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.template.backends.django import Template
+
+from .queries import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+# The timings of the request being served, read by the instrumented cache
+# backends and templates. The threads running the sync code of async requests
+# get a copy of the context, so their calls are recorded as well.
+current_timings = ContextVar("current_timings", default=None)
+
+MISSING = object()
+
+
+@dataclass(eq=False, slots=True)
+class RequestTimings:
+    """The database, cache and template time spent serving a request, in ms.
+
+    The queries are read from the `QueryRecorder` of the request, set once the
+    view is resolved; until then, none are counted.
+    """
+
+    recorder: QueryRecorder | None = None
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_time: float = 0.0
+    render_time: float = 0.0
+    # Set while a cache call or a render is timed, so that the calls they make
+    # themselves are not counted twice.
+    in_cache: bool = field(default=False, repr=False)
+    in_render: bool = field(default=False, repr=False)
+
+    @property
+    def queries(self) -> int:
+        return len(self.recorder.queries) if self.recorder else 0
+
+    @property
+    def sql_time(self) -> float:
+        return self.recorder.sql_time if self.recorder else 0.0
+
+    @contextmanager
+    def measure_cache(self):
+        self.in_cache = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.cache_time += (time.perf_counter() - start) * 1000
+            self.in_cache = False
+
+    def get_header(self, total_time) -> str:
+        """Return the `Server-Timing` header value, with `total_time` in ms."""
+        return (
+            f'db;dur={self.sql_time:.1f};desc="{self.queries} queries", '
+            f'cache;dur={self.cache_time:.1f};desc="{self.cache_hits} hits / '
+            f'{self.cache_misses} misses", '
+            f"render;dur={self.render_time:.1f}, "
+            f"total;dur={total_time:.1f}"
+        )
+
+
+def get_recording_timings() -> RequestTimings | None:
+    """Return the timings of the current request, unless a call is being timed."""
+    timings = current_timings.get()
+    if timings is None or timings.in_cache:
+        return None
+    return timings
+
+
+class TimedCacheMixin:
+    """Record the calls of a cache backend in the timings of the request.
+
+    Reads are counted as hits or misses. The async methods of the base backend
+    run the sync ones in a thread, so they are recorded too.
+    """
+
+    def get(self, key, default=None, *args, **kwargs):
+        timings = get_recording_timings()
+        if timings is None:
+            return super().get(key, default, *args, **kwargs)
+        with timings.measure_cache():
+            value = super().get(key, MISSING, *args, **kwargs)
+        if value is MISSING:
+            timings.cache_misses += 1
+            return default
+        timings.cache_hits += 1
+        return value
+
+    def get_many(self, keys, *args, **kwargs):
+        timings = get_recording_timings()
+        if timings is None:
+            return super().get_many(keys, *args, **kwargs)
+        keys = list(keys)
+        with timings.measure_cache():
+            values = super().get_many(keys, *args, **kwargs)
+        timings.cache_hits += len(values)
+        timings.cache_misses += len(keys) - len(values)
+        return values
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        # Like `BaseCache.get_or_set()`, but the read after a miss is not counted
+        # as a hit.
+        value = self.get(key, MISSING, version=version)
+        if value is not MISSING:
+            return value
+        if callable(default):
+            default = default()
+        self.add(key, default, timeout=timeout, version=version)
+        return self.timed(super().get, key, default, version=version)
+
+    def timed(self, method, *args, **kwargs):
+        timings = get_recording_timings()
+        if timings is None:
+            return method(*args, **kwargs)
+        with timings.measure_cache():
+            return method(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self.timed(super().set, *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self.timed(super().add, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self.timed(super().delete, *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self.timed(super().set_many, *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self.timed(super().delete_many, *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self.timed(super().incr, *args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        return self.timed(super().touch, *args, **kwargs)
+
+
+@cache
+def get_timed_cache_class(cache_class):
+    return type(f"Timed{cache_class.__name__}", (TimedCacheMixin, cache_class), {})
+
+
+def instrument_cache(backend) -> None:
+    """Record the calls of the cache `backend` instance from now on."""
+    if not isinstance(backend, TimedCacheMixin):
+        backend.__class__ = get_timed_cache_class(type(backend))
+
+
+def instrument_caches() -> None:
+    """Record the calls of every cache backend, including those created later.
+
+    The backends are created per thread and async context, so the handler is
+    patched, once per process, to instrument each new one.
+    """
+    for backend in caches.all(initialized_only=True):
+        instrument_cache(backend)
+    if hasattr(caches.create_connection, "__wrapped__"):
+        return
+    create_connection = caches.create_connection
+
+    @wraps(create_connection)
+    def create_timed_connection(alias):
+        backend = create_connection(alias)
+        instrument_cache(backend)
+        return backend
+
+    caches.create_connection = create_timed_connection
+
+
+def instrument_templates() -> None:
+    """Record the render time of the Django templates, once per process.
+
+    Only the outermost render of a request is timed, so that the included and
+    nested templates are not counted twice.
+    """
+    if hasattr(Template.render, "__wrapped__"):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, *args, **kwargs):
+        timings = current_timings.get()
+        if timings is None or timings.in_render:
+            return render(self, *args, **kwargs)
+        timings.in_render = True
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings.render_time += (time.perf_counter() - start) * 1000
+            timings.in_render = False
+
+    Template.render = timed_render
+
+
+def log_timings(request, response, timings, total_time) -> None:
+    logger.info(
+        "%s %s %s in %.1f ms: %d queries in %.1f ms, %d cache hits and %d "
+        "misses in %.1f ms, rendered in %.1f ms",
+        request.method,
+        request.path,
+        response.status_code,
+        total_time,
+        timings.queries,
+        timings.sql_time,
+        timings.cache_hits,
+        timings.cache_misses,
+        timings.cache_time,
+        timings.render_time,
+        extra={
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_time, 1),
+            "queries": timings.queries,
+            "sql_ms": round(timings.sql_time, 1),
+            "cache_hits": timings.cache_hits,
+            "cache_misses": timings.cache_misses,
+            "cache_ms": round(timings.cache_time, 1),
+            "render_ms": round(timings.render_time, 1),
+        },
+    )
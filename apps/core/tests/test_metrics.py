@@ -0,0 +1,115 @@
+# ruff: noqa: PLR2004
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from apps.core.metrics import render_metrics
+from apps.products.utils import get_attributes_schema
+from config.celery_app import app
+
+pytestmark = pytest.mark.django_db
+
+
+def sample(name, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+class TestMetricsView:
+    url = reverse("metrics")
+
+    def test_is_served_to_internal_addresses(self, client):
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=")
+
+    def test_is_forbidden_to_other_addresses(self, client):
+        response = client.get(self.url, REMOTE_ADDR="203.0.113.5")
+        assert response.status_code == 403
+
+    def test_is_served_to_staff(self, admin_client):
+        response = admin_client.get(self.url, REMOTE_ADDR="203.0.113.5")
+        assert response.status_code == 200
+
+    def test_allows_configured_networks(self, client, settings):
+        settings.METRICS_ALLOWED_NETWORKS = ["10.0.0.0/8"]
+        assert client.get(self.url, REMOTE_ADDR="10.1.2.3").status_code == 200
+        assert client.get(self.url).status_code == 403
+
+    def test_is_served_with_the_token(self, client, settings):
+        settings.METRICS_ALLOWED_NETWORKS = []
+        settings.METRICS_TOKEN = "secret"  # noqa: S105
+        assert client.get(self.url).status_code == 403
+        headers = {"Authorization": "Bearer wrong"}
+        assert client.get(self.url, headers=headers).status_code == 403
+        headers = {"Authorization": "Bearer secret"}
+        assert client.get(self.url, headers=headers).status_code == 200
+
+
+class TestRecordedMetrics:
+    def test_records_request_duration_and_queries(self, client):
+        labels = {"view": "products:product_list"}
+        count = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            status="2xx",
+            **labels,
+        )
+        queries = sample("http_request_queries_sum", **labels)
+        client.get(reverse("products:product_list"))
+        assert sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            status="2xx",
+            **labels,
+        ) == (count + 1)
+        assert sample("http_request_queries_sum", **labels) > queries
+        content = client.get(reverse("metrics")).content.decode()
+        assert 'http_request_duration_seconds_bucket{le="0.005",' in content
+
+    def test_records_attributes_schema_hits_and_misses(self):
+        labels = {"cache": "attributes_schema"}
+        hits = sample("cache_lookups_total", result="hit", **labels)
+        misses = sample("cache_lookups_total", result="miss", **labels)
+        get_attributes_schema()
+        get_attributes_schema()
+        assert sample("cache_lookups_total", result="hit", **labels) == hits + 1
+        assert sample("cache_lookups_total", result="miss", **labels) == misses + 1
+
+    def test_records_celery_task_duration(self):
+        @app.task(name="tests.add")
+        def add(x, y):
+            return x + y
+
+        labels = {"task": "tests.add", "state": "SUCCESS"}
+        count = sample("celery_task_duration_seconds_count", **labels)
+        assert add.apply((1, 2)).get() == 3
+        assert sample("celery_task_duration_seconds_count", **labels) == count + 1
+
+
+def test_aggregates_the_metrics_of_several_processes(tmp_path, monkeypatch):
+    script = (
+        "from apps.core.metrics import record_cache_lookup; "
+        "record_cache_lookup('attributes_schema', hit=True)"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):
+        subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script],
+            check=True,
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    content = render_metrics().decode()
+    assert 'cache_lookups_total{cache="attributes_schema",result="hit"} 2.0' in content
@@ -0,0 +1,31 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.core.paginators import CursorPaginator
+from apps.products.models import Product
+from apps.products.tests.factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def paginator():
+    ProductFactory.create_batch(5)
+    return CursorPaginator(Product.objects.order_by("name"), 2)
+
+
+def test_async_page_matches_page(paginator):
+    page = paginator.page()
+    apage = async_to_sync(paginator.apage)()
+    assert list(apage) == list(page)
+    assert apage.next_cursor == page.next_cursor
+    next_page = async_to_sync(paginator.apage)(page.next_cursor)
+    assert list(next_page) == list(paginator.page(page.next_cursor))
+    assert next_page.previous_cursor == paginator.page(page.next_cursor).previous_cursor
+
+
+def test_async_page_walks_back_to_first_page(paginator):
+    second = paginator.page(paginator.page().next_cursor)
+    first = async_to_sync(paginator.apage)(second.previous_cursor)
+    assert list(first) == list(paginator.page())
+    assert not first.has_previous()
@@ -0,0 +1,61 @@
+# ruff: noqa: PLR2004
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import reverse
+
+from apps.core.queries import QueryRecorder
+from apps.core.queries import record_request_queries
+from apps.core.queries import stop_recording_request_queries
+
+pytestmark = pytest.mark.django_db
+
+
+class TestQueryRecorder:
+    def test_records_the_queries_and_their_time(self):
+        recorder = QueryRecorder()
+        recorder.install()
+        try:
+            get_user_model().objects.exists()
+            get_user_model().objects.count()
+        finally:
+            recorder.uninstall()
+        get_user_model().objects.exists()
+        assert len(recorder.queries) == 2
+        assert recorder.sql_time > 0
+
+    def test_is_installed_on_every_connection(self):
+        recorder = QueryRecorder()
+        recorder.install()
+        try:
+            assert all(
+                recorder in connection.execute_wrappers
+                for connection in connections.all()
+            )
+        finally:
+            recorder.uninstall()
+        assert not any(
+            recorder in connection.execute_wrappers for connection in connections.all()
+        )
+
+
+class TestRequestQueries:
+    def test_share_a_single_recorder(self, rf):
+        request = rf.get("/")
+        recorder = record_request_queries(request)
+        try:
+            assert record_request_queries(request) is recorder
+            get_user_model().objects.exists()
+        finally:
+            stop_recording_request_queries(request)
+            stop_recording_request_queries(request)
+        assert len(recorder.queries) == 1
+
+    def test_are_read_by_the_budget_and_the_timings(self, client):
+        response = client.get(reverse("products:product_list"))
+        recorder = response.wsgi_request.query_recorder
+        assert response.wsgi_request.query_budget.recorder is recorder
+        assert f'desc="{len(recorder.queries)} queries"' in response["Server-Timing"]
+        assert not any(
+            recorder in connection.execute_wrappers for connection in connections.all()
+        )
@@ -0,0 +1,140 @@
+# ruff: noqa: PLR2004
+import logging
+from unittest.mock import Mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.urls import reverse
+
+from apps.core.middleware import QueryBudgetMiddleware
+from apps.core.queries import QueryRecorder
+from apps.core.querybudgets import QueryBudget
+from apps.core.querybudgets import assert_query_budget
+from apps.core.querybudgets import fingerprint_sql
+from apps.core.querybudgets import get_query_budget
+from apps.core.querybudgets import violations
+from apps.products.admin import ProductAdmin
+from apps.products.views import ProductDetailView
+
+pytestmark = pytest.mark.django_db
+
+
+def budgeted_view(budget):
+    def view(request):
+        return HttpResponse()
+
+    view.view_class = type("View", (), {"query_budget": budget})
+    return view
+
+
+def run_queries(count):
+    for _ in range(count):
+        get_user_model().objects.filter(pk=None).exists()
+
+
+class TestFingerprintSql:
+    def test_groups_queries_differing_by_values(self):
+        assert fingerprint_sql(
+            "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21",
+        ) == fingerprint_sql("SELECT * FROM t WHERE id IN (%s) AND name = 'y' LIMIT 9")
+
+    def test_keeps_numbered_identifiers(self):
+        assert fingerprint_sql('SELECT "T3"."id" FROM t T3') == (
+            'SELECT "T3"."id" FROM t T3'
+        )
+
+
+class TestGetQueryBudget:
+    def test_reads_the_view_class(self):
+        assert get_query_budget(ProductDetailView.as_view()) == 4
+
+    def test_reads_the_model_admin_by_view_name(self, admin_client):
+        response = admin_client.get(reverse("admin:products_product_changelist"))
+        view = response.resolver_match.func
+        assert get_query_budget(view) == ProductAdmin.query_budget["changelist_view"]
+
+    def test_is_none_without_budget(self):
+        assert get_query_budget(lambda request: HttpResponse()) is None
+
+
+class TestQueryBudgetMiddleware:
+    def get_request(self, rf):
+        request = rf.get("/")
+        request.resolver_match = Mock(view_name="budgeted")
+        return request
+
+    def get_middleware(self, budget, queries):
+        view = budgeted_view(budget)
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            run_queries(queries)
+            return view(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware
+
+    def test_counts_queries_within_budget(self, rf, caplog):
+        request = self.get_request(rf)
+        self.get_middleware(2, 2)(request)
+        assert len(request.query_budget.queries) == 2
+        assert not request.query_budget.exceeded
+        assert not caplog.records
+        assert request.query_budget.recorder not in connection.execute_wrappers
+
+    def test_logs_and_counts_violations(self, rf, caplog):
+        before = violations["budgeted"]
+        request = self.get_request(rf)
+        with caplog.at_level(logging.WARNING, logger="apps.core.middleware"):
+            self.get_middleware(1, 3)(request)
+        assert violations["budgeted"] == before + 1
+        [record] = caplog.records
+        assert record.queries == 3
+        assert record.budget == 1
+        [(_, count)] = record.fingerprints
+        assert count == 3
+        assert "budgeted ran 3 queries for a budget of 1" in record.getMessage()
+
+    def test_counts_queries_of_async_requests(self, rf):
+        view = budgeted_view(1)
+
+        def run_view(request):
+            middleware.process_view(request, view, (), {})
+            run_queries(2)
+            return view(request)
+
+        async def get_response(request):
+            return await sync_to_async(run_view)(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        request = self.get_request(rf)
+        async_to_sync(middleware)(request)
+        assert len(request.query_budget.queries) == 2
+        assert request.query_budget.recorder not in connection.execute_wrappers
+
+    def test_ignores_views_without_budget(self, rf):
+        request = self.get_request(rf)
+        middleware = QueryBudgetMiddleware(lambda request: HttpResponse())
+        assert middleware.process_view(request, lambda r: None, (), {}) is None
+        middleware(request)
+        assert not hasattr(request, "query_budget")
+
+
+class TestAssertQueryBudget:
+    def test_fails_with_the_repeated_queries(self, rf):
+        request = rf.get("/")
+        request.query_budget = QueryBudget(
+            "budgeted",
+            1,
+            QueryRecorder(queries=["SELECT 1", "SELECT 2"]),
+        )
+        with pytest.raises(AssertionError, match=r"2 x SELECT \?"):
+            assert_query_budget(Mock(wsgi_request=request))
+
+    def test_fails_without_budget(self, rf):
+        with pytest.raises(AssertionError, match="No query budget"):
+            assert_query_budget(Mock(wsgi_request=rf.get("/")))
@@ -0,0 +1,159 @@
+# ruff: noqa: PLR2004
+from contextvars import Context
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from apps.core.middleware import ReplicaPinningMiddleware
+from apps.core.routers import REPLICA_DB_ALIAS
+from apps.core.routers import ReplicaRouter
+from apps.core.routers import get_replica_state
+from apps.core.routers import reset_replica_state
+from apps.core.routers import start_replica_state
+from apps.products.models import Product
+from apps.products.views import AsyncProductDetailView
+from apps.products.views import AsyncProductListView
+from apps.products.views import ProductDetailView
+from apps.products.views import ProductListView
+from apps.store.views import AsyncHomeView
+
+
+@pytest.fixture(autouse=True)
+def replica_state():
+    token = start_replica_state()
+    yield get_replica_state()
+    reset_replica_state(token)
+
+
+@pytest.fixture
+def with_replica(monkeypatch):
+    monkeypatch.setattr("apps.core.routers.has_replica", lambda: True)
+    monkeypatch.setattr("apps.core.middleware.has_replica", lambda: True)
+
+
+class TestReplicaRouter:
+    router = ReplicaRouter()
+
+    def test_reads_use_default_routing_without_replica(self):
+        assert self.router.db_for_read(Product) is None
+
+    @pytest.mark.usefixtures("with_replica")
+    def test_catalog_reads_go_to_replica(self):
+        assert self.router.db_for_read(Product) == REPLICA_DB_ALIAS
+
+    @pytest.mark.usefixtures("with_replica")
+    def test_other_reads_use_default_routing(self):
+        assert self.router.db_for_read(get_user_model()) is None
+
+    @pytest.mark.usefixtures("with_replica")
+    def test_writes_pin_reads_to_primary(self, replica_state):
+        assert self.router.db_for_write(Product) == "default"
+        assert replica_state.written
+        assert self.router.db_for_read(Product) == "default"
+
+    @pytest.mark.usefixtures("with_replica")
+    def test_reads_go_to_primary_outside_a_replica_state(self):
+        def route():
+            return (
+                self.router.db_for_read(Product),
+                self.router.db_for_write(Product),
+                self.router.db_for_read(Product),
+                get_replica_state(),
+            )
+
+        assert Context().run(route) == ("default", "default", "default", None)
+
+    def test_nothing_is_migrated_on_replica(self):
+        assert self.router.allow_migrate(REPLICA_DB_ALIAS, "products") is False
+        assert self.router.allow_migrate("default", "products") is None
+
+
+@pytest.mark.usefixtures("with_replica")
+class TestReplicaPinningMiddleware:
+    def get_middleware(self, view=None):
+        return ReplicaPinningMiddleware(view or (lambda request: HttpResponse()))
+
+    def is_pinned_during(self, request) -> bool:
+        states = []
+
+        def view(request):
+            states.append(get_replica_state().pinned)
+            return HttpResponse()
+
+        self.get_middleware(view)(request)
+        return states[0]
+
+    def test_is_not_used_without_replica(self, monkeypatch):
+        monkeypatch.setattr("apps.core.middleware.has_replica", lambda: False)
+        with pytest.raises(MiddlewareNotUsed):
+            self.get_middleware()
+
+    def test_anonymous_read_is_not_pinned(self, rf):
+        request = rf.get("/")
+        request.user = AnonymousUser()
+        assert self.is_pinned_during(request) is False
+        response = self.get_middleware()(request)
+        assert ReplicaPinningMiddleware.cookie_name not in response.cookies
+
+    def test_staff_is_pinned(self, rf):
+        request = rf.get("/")
+        request.user = get_user_model()(is_staff=True)
+        assert self.is_pinned_during(request) is True
+
+    def test_write_sets_pin_cookie(self, rf, settings):
+        settings.DATABASE_REPLICA_PIN_SECONDS = 5
+        request = rf.post("/")
+        request.user = AnonymousUser()
+
+        def view(request):
+            ReplicaRouter().db_for_write(Product)
+            return HttpResponse()
+
+        response = self.get_middleware(view)(request)
+        cookie = response.cookies[ReplicaPinningMiddleware.cookie_name]
+        assert cookie["max-age"] == 5
+
+    def test_staff_is_pinned_in_async_request(self, rf):
+        states = []
+
+        async def view(request):
+            states.append(get_replica_state().pinned)
+            return HttpResponse()
+
+        async def auser():
+            return get_user_model()(is_staff=True)
+
+        request = rf.get("/")
+        request.auser = auser
+        async_to_sync(self.get_middleware(view))(request)
+        assert states == [True]
+
+    def test_pin_cookie_pins_request(self, rf):
+        request = rf.get("/")
+        request.COOKIES[ReplicaPinningMiddleware.cookie_name] = "1"
+        request.user = AnonymousUser()
+        assert self.is_pinned_during(request) is True
+
+    def test_restores_previous_state(self, rf, replica_state):
+        request = rf.get("/")
+        request.user = AnonymousUser()
+        self.get_middleware()(request)
+        assert get_replica_state() is replica_state
+
+
+@pytest.mark.parametrize(
+    "view_class",
+    [
+        ProductListView,
+        ProductDetailView,
+        AsyncHomeView,
+        AsyncProductListView,
+        AsyncProductDetailView,
+    ],
+)
+def test_catalog_views_are_not_atomic(view_class):
+    assert "default" in view_class.as_view()._non_atomic_requests  # noqa: SLF001
@@ -0,0 +1,106 @@
+# ruff: noqa: PLR2004
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from apps.core.middleware import ServerTimingMiddleware
+from apps.core.servertiming import RequestTimings
+from apps.core.servertiming import current_timings
+from apps.products.tests.factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def parse_header(value) -> dict[str, dict[str, str]]:
+    """Return the metrics of a `Server-Timing` header by name."""
+    metrics = {}
+    for metric in value.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(re.match(r"(\w+)=(.*)", p).groups() for p in params)
+    return metrics
+
+
+def view(request):
+    get_user_model().objects.exists()
+    cache.get_or_set("key", "value")
+    return HttpResponse(render_to_string("403.html"))
+
+
+class TestServerTimingMiddleware:
+    def test_reports_database_cache_and_render_time(self, client):
+        ProductFactory.create_batch(3, images=1)
+        url = reverse("products:product_list")
+        headers = {"HX-Request": "true"}
+        response = client.get(url, headers=headers)
+        metrics = parse_header(response["Server-Timing"])
+        assert set(metrics) == {"db", "cache", "render", "total"}
+        queries = len(response.wsgi_request.query_budget.queries)
+        assert metrics["db"]["desc"] == f'"{queries} queries"'
+        assert float(metrics["render"]["dur"]) > 0
+        assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"])
+        metrics = parse_header(client.get(url, headers=headers)["Server-Timing"])
+        assert metrics["db"]["desc"] == '"0 queries"'
+        # The catalog version, for the ETag and the fragment, the attributes
+        # schema, read twice by the filterset building the key, and the fragment.
+        assert metrics["cache"]["desc"] == '"5 hits / 0 misses"'
+
+    def test_logs_the_timings(self, rf, caplog):
+        middleware = ServerTimingMiddleware(self.get_response)
+        with caplog.at_level(logging.INFO, logger="apps.core.servertiming"):
+            middleware(rf.get("/path/"))
+        [record] = caplog.records
+        assert record.path == "/path/"
+        assert record.status == 200
+        assert record.queries == 1
+        assert (record.cache_hits, record.cache_misses) == (0, 1)
+        assert record.render_ms > 0
+        assert "GET /path/ 200 in " in record.getMessage()
+
+    def test_records_async_requests(self, rf):
+        async def get_response(request):
+            return await sync_to_async(self.get_response)(request)
+
+        middleware = ServerTimingMiddleware(get_response)
+        metrics = parse_header(async_to_sync(middleware)(rf.get("/"))["Server-Timing"])
+        assert metrics["db"]["desc"] == '"1 queries"'
+        assert metrics["cache"]["desc"] == '"0 hits / 1 misses"'
+
+    def get_response(self, request):
+        middleware = ServerTimingMiddleware(view)
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+
+class TestTimedCache:
+    def test_counts_hits_and_misses(self):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            cache.set("a", 1)
+            assert cache.get("a") == 1
+            assert cache.get("b", "default") == "default"
+            assert cache.get_many(["a", "b"]) == {"a": 1}
+            assert cache.get_or_set("c", 3) == 3
+            cache.incr("a")
+        finally:
+            current_timings.reset(token)
+        assert (timings.cache_hits, timings.cache_misses) == (2, 3)
+        assert timings.cache_time > 0
+
+    def test_is_not_recorded_outside_requests(self):
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
@@ -1,4 +1,51 @@
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django import forms
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import QueryDict
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
+from django_filters.widgets import SuffixedMultiWidget
+
+from .metrics import record_cache_lookup
+from .paginators import CursorPaginator
+
+
+def get_normalized_params(request, names=None) -> list:
+    """Return the non-empty query parameters of `request`, sorted by key.
+
+    When `names` is given, the other parameters are left out.
+    """
+    return sorted(
+        (key, sorted(value for value in values if value))
+        for key, values in request.GET.lists()
+        if any(values) and (names is None or key in names)
+    )
+
+
+def get_form_params(form) -> set[str]:
+    """Return the names of the query parameters read by the fields of `form`."""
+    params = set()
+    for field_name, field in form.fields.items():
+        name = form.add_prefix(field_name)
+        widget = field.widget
+        if isinstance(widget, SuffixedMultiWidget):
+            params.update(widget.suffixed(name, suffix) for suffix in widget.suffixes)
+        elif isinstance(widget, forms.MultiWidget):
+            params.update(name + suffix for suffix in widget.widgets_names)
+        else:
+            params.add(name)
+    return params
 
 
 class HtmxTemplateMixin:
@@ -42,3 +89,373 @@ class HtmxTemplateMixin:
         if self.htmx_template_name.startswith("#"):
             return [template_names[0] + self.htmx_template_name]
         return [self.htmx_template_name]
+
+
+class CursorPaginationMixin:
+    """Paginate a list view with opaque cursors instead of page numbers.
+
+    Replaces the OFFSET based pagination of `MultipleObjectMixin` with
+    `CursorPaginator`, reading the cursor from the `cursor_kwarg` query
+    parameter. The `page_obj` in the context is a `CursorPage`, exposing
+    `next_cursor` and `previous_cursor` to build the navigation links.
+
+    Raises:
+        Http404: If the cursor is malformed or belongs to another ordering.
+    """
+
+    paginator_class = CursorPaginator
+    cursor_kwarg = "cursor"
+
+    def get_paginator(self, queryset, per_page, *args, **kwargs):
+        return self.paginator_class(queryset, per_page)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg) or None
+        try:
+            page = paginator.page(cursor)
+        except InvalidPage as e:
+            msg = _("Invalid cursor: %(message)s") % {"message": str(e)}
+            raise Http404(msg) from e
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """See `paginate_queryset()`."""
+        paginator = self.get_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg) or None
+        try:
+            page = await paginator.apage(cursor)
+        except InvalidPage as e:
+            msg = _("Invalid cursor: %(message)s") % {"message": str(e)}
+            raise Http404(msg) from e
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class AsyncFilterViewMixin:
+    """Serve a django-filter `FilterView` from an async `get()`.
+
+    The filterset is bound and validated in a thread, since validating model
+    choices queries the database, and the page is fetched with the async ORM
+    through `apaginate_queryset()`, provided by `CursorPaginationMixin`. The
+    template is rendered in a thread by the async handler afterwards, so lazy
+    context such as facets can still query the database.
+    """
+
+    pagination = None
+
+    def filter_object_list(self) -> None:
+        filterset_class = self.get_filterset_class()
+        self.filterset = self.get_filterset(filterset_class)
+        if (
+            not self.filterset.is_bound
+            or self.filterset.is_valid()
+            or not self.get_strict()
+        ):
+            self.object_list = self.filterset.qs
+        else:
+            self.object_list = self.filterset.queryset.none()
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.pagination
+
+    async def get(self, request, *args, **kwargs):
+        await sync_to_async(self.filter_object_list)()
+        page_size = self.get_paginate_by(self.object_list)
+        if page_size:
+            self.pagination = await self.apaginate_queryset(self.object_list, page_size)
+        context = self.get_context_data(
+            filter=self.filterset,
+            object_list=self.object_list,
+        )
+        return self.render_to_response(context)
+
+
+class BaseHtmxFragmentCacheMixin:
+    """Build the keys and store the entries of the HTMX fragment cache."""
+
+    fragment_cache_prefix = "fragment"
+    fragment_cache_timeout = 60 * 15
+    fragment_cache_params: tuple[str, ...] = ()
+
+    def get_fragment_cache_params(self) -> set[str]:
+        """Return the query parameters the cached fragments depend on.
+
+        Those read by the form of the filterset, if the view has one, and the
+        cursor, if paginated, besides the declared `fragment_cache_params`.
+        Any other parameter is left out of the key, so that made-up parameters
+        cannot fill the cache with copies of the same fragment.
+        """
+        params = set(self.fragment_cache_params)
+        if hasattr(self, "get_filterset_class"):
+            filterset = getattr(self, "filterset", None)
+            if filterset is None:
+                filterset = self.get_filterset_class()(request=self.request)
+            params |= get_form_params(filterset.form)
+        if hasattr(self, "cursor_kwarg"):
+            params.add(self.cursor_kwarg)
+        return params
+
+    def get_fragment_query(self) -> QueryDict:
+        """Return the query parameters of the request the fragments depend on.
+
+        The links of a cached fragment must be built from these instead of the
+        full query string, or the parameters of the request that rendered it
+        would be served to every later request sharing its key.
+        """
+        names = self.get_fragment_cache_params()
+        query = QueryDict(mutable=True)
+        for key, values in self.request.GET.lists():
+            if key in names:
+                query.setlist(key, values)
+        return query
+
+    def get_context_data(self, **kwargs):
+        kwargs.setdefault("fragment_query", self.get_fragment_query())
+        return super().get_context_data(**kwargs)
+
+    def get_fragment_cache_key(self) -> str:
+        params = get_normalized_params(
+            self.request,
+            self.get_fragment_cache_params(),
+        )
+        data = json.dumps([self.request.path, get_language(), params])
+        digest = hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+        return f"{self.fragment_cache_prefix}:{self.__class__.__name__}:{digest}"
+
+    def record_fragment_lookup(self, content) -> None:
+        record_cache_lookup(
+            f"{self.fragment_cache_prefix}:{self.__class__.__name__}",
+            hit=content is not None,
+        )
+
+    def cache_fragment(self, response, key, version):
+        """Store the content of `response` once rendered, if it succeeded."""
+        if response.status_code == 200:  # noqa: PLR2004
+            response.add_post_render_callback(
+                lambda response: cache.set(
+                    key,
+                    response.content,
+                    self.fragment_cache_timeout,
+                    version=version,
+                ),
+            )
+        return response
+
+
+class HtmxFragmentCacheMixin(BaseHtmxFragmentCacheMixin):
+    """Cache the rendered response of HTMX requests.
+
+    Intended to be combined with `HtmxTemplateMixin`, so that only the small
+    fragment rendered for HTMX requests is cached. The cache key is built from
+    the request path, the active language and the query parameters returned by
+    `get_fragment_cache_params()`, normalized so that parameter order and empty
+    values do not produce different entries.
+
+    Entries are stored with the version returned by `get_fragment_cache_version()`.
+    Views whose data can change should return a version that is bumped on every
+    change, which invalidates all their entries at once without scanning keys.
+    """
+
+    def get_fragment_cache_version(self) -> int | None:
+        return None
+
+    def get(self, request, *args, **kwargs):
+        if not getattr(request, "htmx", False):
+            return super().get(request, *args, **kwargs)
+        key = self.get_fragment_cache_key()
+        version = self.get_fragment_cache_version()
+        content = cache.get(key, version=version)
+        self.record_fragment_lookup(content)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        return self.cache_fragment(response, key, version)
+
+
+class AsyncHtmxFragmentCacheMixin(BaseHtmxFragmentCacheMixin):
+    """`HtmxFragmentCacheMixin` for views with an async `get()`.
+
+    The version is read from `aget_fragment_cache_version()` instead, and the
+    key is built in a thread.
+    """
+
+    async def aget_fragment_cache_version(self) -> int | None:
+        return None
+
+    async def get(self, request, *args, **kwargs):
+        if not getattr(request, "htmx", False):
+            return await super().get(request, *args, **kwargs)
+        # Building the filterset of the view may query the attributes schema.
+        key = await sync_to_async(self.get_fragment_cache_key)()
+        version = await self.aget_fragment_cache_version()
+        content = await cache.aget(key, version=version)
+        self.record_fragment_lookup(content)
+        if content is not None:
+            return HttpResponse(content)
+        response = await super().get(request, *args, **kwargs)
+        return self.cache_fragment(response, key, version)
+
+
+class ObjectCacheMixin:
+    """Cache the object looked up by a single object view.
+
+    Views using this mixin must implement `get_object_cache_key()`, building
+    the key from the URL keyword arguments, so a hit needs no query at all.
+    Entries are not invalidated by the mixin: the owner of the key should
+    delete it whenever the object, or anything fetched along with it, changes.
+    """
+
+    object_cache_timeout = 60 * 15
+
+    def get_object_cache_key(self) -> str:
+        msg = (
+            f"{self.__class__.__name__} is missing the implementation of "
+            "get_object_cache_key()."
+        )
+        raise ImproperlyConfigured(msg)
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        key = self.get_object_cache_key()
+        obj = cache.get(key)
+        record_cache_lookup(f"object:{self.__class__.__name__}", hit=obj is not None)
+        if obj is None:
+            obj = super().get_object()
+            cache.set(key, obj, self.object_cache_timeout)
+        return obj
+
+    async def aget_object(self, queryset=None):
+        """See `get_object()`."""
+        if queryset is not None:
+            return await super().aget_object(queryset)
+        key = self.get_object_cache_key()
+        obj = await cache.aget(key)
+        record_cache_lookup(f"object:{self.__class__.__name__}", hit=obj is not None)
+        if obj is None:
+            obj = await super().aget_object()
+            await cache.aset(key, obj, self.object_cache_timeout)
+        return obj
+
+
+class AsyncDetailViewMixin:
+    """Serve a `DetailView` from an async `get()`.
+
+    The object is looked up by primary key or slug like `get_object()` does,
+    but with the async ORM. The template is rendered in a thread by the async
+    handler, so the object should be fetched with the relations it displays.
+    """
+
+    async def aget_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        if pk is None and slug is None:
+            msg = (
+                f"Generic detail view {self.__class__.__name__} must be called with "
+                "either an object pk or a slug in the URLconf."
+            )
+            raise AttributeError(msg)
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            msg = _("No %(verbose_name)s found matching the query") % {
+                "verbose_name": queryset.model._meta.verbose_name,  # noqa: SLF001
+            }
+            raise Http404(msg) from None
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class BaseConditionalGetMixin:
+    """Build the ETags and patch the responses of conditional GET requests."""
+
+    def build_etag(self, version, user) -> str | None:
+        if version is None:
+            return None
+        data = json.dumps(
+            [
+                version,
+                self.request.path,
+                get_normalized_params(self.request),
+                get_language(),
+                bool(getattr(self.request, "htmx", False)),
+                str(getattr(user, "pk", None)),
+            ],
+        )
+        return quote_etag(hashlib.md5(data.encode(), usedforsecurity=False).hexdigest())
+
+    def patch_conditional_response(self, response, etag):
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", etag)
+            patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ["HX-Request"])
+        return response
+
+
+class ConditionalGetMixin(BaseConditionalGetMixin):
+    """Answer GET requests with 304 Not Modified while the content is unchanged.
+
+    The ETag is derived from `get_etag_version()`, a cheap version bumped on
+    every change of the data shown by the view, together with the request path,
+    normalized query string, active language and user. HTMX requests get a
+    separate validator, since they are answered with a fragment instead of the
+    full page, and responses vary on the `HX-Request` header.
+
+    The precondition is evaluated before the view runs, so a matching request
+    skips the queries and the rendering. Views returning `None` as the version
+    (the default) are not conditional.
+    """
+
+    def get_etag_version(self) -> int | None:
+        return None
+
+    def get_etag(self) -> str | None:
+        return self.build_etag(
+            self.get_etag_version(),
+            getattr(self.request, "user", None),
+        )
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.patch_conditional_response(response, etag)
+
+
+class AsyncConditionalGetMixin(BaseConditionalGetMixin):
+    """`ConditionalGetMixin` for views with an async `get()`.
+
+    The version is read from `aget_etag_version()` instead, and the user is
+    loaded with `request.auser()`, so the event loop never blocks on a query.
+    """
+
+    async def aget_etag_version(self) -> int | None:
+        return None
+
+    async def aget_etag(self) -> str | None:
+        version = await self.aget_etag_version()
+        if version is None:
+            return None
+        auser = getattr(self.request, "auser", None)
+        return self.build_etag(version, await auser() if auser else None)
+
+    async def get(self, request, *args, **kwargs):
+        etag = await self.aget_etag()
+        if etag is None:
+            return await super().get(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        return self.patch_conditional_response(response, etag)
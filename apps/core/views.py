@@ -0,0 +1,47 @@
+import ipaddress
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.cache import never_cache
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .metrics import render_metrics
+
+
+@method_decorator([never_cache, transaction.non_atomic_requests], name="dispatch")
+class MetricsView(View):
+    """Expose the metrics in the Prometheus text format.
+
+    Only staff users, requests bearing the `METRICS_TOKEN` and the addresses
+    within `METRICS_ALLOWED_NETWORKS`, like a scraper in the private network,
+    may read them. The addresses are read from `REMOTE_ADDR`, so the networks
+    must stay empty where it is the address of a proxy rather than the client.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_allowed(request):
+            raise PermissionDenied
+        return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+    def is_allowed(self, request) -> bool:
+        if request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        if token and constant_time_compare(
+            request.headers.get("Authorization", ""),
+            f"Bearer {token}",
+        ):
+            return True
+        try:
+            address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+        except ValueError:
+            return False
+        return any(
+            address in ipaddress.ip_network(network)
+            for network in settings.METRICS_ALLOWED_NETWORKS
+        )
@@ -0,0 +1,211 @@
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from dataclasses import dataclass
+from functools import partial
+
+from django.urls import reverse
+
+from apps.core.queries import QueryRecorder
+
+from .filters import ProductFilter
+from .models import Category
+from .models import Product
+from .models import ProductImage
+from .models import ProductVariant
+from .utils import get_attributes_schema
+
+# Caches the scenarios are measured with: "cold" misses every cached fragment,
+# object and schema, "warm" serves them from a private in-memory cache filled
+# by the warm-up run.
+BENCHMARK_CACHES = {
+    "cold": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "warm": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark",
+    },
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    name: str
+    run: Callable[[], object]
+
+
+@dataclass(frozen=True, slots=True)
+class Measurement:
+    """The median wall and SQL times of a scenario, in ms, and its query count."""
+
+    name: str
+    wall_time: float
+    queries: int
+    sql_time: float
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        return f"{self.name}: {self.metric} {self.baseline:g} -> {self.current:g}"
+
+
+def get(client, path, data=None, headers=None):
+    """Request `path` with the test `client`, failing unless it answers 200."""
+    response = client.get(path, data, headers=headers, secure=True)
+    if response.status_code != 200:  # noqa: PLR2004
+        msg = f"GET {path} {data or ''} answered {response.status_code}."
+        raise RuntimeError(msg)
+    return response
+
+
+def get_category_mixes() -> dict[str, list[str]]:
+    """Return the category filters measured: none, one category and half of them."""
+    slugs = list(
+        Category.objects.active().order_by("name").values_list("slug", flat=True),
+    )
+    return {
+        "all": [],
+        "one": slugs[:1],
+        "half": slugs[: max(1, len(slugs) // 2)],
+    }
+
+
+def get_scenarios(client, admin_client) -> list[Scenario]:
+    """Return the catalog paths to measure, on the current catalog.
+
+    `client` requests the store pages and `admin_client` must be logged in as
+    a superuser to request the admin changelists.
+    """
+    list_url = reverse("products:product_list")
+    orderings = [
+        value for value, _ in ProductFilter.base_filters["ordering"].extra["choices"]
+    ]
+    scenarios = []
+    for mix, slugs in get_category_mixes().items():
+        for ordering in orderings:
+            data = {"ordering": ordering, "category": slugs}
+            scenarios.append(
+                Scenario(
+                    f"product_list[ordering={ordering},categories={mix}]",
+                    partial(get, client, list_url, data),
+                ),
+            )
+        scenarios.append(
+            Scenario(
+                f"product_list_htmx[categories={mix}]",
+                partial(
+                    get,
+                    client,
+                    list_url,
+                    {"category": slugs},
+                    {"HX-Request": "true"},
+                ),
+            ),
+        )
+    products = Product.objects.active().order_by("name")
+    slug = products.values_list("slug", flat=True).first()
+    if slug is not None:
+        scenarios.append(
+            Scenario(
+                "product_detail",
+                partial(get, client, reverse("products:product_detail", args=[slug])),
+            ),
+        )
+    scenarios += [
+        Scenario(
+            "admin_product_changelist",
+            partial(get, admin_client, reverse("admin:products_product_changelist")),
+        ),
+        Scenario(
+            "admin_category_changelist",
+            partial(get, admin_client, reverse("admin:products_category_changelist")),
+        ),
+        Scenario("get_attributes_schema", get_attributes_schema),
+    ]
+    return scenarios
+
+
+def get_catalog_size() -> dict[str, int]:
+    return {
+        "categories": Category.objects.count(),
+        "products": Product.objects.count(),
+        "variants": ProductVariant.objects.count(),
+        "images": ProductImage.objects.count(),
+    }
+
+
+def measure(scenario, *, repeat=5) -> Measurement:
+    """Run `scenario` once to warm up, then `repeat` times under a `QueryRecorder`.
+
+    The queries are recorded on every connection, so the reads sent to the
+    replica are counted as well.
+    """
+    scenario.run()
+    wall_times, sql_times, queries = [], [], 0
+    for _ in range(repeat):
+        recorder = QueryRecorder()
+        recorder.install()
+        start = time.perf_counter()
+        try:
+            scenario.run()
+        finally:
+            recorder.uninstall()
+        wall_times.append(time.perf_counter() - start)
+        sql_times.append(recorder.sql_time)
+        queries = max(queries, len(recorder.queries))
+    return Measurement(
+        name=scenario.name,
+        wall_time=round(statistics.median(wall_times) * 1000, 3),
+        queries=queries,
+        sql_time=round(statistics.median(sql_times), 3),
+    )
+
+
+def to_json(measurements, **metadata) -> dict:
+    """Return `measurements` as the JSON stored for a run or a baseline."""
+    return {
+        **metadata,
+        "measurements": {
+            measurement.name: {
+                key: value
+                for key, value in asdict(measurement).items()
+                if key != "name"
+            }
+            for measurement in measurements
+        },
+    }
+
+
+def compare(current, baseline, *, tolerance=0.25, min_delta=1.0) -> list[Regression]:
+    """Return the regressions of the `current` run against the `baseline` run.
+
+    Both are dicts as returned by `to_json()`. Any extra query is a regression;
+    a time is one when it grows by more than `tolerance` of the baseline and by
+    more than `min_delta` ms, so the noise of fast scenarios is ignored.
+    Scenarios missing from the baseline are not compared.
+    """
+    regressions = []
+    previous = baseline["measurements"]
+    for name, measurement in current["measurements"].items():
+        if name not in previous:
+            continue
+        if measurement["queries"] > previous[name]["queries"]:
+            regressions.append(
+                Regression(
+                    name,
+                    "queries",
+                    previous[name]["queries"],
+                    measurement["queries"],
+                ),
+            )
+        for metric in ("wall_time", "sql_time"):
+            before, after = previous[name][metric], measurement[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append(Regression(name, metric, before, after))
+    return regressions
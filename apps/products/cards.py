@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.apps import apps
+from django.urls import reverse
+from django.utils.encoding import filepath_to_uri
+
+from .constants import PRODUCT_CARD_IMAGE_HEIGHT
+from .constants import PRODUCT_IMAGE_FALLBACK_FORMAT
+from .constants import PRODUCT_IMAGE_RENDITION_FORMATS
+from .utils import format_price_range
+
+SLUG_PLACEHOLDER = "product-slug"
+
+
+@dataclass(frozen=True, slots=True)
+class CardImageSource:
+    """The renditions of a card image in a format other than the fallback."""
+
+    type: str
+    srcset: str
+
+
+@dataclass(frozen=True, slots=True)
+class CardImage:
+    """An image of a product card, with its URLs already resolved.
+
+    Once the renditions of the image are written, `url` is the largest one in
+    the fallback format, `srcset` lists them all, and `sources` holds the
+    renditions in the other formats, to be offered in a `<picture>`. Until
+    then, `url` is the original image.
+    """
+
+    url: str
+    alt_text: str
+    srcset: str = ""
+    sizes: str = ""
+    sources: tuple[CardImageSource, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ProductCard:
+    """The data needed to render a product in the catalog grid.
+
+    Built from plain rows by `ProductQuerySet.as_cards()`, so listing products
+    does not instantiate `Product` and `ProductImage` models. Besides `pk`, the
+    `name`, prices and `search_rank` are kept so the cursor paginator can read
+    the position of a card in any of the catalog orderings.
+    """
+
+    pk: UUID
+    name: str
+    slug: str
+    url: str
+    min_price: Decimal | None = None
+    max_price: Decimal | None = None
+    images: tuple[CardImage, ...] = ()
+    modified: datetime | None = None
+    search_rank: float | None = None
+
+    @property
+    def price_range(self) -> str:
+        return format_price_range(self.min_price, self.max_price)
+
+
+class ProductCardBuilder:
+    """Build `ProductCard` objects, resolving the URL prefixes only once.
+
+    The product URL is reversed once with a placeholder slug, and image URLs
+    are joined to the storage base URL, the way `FileSystemStorage` builds
+    them, instead of calling `reverse()` and `storage.url()` for every card.
+    """
+
+    def __init__(self):
+        ProductImage = apps.get_model("products", "ProductImage")
+        storage = ProductImage._meta.get_field("image").storage  # noqa: SLF001
+        url = reverse("products:product_detail", kwargs={"slug": SLUG_PLACEHOLDER})
+        self.url_prefix, _, self.url_suffix = url.partition(SLUG_PLACEHOLDER)
+        self.media_url = storage.url("")
+
+    def get_url(self, slug) -> str:
+        return f"{self.url_prefix}{slug}{self.url_suffix}"
+
+    def get_image_url(self, name) -> str:
+        return self.media_url + filepath_to_uri(name).lstrip("/")
+
+    def get_srcset(self, files) -> str:
+        return ", ".join(
+            f"{self.get_image_url(name)} {width}w" for width, name in files
+        )
+
+    def build_image(self, image) -> CardImage:
+        """Return the card image of an image row, with its renditions if current."""
+        renditions = image.get("renditions") or {}
+        formats = renditions.get("formats", {})
+        fallback = formats.get(PRODUCT_IMAGE_FALLBACK_FORMAT)
+        if renditions.get("source") != image["image"] or not fallback:
+            return CardImage(
+                url=self.get_image_url(image["image"]),
+                alt_text=image["alt_text"],
+            )
+        width = PRODUCT_CARD_IMAGE_HEIGHT * renditions["width"] / renditions["height"]
+        return CardImage(
+            url=self.get_image_url(fallback[-1][1]),
+            alt_text=image["alt_text"],
+            srcset=self.get_srcset(fallback),
+            sizes=f"{round(width)}px",
+            sources=tuple(
+                CardImageSource(
+                    type=mime_type,
+                    srcset=self.get_srcset(formats[mime_type]),
+                )
+                for mime_type in PRODUCT_IMAGE_RENDITION_FORMATS
+                if mime_type != PRODUCT_IMAGE_FALLBACK_FORMAT and formats.get(mime_type)
+            ),
+        )
+
+    def build(self, row, images) -> ProductCard:
+        """Return the card of a product row, given its image rows."""
+        return ProductCard(
+            pk=row["pk"],
+            name=row["name"],
+            slug=row["slug"],
+            url=self.get_url(row["slug"]),
+            min_price=row["min_price"],
+            max_price=row["max_price"],
+            images=tuple(self.build_image(image) for image in images),
+            modified=row["card_modified"],
+            search_rank=row.get("search_rank"),
+        )
@@ -13,3 +13,48 @@ NO_ATTRIBUTES_SCHEMA = {
     "additionalProperties": False,
 }
 ATTRIBUTES_SCHEMA_CACHE_KEY = "products:attributes_schema:v1"
+CATALOG_VERSION_CACHE_KEY = "products:catalog_version:v1"
+PRODUCT_DETAIL_CACHE_KEY = "products:detail:v1:{slug}"
+PRODUCT_CARD_CACHE_KEY = "products:card:v1:{pk}:{language}:{digest}"
+# Rendered cards are keyed on their content, so they are never stale: the
+# timeout only bounds how long the entries of old versions take space.
+PRODUCT_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Text search configurations matching `settings.LANGUAGES`.
+SEARCH_CONFIGS = ("spanish", "english")
+# JSON Schema property types indexed in `ProductVariantAttribute`.
+NUMERIC_ATTRIBUTE_TYPES = {"number", "integer"}
+TEXT_ATTRIBUTE_TYPES = {"string"}
+# Variant fields read by `ProductSummary` and by `ProductVariantAttribute`:
+# writes to other fields leave them current.
+PRODUCT_SUMMARY_FIELDS = {
+    "product",
+    "price",
+    "stock",
+    "is_active",
+    # Read by the variant matrix.
+    "sku",
+    "attributes",
+    "sort_order",
+}
+VARIANT_ATTRIBUTE_FIELDS = {"attributes", "is_active"}
+# Strategies available to `ProductQuerySet.with_images()`.
+IMAGE_STRATEGIES = ("window", "subquery")
+# Widths of the renditions of product images, and their formats by MIME type,
+# with the Pillow format, file extension and encoder options of each. Formats
+# the installed Pillow cannot encode are skipped; JPEG is the fallback.
+PRODUCT_IMAGE_RENDITION_WIDTHS = (320, 640, 960)
+PRODUCT_IMAGE_RENDITION_FORMATS = {
+    "image/avif": ("AVIF", "avif", {"quality": 60, "speed": 8}),
+    "image/webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "image/jpeg": (
+        "JPEG",
+        "jpg",
+        {"quality": 85, "optimize": True, "progressive": True},
+    ),
+}
+PRODUCT_IMAGE_FALLBACK_FORMAT = "image/jpeg"
+# Height of the images of product cards, in CSS pixels.
+PRODUCT_CARD_IMAGE_HEIGHT = 250
+# Formats written by `exports.stream_catalog()` and read by
+# `imports.import_catalog()`.
+CATALOG_FORMATS = ("csv", "jsonl")
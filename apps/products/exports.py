@@ -0,0 +1,88 @@
+import csv
+import json
+from collections.abc import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .constants import CATALOG_FORMATS
+
+# Export columns and the `Product` lookups they are read from. Products are
+# joined to their variants, so there is a row per variant, and a row with
+# empty variant columns for products without variants.
+EXPORT_COLUMNS = {
+    "product_id": "pk",
+    "product_name": "name",
+    "product_slug": "slug",
+    "category_name": "category__name",
+    "category_slug": "category__slug",
+    "product_is_active": "is_active",
+    "sku": "variants__sku",
+    "price": "variants__price",
+    "stock": "variants__stock",
+    "variant_is_active": "variants__is_active",
+    "attributes": "variants__attributes",
+}
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+class Echo:
+    """A file-like object returning what is written, to stream `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_rows(queryset, *, chunk_size=2000) -> Iterator[dict]:
+    """Return the export rows of the products of `queryset`, one per variant.
+
+    The rows are plain dicts streamed with `QuerySet.iterator()`, which uses a
+    server-side cursor on PostgreSQL, so only `chunk_size` rows are held in
+    memory at once, however large the catalog is.
+    """
+    return (
+        queryset.order_by("name", "pk", "variants__sort_order", "variants__sku")
+        .values(**{column: F(lookup) for column, lookup in EXPORT_COLUMNS.items()})
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def stream_csv(rows, *, batch_size=500) -> Iterator[str]:
+    """Yield `rows` as CSV, in batches of `batch_size` lines."""
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(EXPORT_COLUMNS)]
+    for row in rows:
+        if row["attributes"] is not None:
+            row["attributes"] = json.dumps(row["attributes"], sort_keys=True)
+        lines.append(writer.writerow(row.values()))
+        if len(lines) >= batch_size:
+            yield "".join(lines)
+            lines.clear()
+    yield "".join(lines)
+
+
+def stream_jsonl(rows, *, batch_size=500) -> Iterator[str]:
+    """Yield `rows` as JSON Lines, in batches of `batch_size` lines."""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(row) + "\n")
+        if len(lines) >= batch_size:
+            yield "".join(lines)
+            lines.clear()
+    if lines:
+        yield "".join(lines)
+
+
+def stream_catalog(queryset, export_format, *, chunk_size=2000) -> Iterator[str]:
+    """Stream the products of `queryset` with their variants in `export_format`."""
+    if export_format not in CATALOG_FORMATS:
+        msg = f"Unknown export format {export_format!r}."
+        raise ValueError(msg)
+    rows = get_export_rows(queryset, chunk_size=chunk_size)
+    if export_format == "csv":
+        return stream_csv(rows)
+    return stream_jsonl(rows)
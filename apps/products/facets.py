@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+
+from django.db.models import Count
+
+
+@dataclass(frozen=True, slots=True)
+class FacetValue:
+    """A single selectable value of a facet, with its matching product count."""
+
+    value: str
+    label: str
+    count: int
+    selected: bool = False
+
+
+def count_products_by(queryset, field) -> dict:
+    """Return the number of products in `queryset` for each value of `field`.
+
+    Runs a single grouped query, without joining the facet's own table, so its
+    cost only depends on the products that match the current filters.
+    """
+    rows = queryset.order_by().values_list(field).annotate(count=Count("pk"))
+    return dict(rows)
+
+
+def count_distinct_by_conditions(queryset, field, conditions) -> dict:
+    """Return the number of distinct `field` values matching each condition.
+
+    `conditions` maps names to `Q` objects. All counts are computed in a single
+    aggregate query over `queryset`, one filtered `COUNT(DISTINCT)` per name.
+    """
+    if not conditions:
+        return {}
+    return queryset.order_by().aggregate(
+        **{
+            name: Count(field, distinct=True, filter=condition)
+            for name, condition in conditions.items()
+        },
+    )
+
+
+def build_category_facets(categories, counts, selected) -> list[FacetValue]:
+    """Return one `FacetValue` per category, in the order they are given."""
+    selected = set(selected)
+    return [
+        FacetValue(
+            value=category.slug,
+            label=category.name,
+            count=counts.get(category.pk, 0),
+            selected=category.slug in selected,
+        )
+        for category in categories
+    ]
+
+
+def build_attribute_facets(choices, counts, selected) -> list[FacetValue]:
+    """Return one `FacetValue` per `(value, label)` choice, in the order given."""
+    selected = set(selected)
+    return [
+        FacetValue(
+            value=value,
+            label=label,
+            count=counts.get(value, 0),
+            selected=value in selected,
+        )
+        for value, label in choices
+    ]
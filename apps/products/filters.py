@@ -1,29 +1,107 @@
 import django_filters
 from django import forms
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from .facets import build_attribute_facets
+from .facets import build_category_facets
+from .facets import count_distinct_by_conditions
+from .facets import count_products_by
+from .managers import get_attribute_condition
 from .models import Category
 from .models import Product
+from .models import ProductVariant
+from .models import ProductVariantAttribute
+from .utils import get_enum_attributes
+from .utils import get_range_attributes
+
+
+class ProductOrderingFilter(django_filters.OrderingFilter):
+    """Ordering filter with a "relevance" choice for search results.
+
+    Relevance orders by the `search_rank` annotation added by a search, and
+    falls back to name order when the products are not being searched.
+    """
+
+    relevance = "relevance"
+
+    def filter(self, qs, value):
+        if value and self.relevance in value:
+            if "search_rank" in qs.query.annotations:
+                return qs.order_by("-search_rank", "name")
+            return qs.order_by("name")
+        return super().filter(qs, value)
+
+
+class AttributeFilter(django_filters.MultipleChoiceFilter):
+    """Filter products by the values of an enumerated variant attribute.
+
+    The filter itself is a no-op: `ProductFilter` combines the conditions of
+    all attribute filters so that the selected values are matched by the same
+    variant.
+    """
+
+    def __init__(self, *args, values=(), **kwargs):
+        self.values = {str(value): value for value in values}
+        kwargs.setdefault("choices", [(value, value) for value in self.values])
+        kwargs.setdefault("widget", forms.CheckboxSelectMultiple)
+        super().__init__(*args, **kwargs)
+
+    def get_condition(self, value) -> Q:
+        """Return a condition matching variants with any of the selected values."""
+        values = [self.values[choice] for choice in value]
+        return get_attribute_condition(
+            self.field_name,
+            values,
+            using=ProductVariant.objects.db,
+        )
+
+    def filter(self, qs, value):
+        return qs
+
+
+class AttributeRangeFilter(django_filters.RangeFilter):
+    """Filter products by a range of a numeric variant attribute.
+
+    Like `AttributeFilter`, the condition is applied by `ProductFilter`. It is
+    served by the `(key, number_value, variant)` index of
+    `ProductVariantAttribute` instead of casting the JSON of every variant.
+    """
+
+    def get_condition(self, value) -> Q:
+        """Return a condition matching variants with a value within the range."""
+        indexed = ProductVariantAttribute.objects.in_range(
+            self.field_name,
+            value.start,
+            value.stop,
+        )
+        return Q(pk__in=indexed.values("variant_id"))
+
+    def filter(self, qs, value):
+        return qs
 
 
 class ProductFilter(django_filters.FilterSet):
+    q = django_filters.CharFilter(
+        label=_("Search"),
+        method="filter_search",
+    )
     category = django_filters.ModelMultipleChoiceFilter(
         field_name="category__slug",
         to_field_name="slug",
         queryset=(
-            Category.objects.active()
-            .with_product_count()
-            .only("id", "name", "slug")
-            .order_by("name")
+            Category.objects.active().only("id", "name", "slug").order_by("name")
         ),
         widget=forms.CheckboxSelectMultiple,
     )
-    ordering = django_filters.OrderingFilter(
+    ordering = ProductOrderingFilter(
         fields=(
             ("name", "name"),
             ("min_price", "min_price"),
         ),
         choices=(
+            (ProductOrderingFilter.relevance, _("Relevance")),
             ("name", _("A-Z order")),
             ("-name", _("Z-A order")),
             ("min_price", _("Low-High price")),
@@ -33,12 +111,156 @@ class ProductFilter(django_filters.FilterSet):
         empty_label=None,
     )
 
+    # An attribute may be enumerated in a schema and numeric in another, so the
+    # value and range filters are named apart.
+    attribute_prefix = "attr_"
+    range_prefix = "range_"
+
     class Meta:
         model = Product
-        fields = ["category", "ordering"]
+        fields = ["q", "category", "ordering"]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.form.fields["category"].label_from_instance = lambda obj: (
-            f"{obj.name} ({obj.product_count})"
+        for key, attribute in get_enum_attributes().items():
+            attribute_filter = AttributeFilter(
+                field_name=key,
+                label=attribute["title"],
+                values=attribute["values"],
+            )
+            attribute_filter.parent = self
+            self.filters[f"{self.attribute_prefix}{key}"] = attribute_filter
+        for key, attribute in get_range_attributes().items():
+            range_filter = AttributeRangeFilter(
+                field_name=key,
+                label=attribute["title"],
+            )
+            range_filter.parent = self
+            self.filters[f"{self.range_prefix}{key}"] = range_filter
+
+    @property
+    def attribute_filters(self) -> dict:
+        return {
+            name: filter_
+            for name, filter_ in self.filters.items()
+            if isinstance(filter_, AttributeFilter)
+        }
+
+    @property
+    def range_filters(self) -> dict:
+        return {
+            name: filter_
+            for name, filter_ in self.filters.items()
+            if isinstance(filter_, AttributeRangeFilter)
+        }
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+    def get_variant_condition(self, *exclude) -> Q:
+        """Return the condition of the selected attribute values except `exclude`."""
+        condition = Q()
+        if not self.is_bound or not self.form.is_valid():
+            return condition
+        variant_filters = {**self.attribute_filters, **self.range_filters}
+        for name, variant_filter in variant_filters.items():
+            value = self.form.cleaned_data.get(name)
+            if name not in exclude and value:
+                condition &= variant_filter.get_condition(value)
+        return condition
+
+    def filter_attributes(self, queryset, condition):
+        """Filter products having an active variant that matches `condition`."""
+        if not condition:
+            return queryset
+        variants = ProductVariant.objects.active().filter(condition)
+        return queryset.filter(pk__in=variants.values("product_id"))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.filter_attributes(queryset, self.get_variant_condition())
+
+    def get_facet_queryset(self, *exclude):
+        """Return the active products matching every filter except `exclude`.
+
+        Facets exclude their own filter so that selecting a value does not hide
+        the alternatives, and never apply the ordering.
+        """
+        queryset = Product.objects.active()
+        if not self.is_bound:
+            return queryset
+        self.form.is_valid()
+        for name, value in self.form.cleaned_data.items():
+            if name in exclude or name == "ordering":
+                continue
+            queryset = self.filters[name].filter(queryset, value)
+        return self.filter_attributes(
+            queryset,
+            self.get_variant_condition(*exclude),
+        )
+
+    @cached_property
+    def facets(self) -> dict:
+        """Return the facet values for the current filter state, by filter name."""
+        return {"category": self.get_category_facets(), **self.get_attribute_facets()}
+
+    @property
+    def has_active_filters(self) -> bool:
+        """Return whether any filter other than the ordering has a value."""
+        if not self.is_bound or not self.form.is_valid():
+            return False
+        return any(
+            value
+            for name, value in self.form.cleaned_data.items()
+            if name != "ordering"
+        )
+
+    @property
+    def attribute_facets(self) -> list[tuple]:
+        """Return `(bound field, facet values)` pairs of the attribute filters."""
+        return [(self.form[name], self.facets[name]) for name in self.attribute_filters]
+
+    @property
+    def range_fields(self) -> list:
+        """Return the bound fields of the attribute range filters."""
+        return [self.form[name] for name in self.range_filters]
+
+    def get_category_facets(self):
+        categories = self.filters["category"].queryset
+        counts = count_products_by(self.get_facet_queryset("category"), "category")
+        selected = self.form["category"].value() or []
+        return build_category_facets(categories, counts, selected)
+
+    def get_attribute_facets(self) -> dict:
+        """Return the facet values of every attribute filter, by filter name.
+
+        All counts come from one aggregate query over the active variants of
+        the products matching the other filters. Each value is counted with the
+        selections of the other attributes, but not of its own.
+        """
+        attribute_filters = self.attribute_filters
+        products = self.get_facet_queryset(*attribute_filters)
+        conditions = {}
+        for name, attribute_filter in attribute_filters.items():
+            other_condition = self.get_variant_condition(name)
+            for index, choice in enumerate(attribute_filter.values):
+                conditions[f"{name}__{index}"] = (
+                    other_condition & attribute_filter.get_condition([choice])
+                )
+        counts = count_distinct_by_conditions(
+            ProductVariant.objects.active().filter(product__in=products),
+            "product",
+            conditions,
         )
+        facets = {}
+        for name, attribute_filter in attribute_filters.items():
+            choices = list(attribute_filter.extra["choices"])
+            facets[name] = build_attribute_facets(
+                choices,
+                {
+                    choice: counts[f"{name}__{index}"]
+                    for index, (choice, _label) in enumerate(choices)
+                },
+                self.form[name].value() or [],
+            )
+        return facets
@@ -0,0 +1,675 @@
+import csv
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from functools import partial
+from itertools import batched
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.db import NotSupportedError
+from django.db import connections
+from django.db import transaction
+from django_jsonform.exceptions import JSONSchemaValidationError
+from django_jsonform.validators import JSONSchemaValidator
+
+from .constants import CATALOG_FORMATS
+from .constants import NUMERIC_ATTRIBUTE_TYPES
+from .constants import TEXT_ATTRIBUTE_TYPES
+from .models import Category
+from .models import Product
+from .models import ProductSummary
+from .models import ProductVariant
+from .models import ProductVariantAttribute
+from .utils import bump_catalog_version
+from .utils import clear_product_detail_cache
+from .utils import get_attribute_types
+from .utils import get_attributes_schema
+from .utils import get_default_attributes_schema
+
+# Import columns and the model fields their values are cleaned with. These
+# are the columns written by `exports.stream_catalog()`, so an export can be
+# imported back. Rows without a `sku` only upsert the category and product.
+IMPORT_FIELDS = {
+    "category_name": (Category, "name"),
+    "category_slug": (Category, "slug"),
+    "product_name": (Product, "name"),
+    "product_slug": (Product, "slug"),
+    "product_is_active": (Product, "is_active"),
+    "sku": (ProductVariant, "sku"),
+    "price": (ProductVariant, "price"),
+    "stock": (ProductVariant, "stock"),
+    "variant_is_active": (ProductVariant, "is_active"),
+}
+PRODUCT_COLUMNS = (
+    "category_name",
+    "category_slug",
+    "product_name",
+    "product_slug",
+    "product_is_active",
+)
+IMPORT_DEFAULTS = {"product_is_active": True, "stock": 0, "variant_is_active": True}
+BOOLEAN_VALUES = {
+    "true": True,
+    "t": True,
+    "yes": True,
+    "1": True,
+    "false": False,
+    "f": False,
+    "no": False,
+    "0": False,
+}
+
+# The rows are copied into a temporary staging table, checked for conflicts
+# with the unique constraints of the catalog and upserted from there.
+CREATE_STAGING_TABLE = """
+    CREATE TEMPORARY TABLE catalog_import (
+        line integer PRIMARY KEY,
+        category_name varchar(255) NOT NULL,
+        category_slug varchar(255) NOT NULL,
+        product_name varchar(255) NOT NULL,
+        product_slug varchar(255) NOT NULL,
+        product_is_active boolean NOT NULL,
+        sku varchar(100),
+        price numeric(10, 2),
+        stock integer,
+        variant_is_active boolean,
+        attributes jsonb
+    ) ON COMMIT DROP
+"""
+COPY_STAGING_TABLE = """
+    COPY catalog_import (
+        line, category_name, category_slug, product_name, product_slug,
+        product_is_active, sku, price, stock, variant_is_active, attributes
+    ) FROM STDIN
+"""
+STAGING_TYPES = [
+    "integer",
+    "varchar",
+    "varchar",
+    "varchar",
+    "varchar",
+    "boolean",
+    "varchar",
+    "numeric",
+    "integer",
+    "boolean",
+    "jsonb",
+]
+DROP_STAGING_TABLE = "DROP TABLE catalog_import"
+
+# A SKU repeated in the file is imported from its last line.
+DELETE_REPEATED_SKUS = """
+    DELETE FROM catalog_import AS earlier
+    USING catalog_import AS later
+    WHERE earlier.sku = later.sku AND earlier.line < later.line
+    RETURNING earlier.line, later.line
+"""
+# Categories and products are imported from the last line naming their slug,
+# and their names are unique among the other categories, or the products of
+# the same category, case-insensitively.
+DELETE_CATEGORY_NAME_CONFLICTS = """
+    WITH categories AS (
+        SELECT DISTINCT ON (category_slug) category_slug AS slug, category_name AS name
+        FROM catalog_import
+        ORDER BY category_slug, line DESC
+    ), others AS (
+        SELECT slug, name FROM categories
+        UNION ALL
+        SELECT category.slug, category.name
+        FROM products_category AS category
+        WHERE NOT EXISTS (SELECT FROM categories WHERE slug = category.slug)
+    ), conflicts AS (
+        SELECT categories.slug, others.slug AS other_slug
+        FROM categories
+        JOIN others
+            ON lower(others.name) = lower(categories.name)
+            AND others.slug <> categories.slug
+    )
+    DELETE FROM catalog_import
+    USING conflicts
+    WHERE catalog_import.category_slug = conflicts.slug
+    RETURNING catalog_import.line, conflicts.other_slug
+"""
+DELETE_PRODUCT_NAME_CONFLICTS = """
+    WITH products AS (
+        SELECT DISTINCT ON (product_slug)
+            product_slug AS slug, product_name AS name, category_slug
+        FROM catalog_import
+        ORDER BY product_slug, line DESC
+    ), others AS (
+        SELECT slug, name, category_slug FROM products
+        UNION ALL
+        SELECT product.slug, product.name, category.slug
+        FROM products_product AS product
+        JOIN products_category AS category ON category.id = product.category_id
+        WHERE NOT EXISTS (SELECT FROM products WHERE slug = product.slug)
+    ), conflicts AS (
+        SELECT products.slug, others.slug AS other_slug
+        FROM products
+        JOIN others
+            ON others.category_slug = products.category_slug
+            AND lower(others.name) = lower(products.name)
+            AND others.slug <> products.slug
+    )
+    DELETE FROM catalog_import
+    USING conflicts
+    WHERE catalog_import.product_slug = conflicts.slug
+    RETURNING catalog_import.line, conflicts.other_slug
+"""
+# The attributes of the variants of a product are unique.
+DELETE_ATTRIBUTES_CONFLICTS = """
+    WITH variants AS (
+        SELECT sku, product_slug, attributes
+        FROM catalog_import
+        WHERE sku IS NOT NULL
+    ), others AS (
+        SELECT sku, product_slug, attributes FROM variants
+        UNION ALL
+        SELECT variant.sku, product.slug, variant.attributes
+        FROM products_productvariant AS variant
+        JOIN products_product AS product ON product.id = variant.product_id
+        WHERE NOT EXISTS (SELECT FROM variants WHERE sku = variant.sku)
+    ), conflicts AS (
+        SELECT variants.sku, others.sku AS other_sku
+        FROM variants
+        JOIN others
+            ON others.product_slug = variants.product_slug
+            AND others.attributes = variants.attributes
+            AND others.sku <> variants.sku
+    )
+    DELETE FROM catalog_import
+    USING conflicts
+    WHERE catalog_import.sku = conflicts.sku
+    RETURNING catalog_import.line, conflicts.other_sku
+"""
+
+# The upserts return the rows they create or change, flagged by whether they
+# were created. Rows whose values do not change are left untouched.
+UPSERT_CATEGORIES = """
+    INSERT INTO products_category (
+        id, created, modified, name, slug, description, image, is_active
+    )
+    SELECT DISTINCT ON (category_slug)
+        gen_random_uuid(), now(), now(), category_name, category_slug, '', '', true
+    FROM catalog_import
+    ORDER BY category_slug, line DESC
+    ON CONFLICT (slug) DO UPDATE SET
+        name = excluded.name,
+        modified = excluded.modified
+    WHERE products_category.name <> excluded.name
+    RETURNING id, xmax = 0
+"""
+UPSERT_PRODUCTS = """
+    INSERT INTO products_product (
+        id, created, modified, category_id, name, slug, short_description,
+        full_description, is_active
+    )
+    SELECT
+        gen_random_uuid(), now(), now(), category.id, staged.product_name,
+        staged.product_slug, '', '', staged.product_is_active
+    FROM (
+        SELECT DISTINCT ON (product_slug) *
+        FROM catalog_import
+        ORDER BY product_slug, line DESC
+    ) AS staged
+    JOIN products_category AS category ON category.slug = staged.category_slug
+    ON CONFLICT (slug) DO UPDATE SET
+        category_id = excluded.category_id,
+        name = excluded.name,
+        is_active = excluded.is_active,
+        modified = excluded.modified
+    WHERE (
+        products_product.category_id,
+        products_product.name,
+        products_product.is_active
+    ) IS DISTINCT FROM (excluded.category_id, excluded.name, excluded.is_active)
+    RETURNING id, xmax = 0
+"""
+# The products the variants in the file are moved away from.
+SELECT_MOVED_FROM_PRODUCTS = """
+    SELECT DISTINCT variant.product_id
+    FROM products_productvariant AS variant
+    JOIN catalog_import AS staged ON staged.sku = variant.sku
+    JOIN products_product AS product ON product.slug = staged.product_slug
+    WHERE variant.product_id <> product.id
+"""
+# New variants, and variants moved to another product, are sorted after the
+# variants the product already has, in the order of the file.
+UPSERT_VARIANTS = """
+    WITH last_sort_orders AS (
+        SELECT product_id, max(sort_order) AS sort_order
+        FROM products_productvariant
+        GROUP BY product_id
+    )
+    INSERT INTO products_productvariant (
+        id, created, modified, product_id, sku, attributes, price, stock,
+        sort_order, is_active
+    )
+    SELECT
+        gen_random_uuid(), now(), now(), product.id, staged.sku,
+        staged.attributes, staged.price, staged.stock,
+        coalesce(last.sort_order, -1)
+            + row_number() OVER (PARTITION BY product.id ORDER BY staged.line),
+        staged.variant_is_active
+    FROM catalog_import AS staged
+    JOIN products_product AS product ON product.slug = staged.product_slug
+    LEFT JOIN last_sort_orders AS last ON last.product_id = product.id
+    WHERE staged.sku IS NOT NULL
+    ON CONFLICT (sku) DO UPDATE SET
+        product_id = excluded.product_id,
+        attributes = excluded.attributes,
+        price = excluded.price,
+        stock = excluded.stock,
+        is_active = excluded.is_active,
+        sort_order = CASE
+            WHEN products_productvariant.product_id = excluded.product_id
+            THEN products_productvariant.sort_order
+            ELSE excluded.sort_order
+        END,
+        modified = excluded.modified
+    WHERE (
+        products_productvariant.product_id,
+        products_productvariant.attributes,
+        products_productvariant.price,
+        products_productvariant.stock,
+        products_productvariant.is_active
+    ) IS DISTINCT FROM (
+        excluded.product_id,
+        excluded.attributes,
+        excluded.price,
+        excluded.stock,
+        excluded.is_active
+    )
+    RETURNING id, xmax = 0, product_id
+"""
+
+# The typed attribute index of the upserted variants is rebuilt in SQL, as
+# `ProductVariantAttributeQuerySet.refresh()` does in Python: each value is
+# typed by the property of the schema named by the `type` of its attributes.
+DELETE_VARIANT_ATTRIBUTES = """
+    DELETE FROM products_productvariantattribute WHERE variant_id = ANY(%(ids)s)
+"""
+INSERT_VARIANT_ATTRIBUTES = """
+    INSERT INTO products_productvariantattribute (
+        variant_id, key, number_value, text_value
+    )
+    SELECT
+        variant.id,
+        attribute.key,
+        CASE WHEN attribute.type = ANY(%(numeric_types)s) THEN attribute.number END,
+        CASE WHEN attribute.type = ANY(%(text_types)s) THEN attribute.text END
+    FROM products_productvariant AS variant
+    CROSS JOIN LATERAL (
+        SELECT
+            key,
+            %(types)s::jsonb -> (variant.attributes ->> 'type') ->> key AS type,
+            CASE WHEN jsonb_typeof(value) = 'number' THEN value::float END AS number,
+            CASE WHEN jsonb_typeof(value) = 'string' THEN value #>> '{}' END AS text
+        FROM jsonb_each(variant.attributes)
+    ) AS attribute
+    WHERE variant.id = ANY(%(ids)s)
+        AND variant.is_active
+        AND (
+            (attribute.type = ANY(%(numeric_types)s) AND attribute.number IS NOT NULL)
+            OR (
+                attribute.type = ANY(%(text_types)s)
+                AND length(attribute.text) <= %(max_length)s
+            )
+        )
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class ImportRowError:
+    """The reason a line of an import file was not imported."""
+
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Line {self.line}: {self.message}"
+
+
+@dataclass(slots=True)
+class ImportResult:
+    """The outcome of `import_catalog()`.
+
+    `created` and `updated` count the rows written per model, by
+    `"categories"`, `"products"` and `"variants"`; rows whose values did not
+    change are not counted.
+    """
+
+    rows: int = 0
+    created: dict[str, int] = field(default_factory=dict)
+    updated: dict[str, int] = field(default_factory=dict)
+    errors: list[ImportRowError] = field(default_factory=list)
+
+
+def read_csv(file) -> Iterator[tuple[int, dict]]:
+    """Yield the line number and values of each row of a CSV file."""
+    reader = csv.DictReader(file)
+    missing = [
+        column
+        for column in PRODUCT_COLUMNS
+        if column not in (reader.fieldnames or ()) and column not in IMPORT_DEFAULTS
+    ]
+    if missing:
+        msg = f"Missing columns: {', '.join(missing)}."
+        raise ValueError(msg)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(file) -> Iterator[tuple[int, dict | None]]:
+    """Yield the line number and object of each line of a JSON Lines file.
+
+    Lines that are not valid JSON yield `None`.
+    """
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row
+
+
+@lru_cache(maxsize=2**16)
+def clean_value(column, value):
+    """Return `value` of `column` converted and validated by its model field.
+
+    Cached, since the category and product columns repeat on every line of
+    their variants and most prices and stocks recur across the catalog.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ""):
+        if column in IMPORT_DEFAULTS:
+            return IMPORT_DEFAULTS[column]
+        msg = "This field is required."
+        raise ValidationError(msg)
+    if isinstance(value, str) and column.endswith("is_active"):
+        value = BOOLEAN_VALUES.get(value.lower(), value)
+    model, name = IMPORT_FIELDS[column]
+    return model._meta.get_field(name).clean(value, None)  # noqa: SLF001
+
+
+def clean_attributes(value) -> dict:
+    """Return the attributes object of `value`, a JSON string or an object."""
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            value = json.loads(value) if value else None
+        except ValueError:
+            msg = "Enter valid JSON."
+            raise ValidationError(msg) from None
+    if value is None:
+        return get_default_attributes_schema()
+    if not isinstance(value, dict):
+        msg = "Enter a JSON object."
+        raise ValidationError(msg)
+    return value
+
+
+def clean_row(row) -> dict:
+    """Return the cleaned values of an import row.
+
+    The variant columns are only read when the row has a `sku`. Raises a
+    `ValidationError` listing the errors of every column.
+    """
+    if not isinstance(row, dict):
+        msg = "The line is not a JSON object."
+        raise ValidationError(msg)
+    sku = row.get("sku")
+    columns = IMPORT_FIELDS if sku not in (None, "") else PRODUCT_COLUMNS
+    values, errors = {"sku": None}, []
+    for column in columns:
+        value = row.get(column)
+        if isinstance(value, dict | list):
+            errors.append(f"{column}: Enter a single value.")
+            continue
+        try:
+            values[column] = clean_value(column, value)
+        except ValidationError as error:
+            errors.append(f"{column}: {' '.join(error.messages)}")
+    if values["sku"] is not None:
+        try:
+            values["attributes"] = clean_attributes(row.get("attributes"))
+        except ValidationError as error:
+            errors.append(f"attributes: {' '.join(error.messages)}")
+    if errors:
+        raise ValidationError(errors)
+    return values
+
+
+class AttributesValidator:
+    """Validate variant attributes against the `AttributesSchema` they name.
+
+    The schema is chosen by the `type` constant of the attributes, as the admin
+    form does through `oneOf`. Each distinct value is validated once per batch.
+    """
+
+    def __init__(self):
+        self.validators = {}
+        for schema in get_attributes_schema()["oneOf"]:
+            const = schema.get("properties", {}).get("type", {}).get("const")
+            self.validators[const] = JSONSchemaValidator(schema)
+
+    def get_error(self, attributes) -> str | None:
+        """Return the validation error of `attributes`, if any."""
+        validator = self.validators.get(attributes.get("type"))
+        if validator is None:
+            return f"attributes: Unknown attributes type {attributes.get('type')!r}."
+        try:
+            validator(attributes)
+        except JSONSchemaValidationError as error:
+            if error.error_map:
+                messages = [
+                    f"{key}: {' '.join(map(str, value))}"
+                    for key, value in error.error_map.items()
+                ]
+            else:
+                messages = error.messages
+            return f"attributes: {' '.join(messages)}"
+        return None
+
+    def get_errors(self, batch) -> list[str | None]:
+        """Return the validation error of each attributes in `batch`, if any."""
+        errors = {}
+        result = []
+        for attributes in batch:
+            key = json.dumps(attributes, sort_keys=True)
+            if key not in errors:
+                errors[key] = self.get_error(attributes)
+            result.append(errors[key])
+        return result
+
+
+class CatalogImporter:
+    """Import catalog rows through a PostgreSQL staging table.
+
+    Rows are cleaned and their attributes validated in batches of
+    `batch_size`, and the valid ones are streamed to the staging table with
+    `COPY`. Categories, products and variants are then upserted by slug and SKU
+    in a few set-based statements, and only the rows that changed have their
+    summaries, search vectors and attribute index rebuilt.
+    """
+
+    def __init__(self, *, batch_size=5000, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.result = ImportResult()
+
+    def run(self, rows, *, dry_run=False) -> ImportResult:
+        """Import `rows`, pairs of a line number and its raw values."""
+        connection = connections[self.using]
+        if connection.vendor != "postgresql":
+            msg = "Importing the catalog requires PostgreSQL."
+            raise NotSupportedError(msg)
+        attributes_validator = AttributesValidator()
+        with transaction.atomic(using=self.using), connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_TABLE)
+            with cursor.copy(COPY_STAGING_TABLE) as copy:
+                copy.set_types(STAGING_TYPES)
+                for batch in batched(rows, self.batch_size, strict=False):
+                    for values in self.clean_batch(batch, attributes_validator):
+                        copy.write_row(values)
+            cursor.execute("ANALYZE catalog_import")
+            self.delete_conflicts(cursor)
+            self.upsert(cursor)
+            cursor.execute(DROP_STAGING_TABLE)
+            if dry_run:
+                transaction.set_rollback(True, using=self.using)
+        return self.result
+
+    def clean_batch(self, batch, attributes_validator) -> list[tuple]:
+        """Return the staging table rows of the valid rows of `batch`."""
+        cleaned = []
+        for line, row in batch:
+            self.result.rows += 1
+            try:
+                cleaned.append((line, clean_row(row)))
+            except ValidationError as error:
+                self.add_error(line, " ".join(error.messages))
+        with_variants = [
+            (line, values) for line, values in cleaned if values["sku"] is not None
+        ]
+        attributes_errors = attributes_validator.get_errors(
+            [values["attributes"] for _, values in with_variants],
+        )
+        invalid = set()
+        for (line, _), error in zip(with_variants, attributes_errors, strict=True):
+            if error is not None:
+                self.add_error(line, error)
+                invalid.add(line)
+        return [
+            (
+                line,
+                values["category_name"],
+                values["category_slug"],
+                values["product_name"],
+                values["product_slug"],
+                values["product_is_active"],
+                values["sku"],
+                values.get("price"),
+                values.get("stock"),
+                values.get("variant_is_active"),
+                values.get("attributes"),
+            )
+            for line, values in cleaned
+            if line not in invalid
+        ]
+
+    def delete_conflicts(self, cursor):
+        """Drop the staged rows that would break a unique constraint."""
+        checks = [
+            (DELETE_REPEATED_SKUS, "sku: Repeated on line {}."),
+            (
+                DELETE_CATEGORY_NAME_CONFLICTS,
+                'category_name: Already the name of category "{}".',
+            ),
+            (
+                DELETE_PRODUCT_NAME_CONFLICTS,
+                'product_name: Already the name of product "{}" in the category.',
+            ),
+            (
+                DELETE_ATTRIBUTES_CONFLICTS,
+                'attributes: Already the attributes of variant "{}" of the product.',
+            ),
+        ]
+        for sql, message in checks:
+            cursor.execute(sql)
+            for line, other in cursor.fetchall():
+                self.add_error(line, message.format(other))
+        self.result.errors.sort(key=lambda error: error.line)
+
+    def upsert(self, cursor):
+        """Write the staged rows and refresh what depends on them."""
+        cursor.execute(UPSERT_CATEGORIES)
+        category_ids = self.count("categories", cursor.fetchall())
+        cursor.execute(UPSERT_PRODUCTS)
+        product_ids = self.count("products", cursor.fetchall())
+        cursor.execute(SELECT_MOVED_FROM_PRODUCTS)
+        product_ids |= {product_id for (product_id,) in cursor.fetchall()}
+        cursor.execute(UPSERT_VARIANTS)
+        variants = cursor.fetchall()
+        variant_ids = self.count("variants", [row[:2] for row in variants])
+        product_ids |= {product_id for *_, product_id in variants}
+
+        for chunk in batched(product_ids, self.batch_size, strict=False):
+            ProductSummary.objects.using(self.using).refresh(chunk)
+            Product.objects.using(self.using).filter(
+                pk__in=chunk,
+            ).update_search_vector()
+        self.index_attributes(cursor, list(variant_ids))
+
+        slugs = set()
+        for chunk in batched(product_ids, self.batch_size, strict=False):
+            slugs.update(
+                Product.objects.using(self.using)
+                .filter(pk__in=chunk)
+                .values_list("slug", flat=True),
+            )
+        for chunk in batched(category_ids, self.batch_size, strict=False):
+            slugs.update(
+                Product.objects.using(self.using)
+                .filter(category_id__in=chunk)
+                .values_list("slug", flat=True),
+            )
+        if category_ids or product_ids or variant_ids:
+            transaction.on_commit(bump_catalog_version, using=self.using)
+            transaction.on_commit(
+                partial(clear_product_detail_cache, slugs),
+                using=self.using,
+            )
+
+    def index_attributes(self, cursor, variant_ids):
+        """Rebuild the typed attribute index of the given variants."""
+        params = {
+            "ids": variant_ids,
+            "types": json.dumps(get_attribute_types()),
+            "numeric_types": sorted(NUMERIC_ATTRIBUTE_TYPES),
+            "text_types": sorted(TEXT_ATTRIBUTE_TYPES),
+            "max_length": ProductVariantAttribute._meta.get_field(  # noqa: SLF001
+                "text_value",
+            ).max_length,
+        }
+        cursor.execute(DELETE_VARIANT_ATTRIBUTES, params)
+        cursor.execute(INSERT_VARIANT_ATTRIBUTES, params)
+
+    def count(self, name, rows) -> set:
+        """Count the created and updated rows of `name`, returning their IDs."""
+        created = sum(1 for _, is_created in rows if is_created)
+        self.result.created[name] = created
+        self.result.updated[name] = len(rows) - created
+        return {pk for pk, _ in rows}
+
+    def add_error(self, line, message):
+        self.result.errors.append(ImportRowError(line, message))
+
+
+def import_catalog(
+    file,
+    import_format,
+    *,
+    batch_size=5000,
+    dry_run=False,
+    using=DEFAULT_DB_ALIAS,
+) -> ImportResult:
+    """Upsert the categories, products and variants of a CSV or JSONL file.
+
+    Categories and products are matched by slug and variants by SKU. Rows that
+    do not validate, or would break a unique constraint of the catalog, are
+    reported in `ImportResult.errors` and the rest are imported. With
+    `dry_run` the import is rolled back once it has been checked.
+    """
+    if import_format not in CATALOG_FORMATS:
+        msg = f"Unknown import format {import_format!r}."
+        raise ValueError(msg)
+    rows = read_csv(file) if import_format == "csv" else read_jsonl(file)
+    importer = CatalogImporter(batch_size=batch_size, using=using)
+    return importer.run(rows, dry_run=dry_run)
@@ -0,0 +1,187 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.test.utils import setup_databases
+from django.test.utils import teardown_databases
+
+from apps.products.benchmarks import BENCHMARK_CACHES
+from apps.products.benchmarks import compare
+from apps.products.benchmarks import get_catalog_size
+from apps.products.benchmarks import get_scenarios
+from apps.products.benchmarks import measure
+from apps.products.benchmarks import to_json
+
+BENCHMARK_USER_EMAIL = "benchmark@example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the catalog views, admin changelists and attributes schema on a "
+        "seeded catalog, recording the wall time, query count and SQL time of "
+        "each, and compare them against a baseline JSON. The catalog is seeded "
+        "in a separate benchmark database, created and destroyed like a test "
+        "database, which the read replica mirrors while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--products-per-category", type=int, default=50)
+        parser.add_argument("--variants-per-product", type=int, default=5)
+        parser.add_argument("--images-per-product", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--cache", choices=BENCHMARK_CACHES, default="cold")
+        parser.add_argument("--baseline", type=Path, help="A JSON to compare with.")
+        parser.add_argument("--output", type=Path, help="Write the results as JSON.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="The relative growth of a time reported as a regression.",
+        )
+        parser.add_argument(
+            "--min-delta",
+            type=float,
+            default=1.0,
+            help="The growth of a time in ms below which it is not reported.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database and its catalog for the next run.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = self.read_baseline(options["baseline"])
+        if connection.vendor != "sqlite":
+            name = connection.settings_dict["NAME"]
+            connection.settings_dict["TEST"]["NAME"] = f"benchmark_{name}"
+        # Set up like the test databases, so that mirrors such as the read
+        # replica point to the benchmark database as well.
+        old_config = setup_databases(
+            verbosity=0,
+            interactive=False,
+            keepdb=options["keepdb"],
+            serialized_aliases=set(),
+        )
+        try:
+            self.seed(options)
+            with override_settings(
+                CACHES={"default": BENCHMARK_CACHES[options["cache"]]},
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                results = self.run(options)
+        finally:
+            # The mirrors keep their own connections to the benchmark database.
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        if options["output"]:
+            options["output"].write_text(
+                json.dumps(results, indent=2) + "\n",
+                encoding="utf-8",
+            )
+        self.report(results, baseline, options)
+
+    def read_baseline(self, path) -> dict | None:
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as error:
+            msg = f"Could not read the baseline {path}: {error}"
+            raise CommandError(msg) from error
+
+    def seed(self, options):
+        """Create the catalog, unless a kept database already holds its size."""
+        products = options["categories"] * options["products_per_category"]
+        expected = {
+            "categories": options["categories"],
+            "products": products,
+            "variants": products * options["variants_per_product"],
+            "images": products * options["images_per_product"],
+        }
+        if get_catalog_size() != expected:
+            call_command(
+                "create_test_products",
+                "--clean",
+                "--bulk",
+                "--fake-images",
+                f"--categories={options['categories']}",
+                f"--products-per-category={options['products_per_category']}",
+                f"--variants-per-product={options['variants_per_product']}",
+                f"--images-per-product={options['images_per_product']}",
+                stdout=self.stdout,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def run(self, options) -> dict:
+        user, _ = get_user_model().objects.get_or_create(
+            email=BENCHMARK_USER_EMAIL,
+            defaults={"is_staff": True, "is_superuser": True},
+        )
+        admin_client = Client()
+        admin_client.force_login(user)
+        scenarios = get_scenarios(Client(), admin_client)
+        try:
+            measurements = [
+                measure(scenario, repeat=options["repeat"]) for scenario in scenarios
+            ]
+        except RuntimeError as error:
+            raise CommandError(error) from error
+        return to_json(
+            measurements,
+            vendor=connection.vendor,
+            catalog=get_catalog_size(),
+            cache=options["cache"],
+            repeat=options["repeat"],
+        )
+
+    def report(self, results, baseline, options):
+        previous = {}
+        if baseline is not None:
+            for key in ("vendor", "catalog", "cache"):
+                if baseline.get(key) != results[key]:
+                    msg = (
+                        f"The baseline was measured with {key} "
+                        f"{baseline.get(key)}, not {results[key]}."
+                    )
+                    raise CommandError(msg)
+            previous = baseline["measurements"]
+
+        for name, measurement in results["measurements"].items():
+            line = (
+                f"{name:<50} {measurement['wall_time']:9.2f} ms "
+                f"{measurement['queries']:4d} queries "
+                f"{measurement['sql_time']:9.2f} ms SQL"
+            )
+            if previous.get(name, {}).get("wall_time"):
+                change = measurement["wall_time"] / previous[name]["wall_time"] - 1
+                line += f" {change:+7.1%}"
+            self.stdout.write(line)
+
+        if baseline is None:
+            return
+        regressions = compare(
+            results,
+            baseline,
+            tolerance=options["tolerance"],
+            min_delta=options["min_delta"],
+        )
+        for regression in regressions:
+            self.stderr.write(self.style.ERROR(str(regression)))
+        if regressions:
+            msg = f"{len(regressions)} regressions against {options['baseline']}."
+            raise CommandError(msg)
+        self.stdout.write(
+            self.style.SUCCESS(f"No regressions against {options['baseline']}."),
+        )
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+
+from apps.products.constants import IMAGE_STRATEGIES
+from apps.products.models import Product
+from apps.products.models import ProductImage
+from apps.products.tests.factories import CategoryFactory
+
+
+class Rollback(Exception):  # noqa: N818
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the strategies of `ProductQuerySet.with_images` on a catalog page. "
+        "The benchmark data is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--images-per-product", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=3)
+        parser.add_argument("--page-size", type=int, default=9)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.create_catalog(options["products"], options["images_per_product"])
+                for strategy in IMAGE_STRATEGIES:
+                    self.run(strategy, options)
+                raise Rollback  # noqa: TRY301
+        except Rollback:
+            pass
+
+    def create_catalog(self, products, images_per_product):
+        category = CategoryFactory(products=products, products__variants=0)
+        ProductImage.objects.bulk_create(
+            ProductImage(
+                product=product,
+                image=f"products/benchmark/{product.pk}/{index}.jpg",
+                sort_order=index,
+                is_active=index % 5 != 0,
+            )
+            for product in category.products.all()
+            for index in range(images_per_product)
+        )
+        self.stdout.write(
+            f"Created {products} products with {images_per_product} images each "
+            f"on {connection.vendor}.",
+        )
+
+    def run(self, strategy, options):
+        queryset = (
+            Product.objects.active()
+            .with_images(limit=options["limit"], strategy=strategy)
+            .only("id", "name", "slug")
+            .order_by("name")
+        )
+        timings = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            for product in queryset[: options["page_size"]]:
+                len(product.active_images)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        median = timings[len(timings) // 2] * 1000
+        best = timings[0] * 1000
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{strategy:>10}: median {median:.2f} ms, best {best:.2f} ms "
+                f"over {options['repeat']} runs.",
+            ),
+        )
@@ -1,12 +1,128 @@
+import io
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from itertools import batched
+from multiprocessing import get_context
+
+from django.core.cache import cache as django_cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import connections
 from django.db import transaction
+from faker import Faker
+from PIL import Image
 
+from apps.products.constants import ATTRIBUTES_SCHEMA_CACHE_KEY
 from apps.products.models import AttributesSchema
 from apps.products.models import Category
 from apps.products.models import Product
 from apps.products.models import ProductImage
+from apps.products.models import ProductSummary
 from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttribute
 from apps.products.tests.factories import CategoryFactory
+from apps.products.tests.factories import build_attributes_from_schema
+from apps.products.tests.factories import build_schema
+from apps.products.utils import bump_catalog_version
+
+IMAGE_COLORS = ["red", "green", "blue", "yellow", "purple", "orange", "black"]
+FAKE_IMAGE_NAME = "products/fake.jpg"
+
+
+@cache
+def get_image_content(color) -> bytes:
+    """Return a small JPEG of `color`, encoded once per process."""
+    output = io.BytesIO()
+    Image.new("RGB", (400, 400), color).save(output, "JPEG")
+    return output.getvalue()
+
+
+def get_image_name(path, index, *, fake) -> str:
+    """Return the name of a generated image, writing it unless `fake`."""
+    if fake:
+        return FAKE_IMAGE_NAME
+    color = IMAGE_COLORS[index % len(IMAGE_COLORS)]
+    return default_storage.save(path, ContentFile(get_image_content(color)))
+
+
+def create_products(categories, schemas, options) -> int:
+    """Create the products of `categories` with their variants and images.
+
+    `categories` is a list of `(category_id, first_number)` pairs, numbering
+    the products of each category from `first_number`; names, slugs and SKUs
+    carry the `run` token of the options, so they do not clash with the
+    products of earlier runs. The rows are inserted
+    with `bulk_create()` in batches of about `batch_size` variants or images,
+    one transaction per batch, so this can run in several worker processes.
+    Returns the number of products created.
+    """
+    fake = Faker()
+    products_per_category = options["products_per_category"]
+    variants_per_product = options["variants_per_product"]
+    images_per_product = options["images_per_product"]
+    fake_images = options["fake_images"]
+    run = options["run"]
+    products_per_batch = max(
+        1,
+        options["batch_size"] // max(1, variants_per_product, images_per_product),
+    )
+    numbers = [
+        (category_id, first_number + index)
+        for category_id, first_number in categories
+        for index in range(products_per_category)
+    ]
+    for chunk in batched(numbers, products_per_batch, strict=False):
+        products, variants, images = [], [], []
+        for category_id, number in chunk:
+            product = Product(
+                category_id=category_id,
+                name=f"Product {run}-{number}",
+                slug=f"product-{run}-{number}",
+                short_description=fake.sentence(),
+                full_description=fake.paragraph(),
+            )
+            products.append(product)
+            schema = schemas[number % len(schemas)]
+            for index in range(variants_per_product):
+                sku = f"SKU-{run}-{number:07d}-{index + 1:02d}"
+                variants.append(
+                    ProductVariant(
+                        product=product,
+                        sku=sku,
+                        attributes=build_attributes_from_schema(schema, sku),
+                        price=fake.pydecimal(
+                            left_digits=3,
+                            right_digits=2,
+                            positive=True,
+                        ),
+                        stock=fake.pyint(min_value=0, max_value=100),
+                        sort_order=index,
+                    ),
+                )
+            for index in range(images_per_product):
+                path = f"products/products/{product.slug}/image_{index + 1}.jpg"
+                images.append(
+                    ProductImage(
+                        product=product,
+                        image=get_image_name(path, number + index, fake=fake_images),
+                        alt_text=fake.word(),
+                        sort_order=index,
+                    ),
+                )
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            ProductVariant.objects.bulk_create(variants)
+            ProductImage.objects.bulk_create(images)
+            product_ids = [product.pk for product in products]
+            # The variants refreshed the summaries of their products already.
+            ProductSummary.objects.refresh(
+                set(product_ids) - {variant.product_id for variant in variants},
+            )
+            Product.objects.filter(pk__in=product_ids).update_search_vector()
+    return len(numbers)
 
 
 class Command(BaseCommand):
@@ -19,37 +135,144 @@ class Command(BaseCommand):
         parser.add_argument("--variants-per-product", type=int, default=3)
         parser.add_argument("--images-per-product", type=int, default=5)
         parser.add_argument("--clean", action="store_true")
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Insert the rows with bulk_create() instead of the factories.",
+        )
+        parser.add_argument(
+            "--fake-images",
+            action="store_true",
+            help="Point every image to the same name without writing files.",
+        )
+        parser.add_argument("--attributes-schemas", type=int, default=10)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Split the bulk creation of products across processes.",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
-        categories = options["categories"]
-        with_category_images = options["with_category_images"]
-        products_per_category = options["products_per_category"]
-        variants_per_product = options["variants_per_product"]
-        images_per_product = options["images_per_product"]
-        clean = options["clean"]
-
-        if clean:
-            ProductImage.objects.all().delete()
-            ProductVariant.objects.all().delete()
-            AttributesSchema.objects.all().delete()
-            Product.objects.all().delete()
-            Category.objects.all().delete()
+        if options["clean"]:
+            self.clean(bulk=options["bulk"])
             self.stdout.write(self.style.SUCCESS("Cleared existing product data."))
 
-        for _ in range(categories):
-            CategoryFactory(
-                with_image=with_category_images,
-                products=products_per_category,
-                products__variants=variants_per_product,
-                products__images=images_per_product,
-            )
+        if options["bulk"]:
+            self.create_in_bulk(options)
+        else:
+            self.create_with_factories(options)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Created {categories} categories with "
-                f"{products_per_category} products each, "
-                f"{variants_per_product} variants per product, and "
-                f"{images_per_product} images per product.",
+                f"Created {options['categories']} categories with "
+                f"{options['products_per_category']} products each, "
+                f"{options['variants_per_product']} variants per product, and "
+                f"{options['images_per_product']} images per product.",
             ),
         )
+
+    def clean(self, *, bulk):
+        """Delete the catalog, without loading it or sending signals if `bulk`."""
+        if not bulk:
+            with transaction.atomic():
+                ProductImage.objects.all().delete()
+                ProductVariant.objects.all().delete()
+                AttributesSchema.objects.all().delete()
+                Product.objects.all().delete()
+                Category.objects.all().delete()
+            return
+        models = [
+            ProductImage,
+            ProductVariantAttribute,
+            ProductVariant,
+            ProductSummary,
+            AttributesSchema,
+            Product,
+            Category,
+        ]
+        with transaction.atomic():
+            for model in models:
+                model.objects.all()._raw_delete(connection.alias)  # noqa: SLF001
+        django_cache.delete(ATTRIBUTES_SCHEMA_CACHE_KEY)
+        bump_catalog_version()
+
+    @transaction.atomic
+    def create_with_factories(self, options):
+        overrides = {}
+        if options["fake_images"]:
+            overrides["products__images__image"] = FAKE_IMAGE_NAME
+            if options["with_category_images"]:
+                overrides["image"] = FAKE_IMAGE_NAME
+        for _ in range(options["categories"]):
+            CategoryFactory(
+                with_image=options["with_category_images"],
+                products=options["products_per_category"],
+                products__variants=options["variants_per_product"],
+                products__images=options["images_per_product"],
+                **overrides,
+            )
+
+    def create_in_bulk(self, options):
+        """Create the catalog with `bulk_create()`, in worker processes if asked.
+
+        The categories and a shared set of attributes schemas are created
+        first; the products of each category are then created by
+        `create_products()`. Signals are not sent, so the summaries, search
+        vectors and caches they maintain are updated along the way.
+        """
+        run = options["run"] = secrets.token_hex(3)
+        schemas = AttributesSchema.objects.bulk_create(
+            [
+                AttributesSchema(
+                    name=f"Attributes schema {run}-{index}",
+                    schema=build_schema(f"{run}_{index}", 1 + index % 3),
+                )
+                for index in range(1, max(1, options["attributes_schemas"]) + 1)
+            ],
+        )
+        django_cache.delete(ATTRIBUTES_SCHEMA_CACHE_KEY)
+
+        categories = []
+        for index in range(1, options["categories"] + 1):
+            category = Category(
+                name=f"Category {run}-{index}",
+                slug=f"category-{run}-{index}",
+            )
+            if options["with_category_images"]:
+                category.image = get_image_name(
+                    f"products/categories/category_{run}_{index}.jpg",
+                    index,
+                    fake=options["fake_images"],
+                )
+            categories.append(category)
+        Category.objects.bulk_create(categories)
+
+        numbered = [
+            (category.pk, 1 + index * options["products_per_category"])
+            for index, category in enumerate(categories)
+        ]
+        schemas = [schema.schema for schema in schemas]
+        workers = max(1, min(options["workers"], len(numbered)))
+        if workers == 1:
+            create_products(numbered, schemas, options)
+        else:
+            # The workers are forked, so they must not share the connections.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                workers,
+                mp_context=get_context("fork"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        create_products,
+                        numbered[index::workers],
+                        schemas,
+                        options,
+                    )
+                    for index in range(workers)
+                ]
+                for future in futures:
+                    future.result()
+        bump_catalog_version()
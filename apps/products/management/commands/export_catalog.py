@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.products.constants import CATALOG_FORMATS
+from apps.products.exports import stream_catalog
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the products with their variants and attributes as CSV or JSON "
+        "Lines, streaming the rows so memory use does not grow with the catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=CATALOG_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="Write to a file, not stdout.")
+        parser.add_argument("--active-only", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options["active_only"]:
+            queryset = queryset.active()
+        chunks = stream_catalog(
+            queryset,
+            options["format"],
+            chunk_size=options["chunk_size"],
+        )
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        path = Path(options["output"])
+        with path.open("w", encoding="utf-8", newline="") as output:
+            output.writelines(chunks)
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported the catalog to {path}."),
+        )
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.db import NotSupportedError
+
+from apps.products.constants import CATALOG_FORMATS
+from apps.products.imports import import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Import categories, products and variants from CSV or JSON Lines, "
+        "upserting them by slug and SKU through a PostgreSQL staging table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=CATALOG_FORMATS,
+            help="Defaults to the extension of the file.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Check the file and roll the import back.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["format"] or path.suffix.removeprefix(".")
+        if import_format not in CATALOG_FORMATS:
+            msg = f"Cannot tell the format of {path}; pass --format."
+            raise CommandError(msg)
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as file:
+                result = import_catalog(
+                    file,
+                    import_format,
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, ValueError, NotSupportedError, DatabaseError) as error:
+            raise CommandError(error) from error
+
+        for error in result.errors:
+            self.stderr.write(str(error))
+        counts = ", ".join(
+            f"{result.created[name]} created and {result.updated[name]} updated {name}"
+            for name in ("categories", "products", "variants")
+        )
+        message = f"Read {result.rows} rows with {len(result.errors)} errors: {counts}."
+        if options["dry_run"]:
+            message += " Rolled back (dry run)."
+        self.stdout.write(self.style.SUCCESS(message))
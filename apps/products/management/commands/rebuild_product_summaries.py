@@ -0,0 +1,31 @@
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from apps.products.models import Product
+from apps.products.models import ProductSummary
+from apps.products.utils import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized price and stock summaries of all products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        product_ids = (
+            Product.objects.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        total = 0
+        for chunk in batched(product_ids, chunk_size, strict=False):
+            total += len(ProductSummary.objects.refresh(chunk))
+        bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the summaries of {total} products."),
+        )
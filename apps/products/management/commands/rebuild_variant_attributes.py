@@ -0,0 +1,29 @@
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttribute
+
+
+class Command(BaseCommand):
+    help = "Rebuild the typed attribute index of all product variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        variant_ids = (
+            ProductVariant.objects.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        total = 0
+        for chunk in batched(variant_ids, chunk_size, strict=False):
+            total += len(ProductVariantAttribute.objects.refresh(chunk))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {total} variant attribute values."),
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.models import ProductImage
+from apps.products.tasks import render_product_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue the rendering of the product images whose renditions are missing "
+        "or outdated, such as those uploaded before renditions existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every image again, e.g. after changing the formats.",
+        )
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.exclude(image="").values_list(
+            "pk",
+            "image",
+            "renditions",
+        )
+        queued = 0
+        for pk, name, renditions in images.iterator():
+            if options["force"] or renditions.get("source") != name:
+                render_product_image.delay(str(pk), force=options["force"])
+                queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} product images."))
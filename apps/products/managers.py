@@ -1,18 +1,113 @@
+from collections import defaultdict
+from functools import partial
+from functools import reduce
+from operator import add
+from operator import or_
+
 from django.apps import apps
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
 from django.db import models
+from django.db import router
+from django.db import transaction
 from django.db.models import Count
 from django.db.models import F
+from django.db.models import FloatField
 from django.db.models import Max
 from django.db.models import Min
+from django.db.models import OuterRef
 from django.db.models import Prefetch
 from django.db.models import Q
 from django.db.models import Sum
+from django.db.models import Value
 from django.db.models import Window
+from django.db.models.functions import Cast
 from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
+from django.db.models.functions import JSONObject
 from django.db.models.functions import RowNumber
+from django.db.models.query import BaseIterable
+from django.db.models.query import ModelIterable
+from django.db.models.query import ValuesIterable
 
 from apps.core.managers import ActiveQuerySet
 
+from .cards import ProductCardBuilder
+from .constants import IMAGE_STRATEGIES
+from .constants import NUMERIC_ATTRIBUTE_TYPES
+from .constants import PRODUCT_SUMMARY_FIELDS
+from .constants import SEARCH_CONFIGS
+from .constants import TEXT_ATTRIBUTE_TYPES
+from .constants import VARIANT_ATTRIBUTE_FIELDS
+from .utils import build_variant_matrix
+from .utils import bump_catalog_version
+from .utils import clear_product_detail_cache
+from .utils import get_attribute_types
+
+
+def filter_similar(queryset, field, term):
+    """Filter `queryset` on `field` containing `term`, most similar first.
+
+    On PostgreSQL the `icontains` lookup is served by a trigram index on
+    `UPPER(field)` and matches are ranked by trigram similarity. Other
+    databases order the matches alphabetically.
+    """
+    queryset = queryset.filter(**{f"{field}__icontains": term})
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.order_by(field)
+    return queryset.annotate(
+        similarity=TrigramSimilarity(field, term),
+    ).order_by("-similarity", field)
+
+
+def get_attribute_condition(key, values, using="default"):
+    """Return a condition matching variants whose attribute `key` is in `values`.
+
+    Compiles to `attributes @> {key: value}` containment on PostgreSQL, which
+    the GIN index on `attributes` can serve, and to key lookups elsewhere.
+    """
+    if connections[using].vendor == "postgresql":
+        conditions = [Q(attributes__contains={key: value}) for value in values]
+    else:
+        conditions = [Q(**{f"attributes__{key}": value}) for value in values]
+    return reduce(or_, conditions)
+
+
+def get_limited_images(queryset, limit):
+    """Return the first `limit` images of each product in `queryset`.
+
+    The images of every product are numbered by a `ROW_NUMBER()` window, in
+    sort order and ID, and those past `limit` are filtered out.
+    """
+    return queryset.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F("product_id")],
+            order_by=[F("sort_order").asc(), F("id").asc()],
+        ),
+    ).filter(row_number__lte=limit)
+
+
+def get_images_array(queryset, limit, **fields):
+    """Return an array of the first `limit` images of the outer product.
+
+    Each image is a JSON object of `fields`. The correlated subquery reads the
+    images in sort order from the `(product, sort_order, id)` index and stops
+    at `limit`. PostgreSQL only.
+    """
+    images = (
+        queryset.filter(product=OuterRef("pk"))
+        .order_by("sort_order", "id")
+        .values(json=JSONObject(**fields))
+    )
+    if limit is not None:
+        images = images[:limit]
+    return ArraySubquery(images)
+
 
 class CategoryQuerySet(ActiveQuerySet):
     def with_products(self, *, active_only=True):
@@ -52,7 +147,64 @@ class AttributesSchemaManager(models.Manager.from_queryset(AttributesSchemaQuery
     pass
 
 
+class ProductImagesIterable(ModelIterable):
+    """Yield products, turning the images aggregated by the `"subquery"` image
+    strategy into `ProductImage` instances, stored where a prefetch would.
+    """
+
+    def __iter__(self):
+        ProductImage = apps.get_model("products", "ProductImage")
+        pk_field = ProductImage._meta.pk  # noqa: SLF001
+        for product in super().__iter__():
+            for to_attr in ("active_images", "all_images"):
+                rows = product.__dict__.pop(f"{to_attr}_json", None)
+                if rows is None:
+                    continue
+                images = [
+                    ProductImage(
+                        product_id=product.pk,
+                        **{**row, "id": pk_field.to_python(row["id"])},
+                    )
+                    for row in rows
+                ]
+                setattr(product, to_attr, images)
+            yield product
+
+
+class ProductCardIterable(BaseIterable):
+    """Yield the `ProductCard` of each product, built from plain rows."""
+
+    def __iter__(self):
+        queryset = self.queryset
+        annotations = queryset.query.annotations
+        fields = ["pk", "name", "slug", "min_price", "max_price", "card_modified"]
+        fields += [
+            name for name in ("search_rank", "card_images") if name in annotations
+        ]
+        rows = list(
+            ValuesIterable(
+                queryset.values(*fields),
+                chunked_fetch=self.chunked_fetch,
+                chunk_size=self.chunk_size,
+            ),
+        )
+        if "card_images" in annotations:
+            images = {row["pk"]: row["card_images"] for row in rows}
+        else:
+            images = queryset.get_card_images([row["pk"] for row in rows])
+        builder = ProductCardBuilder()
+        for row in rows:
+            yield builder.build(row, images.get(row["pk"], ()))
+
+
 class ProductQuerySet(ActiveQuerySet):
+    _card_image_limit = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._card_image_limit = self._card_image_limit  # noqa: SLF001
+        return clone
+
     def with_category(self):
         """Select related category in the same query."""
         return self.select_related("category")
@@ -74,26 +226,48 @@ class ProductQuerySet(ActiveQuerySet):
             ),
         )
 
-    def with_images(self, *, active_only=True, limit=None):
-        """Prefetch related images, ordered by sort order and ID."""
+    def with_images(self, *, active_only=True, limit=None, strategy="window"):
+        """Fetch related images, ordered by sort order and ID.
+
+        The images are stored in `active_images` (or `all_images`). Two
+        strategies are available to fetch them:
+
+        - `"window"` prefetches them in a second query, numbering the images
+          of every product with a `ROW_NUMBER()` window to apply `limit`.
+        - `"subquery"` aggregates the first `limit` images of each product
+          into a JSON array in the same query, through a correlated subquery
+          that reads just `limit` rows from the `(product, sort_order, id)`
+          index. PostgreSQL only; other databases use `"window"`.
+        """
+        if strategy not in IMAGE_STRATEGIES:
+            msg = f"Unknown image strategy {strategy!r}."
+            raise ValueError(msg)
         ProductImage = apps.get_model("products", "ProductImage")
         queryset = (
             ProductImage.objects.active() if active_only else ProductImage.objects.all()
         )
+        to_attr = "active_images" if active_only else "all_images"
+        if strategy == "subquery" and connections[self.db].vendor == "postgresql":
+            images = get_images_array(
+                queryset,
+                limit,
+                id="id",
+                image="image",
+                alt_text="alt_text",
+                sort_order="sort_order",
+                is_active="is_active",
+            )
+            clone = self.annotate(**{f"{to_attr}_json": images})
+            clone._iterable_class = ProductImagesIterable  # noqa: SLF001
+            return clone
         if limit is not None:
-            queryset = queryset.annotate(
-                row_number=Window(
-                    expression=RowNumber(),
-                    partition_by=[F("product_id")],
-                    order_by=[F("sort_order").asc(), F("id").asc()],
-                ),
-            ).filter(row_number__lte=limit)
+            queryset = get_limited_images(queryset, limit)
         queryset = queryset.order_by("sort_order", "id")
         return self.prefetch_related(
             Prefetch(
                 "images",
                 queryset=queryset,
-                to_attr="active_images" if active_only else "all_images",
+                to_attr=to_attr,
             ),
         )
 
@@ -121,21 +295,323 @@ class ProductQuerySet(ActiveQuerySet):
             ),
         )
 
+    def with_summary(self):
+        """Annotate each product with its denormalized price range and stock.
+
+        Reads the `ProductSummary` row instead of aggregating the variants, so
+        the annotations can be filtered and ordered on through an index.
+        """
+        return self.annotate(
+            min_price=F("summary__min_price"),
+            max_price=F("summary__max_price"),
+            _total_stock=Coalesce(F("summary__total_stock"), 0),
+            _variant_count=Coalesce(F("summary__variant_count"), 0),
+        )
+
+    def as_cards(self, *, image_limit=3):
+        """Yield a lightweight `ProductCard` for each product instead of a model.
+
+        Cards are built from `.values()` rows, with their price range read from
+        the product summary and the first `image_limit` active images. Their
+        `modified` time is the latest of the product and its summary. On
+        PostgreSQL the images are aggregated into a JSON array in the same
+        query; other databases fetch them in a second query.
+        """
+        clone = self.with_summary().annotate(
+            card_modified=Greatest(
+                "modified",
+                Coalesce("summary__modified", "modified"),
+            ),
+        )
+        if connections[self.db].vendor == "postgresql":
+            ProductImage = apps.get_model("products", "ProductImage")
+            clone = clone.annotate(
+                card_images=get_images_array(
+                    ProductImage.objects.active(),
+                    image_limit,
+                    image="image",
+                    alt_text="alt_text",
+                    renditions="renditions",
+                ),
+            )
+        clone._card_image_limit = image_limit  # noqa: SLF001
+        clone._iterable_class = ProductCardIterable  # noqa: SLF001
+        return clone
+
+    def get_card_images(self, product_ids) -> dict:
+        """Return the image rows of each product card, keyed by product ID."""
+        ProductImage = apps.get_model("products", "ProductImage")
+        queryset = ProductImage.objects.active().filter(product_id__in=product_ids)
+        if self._card_image_limit is not None:
+            queryset = get_limited_images(queryset, self._card_image_limit)
+        images = defaultdict(list)
+        for image in queryset.order_by("sort_order", "id").values(
+            "product_id",
+            "image",
+            "alt_text",
+            "renditions",
+        ):
+            images[image["product_id"]].append(image)
+        return images
+
+    def with_variant_matrix(self):
+        """Annotate each product with the variant matrix of its summary."""
+        return self.annotate(variant_matrix=F("summary__variant_matrix"))
+
+    def search(self, query):
+        """Filter products matching `query` and annotate their `search_rank`.
+
+        On PostgreSQL the query is matched against the stored `search_vector`
+        in every configuration of `SEARCH_CONFIGS`, so the GIN index is used.
+        Other databases fall back to an unranked `icontains` lookup.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return self.filter(
+                Q(name__icontains=query)
+                | Q(short_description__icontains=query)
+                | Q(full_description__icontains=query),
+            ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+        search_query = reduce(
+            or_,
+            (
+                SearchQuery(query, config=config, search_type="websearch")
+                for config in SEARCH_CONFIGS
+            ),
+        )
+        # ts_rank() returns a real, which does not survive the round trip
+        # through a float cursor; cast it so keyset pagination can seek on it.
+        return self.filter(search_vector=search_query).annotate(
+            search_rank=Cast(
+                SearchRank(F("search_vector"), search_query),
+                output_field=FloatField(),
+            ),
+        )
+
+    def autocomplete(self, term):
+        """Filter products whose name contains `term`, most similar first."""
+        return filter_similar(self, "name", term)
+
+    def update_search_vector(self):
+        """Recompute the stored full-text search vector of each product.
+
+        Does nothing on databases other than PostgreSQL, where the search falls
+        back to plain lookups.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return 0
+        vector = reduce(
+            add,
+            (
+                SearchVector("name", config=config, weight="A")
+                + SearchVector("short_description", config=config, weight="B")
+                + SearchVector("full_description", config=config, weight="C")
+                for config in SEARCH_CONFIGS
+            ),
+        )
+        return self.update(search_vector=vector)
+
 
 class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
     pass
 
 
+class ProductSummaryQuerySet(models.QuerySet):
+    def refresh(self, product_ids):
+        """Recompute the summaries of the given products from their variants.
+
+        Besides the aggregates, the variant matrix of each product is rebuilt
+        from its active variants. The products are locked first so concurrent
+        variant writes on the same product are serialized and the last refresh
+        always sees every change.
+        """
+        Product = apps.get_model("products", "Product")
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        product_ids = set(product_ids)
+        if not product_ids:
+            return []
+        using = self._db or router.db_for_write(self.model)
+        variant_filter = Q(variants__is_active=True)
+        with transaction.atomic(using=using):
+            locked_ids = list(
+                Product.objects.using(using)
+                .select_for_update()
+                .filter(pk__in=product_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True),
+            )
+            rows = (
+                Product.objects.using(using)
+                .filter(pk__in=locked_ids)
+                .order_by()
+                .values_list("pk")
+                .annotate(
+                    min_price=Min("variants__price", filter=variant_filter),
+                    max_price=Max("variants__price", filter=variant_filter),
+                    total_stock=Coalesce(
+                        Sum("variants__stock", filter=variant_filter),
+                        0,
+                    ),
+                    variant_count=Count("variants", filter=variant_filter),
+                )
+            )
+            variants = defaultdict(list)
+            for product_id, *variant in (
+                ProductVariant.objects.using(using)
+                .active()
+                .filter(product_id__in=locked_ids)
+                .order_by("sort_order", "sku")
+                .values_list("product_id", "sku", "price", "stock", "attributes")
+            ):
+                variants[product_id].append(variant)
+            summaries = [
+                self.model(
+                    product_id=product_id,
+                    min_price=min_price,
+                    max_price=max_price,
+                    total_stock=total_stock,
+                    variant_count=variant_count,
+                    variant_matrix=build_variant_matrix(variants[product_id]),
+                )
+                for product_id, min_price, max_price, total_stock, variant_count in rows
+            ]
+            return self.using(using).bulk_create(
+                summaries,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=[
+                    "min_price",
+                    "max_price",
+                    "total_stock",
+                    "variant_count",
+                    "variant_matrix",
+                    "modified",
+                ],
+            )
+
+
+class ProductSummaryManager(models.Manager.from_queryset(ProductSummaryQuerySet)):
+    pass
+
+
 class ProductVariantQuerySet(ActiveQuerySet):
     def with_product(self):
         """Select related product in the same query."""
         return self.select_related("product")
 
+    def autocomplete(self, term):
+        """Filter variants whose SKU contains `term`, most similar first."""
+        return filter_similar(self, "sku", term)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Create the variants and refresh the data derived from them."""
+        variants = super().bulk_create(objs, *args, **kwargs)
+        self.refresh_derived(variants)
+        return variants
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Update the variants and refresh the data derived from `fields`."""
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self.refresh_derived(objs, fields)
+        return rows
+
+    def refresh_derived(self, variants, fields=None) -> None:
+        """Refresh what the post_save signals would for the written `variants`.
+
+        Bulk writes send no signals, so the attributes index, the summaries of
+        the products, including those the variants moved from, the catalog
+        version and the cached detail pages are refreshed here. `fields` limits
+        the refresh to what depends on the updated fields.
+        """
+        if not variants:
+            return
+        fields = None if fields is None else set(fields)
+        product_ids = {variant.product_id for variant in variants}
+        for variant in variants:
+            tracker = getattr(variant, "tracker", None)
+            if tracker is not None and tracker.previous("product") is not None:
+                product_ids.add(tracker.previous("product"))
+        if fields is None or VARIANT_ATTRIBUTE_FIELDS & fields:
+            ProductVariantAttribute = apps.get_model(
+                "products",
+                "ProductVariantAttribute",
+            )
+            ProductVariantAttribute.objects.using(self.db).refresh(
+                [variant.pk for variant in variants],
+            )
+        if fields is None or PRODUCT_SUMMARY_FIELDS & fields:
+            ProductSummary = apps.get_model("products", "ProductSummary")
+            ProductSummary.objects.using(self.db).refresh(product_ids)
+        Product = apps.get_model("products", "Product")
+        slugs = list(
+            Product.objects.using(self.db)
+            .filter(pk__in=product_ids)
+            .values_list("slug", flat=True),
+        )
+        transaction.on_commit(bump_catalog_version, using=self.db)
+        transaction.on_commit(partial(clear_product_detail_cache, slugs), using=self.db)
+
 
 class ProductVariantManager(models.Manager.from_queryset(ProductVariantQuerySet)):
     pass
 
 
+class ProductVariantAttributeQuerySet(models.QuerySet):
+    def in_range(self, key, start=None, stop=None):
+        """Filter the numeric values of attribute `key` between the bounds."""
+        queryset = self.filter(key=key)
+        if start is not None:
+            queryset = queryset.filter(number_value__gte=start)
+        if stop is not None:
+            queryset = queryset.filter(number_value__lte=stop)
+        return queryset
+
+    def refresh(self, variant_ids):
+        """Rebuild the indexed attributes of the given variants.
+
+        Values are typed according to the properties of the schema each
+        variant's attributes are bound to. Inactive variants, and values that
+        do not match their declared type, are left out of the index.
+        """
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        variant_ids = set(variant_ids)
+        if not variant_ids:
+            return []
+        using = self._db or router.db_for_write(self.model)
+        attribute_types = get_attribute_types()
+        max_length = self.model._meta.get_field("text_value").max_length  # noqa: SLF001
+        rows = []
+        variants = (
+            ProductVariant.objects.using(using)
+            .filter(pk__in=variant_ids, is_active=True)
+            .values_list("pk", "attributes")
+        )
+        for variant_id, attributes in variants:
+            types = attribute_types.get(attributes.get("type"), {})
+            for key, value in attributes.items():
+                row = self.model(variant_id=variant_id, key=key)
+                if types.get(key) in NUMERIC_ATTRIBUTE_TYPES:
+                    if isinstance(value, bool) or not isinstance(value, int | float):
+                        continue
+                    row.number_value = value
+                elif types.get(key) in TEXT_ATTRIBUTE_TYPES:
+                    if not isinstance(value, str) or len(value) > max_length:
+                        continue
+                    row.text_value = value
+                else:
+                    continue
+                rows.append(row)
+        with transaction.atomic(using=using):
+            self.using(using).filter(variant_id__in=variant_ids).delete()
+            return self.using(using).bulk_create(rows)
+
+
+class ProductVariantAttributeManager(
+    models.Manager.from_queryset(ProductVariantAttributeQuerySet),
+):
+    pass
+
+
 class ProductImageQuerySet(ActiveQuerySet):
     def with_product(self):
         """Select related product in the same query."""
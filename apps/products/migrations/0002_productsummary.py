@@ -0,0 +1,66 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:17
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+
+
+def populate_product_summaries(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductSummary = apps.get_model('products', 'ProductSummary')
+    db_alias = schema_editor.connection.alias
+    variant_filter = Q(variants__is_active=True)
+    rows = (
+        Product.objects.using(db_alias)
+        .order_by()
+        .values_list('pk')
+        .annotate(
+            min_price=Min('variants__price', filter=variant_filter),
+            max_price=Max('variants__price', filter=variant_filter),
+            total_stock=Sum('variants__stock', filter=variant_filter),
+            variant_count=Count('variants', filter=variant_filter),
+        )
+    )
+    ProductSummary.objects.using(db_alias).bulk_create(
+        [
+            ProductSummary(
+                product_id=product_id,
+                min_price=min_price,
+                max_price=max_price,
+                total_stock=total_stock or 0,
+                variant_count=variant_count,
+            )
+            for product_id, min_price, max_price, total_stock, variant_count in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSummary',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='products.product', verbose_name='Product')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Minimum price')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Maximum price')),
+                ('total_stock', models.PositiveIntegerField(default=0, verbose_name='Total stock')),
+                ('variant_count', models.PositiveIntegerField(default=0, verbose_name='Active variants')),
+            ],
+            options={
+                'verbose_name': 'Product summary',
+                'verbose_name_plural': 'Product summaries',
+                'indexes': [models.Index(fields=['min_price', 'product'], name='products_pr_min_pri_b0577c_idx')],
+            },
+        ),
+        migrations.RunPython(populate_product_summaries, migrations.RunPython.noop),
+    ]
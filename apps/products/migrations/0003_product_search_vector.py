@@ -0,0 +1,41 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('products', 'Product')
+    vector = None
+    for config in ('spanish', 'english'):
+        config_vector = (
+            SearchVector('name', config=config, weight='A')
+            + SearchVector('short_description', config=config, weight='B')
+            + SearchVector('full_description', config=config, weight='C')
+        )
+        vector = config_vector if vector is None else vector + config_vector
+    Product.objects.using(schema_editor.connection.alias).update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Search vector'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='products_pr_search__98d711_gin'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# `icontains` compiles to `UPPER(field::text) LIKE UPPER(%s)` on PostgreSQL,
+# so the trigram indexes are built on the same expression.
+TRIGRAM_INDEXES = [
+    ('Product', GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm')),
+    ('ProductVariant', GinIndex(OpClass(Upper('sku'), name='gin_trgm_ops'), name='productvariant_sku_trgm')),
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, index in TRIGRAM_INDEXES:
+        schema_editor.add_index(apps.get_model('products', model_name), index)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, index in TRIGRAM_INDEXES:
+        schema_editor.remove_index(apps.get_model('products', model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
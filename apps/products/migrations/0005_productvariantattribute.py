@@ -0,0 +1,53 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_variant_attributes(apps, schema_editor):
+    AttributesSchema = apps.get_model('products', 'AttributesSchema')
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    ProductVariantAttribute = apps.get_model('products', 'ProductVariantAttribute')
+    db_alias = schema_editor.connection.alias
+    attribute_types = {}
+    for schema in AttributesSchema.objects.using(db_alias).values_list('schema', flat=True):
+        properties = schema.get('properties', {})
+        const = properties.get('type', {}).get('const')
+        attribute_types[const] = {key: prop.get('type') for key, prop in properties.items() if key != 'type'}
+    rows = []
+    variants = ProductVariant.objects.using(db_alias).filter(is_active=True).values_list('pk', 'attributes')
+    for variant_id, attributes in variants.iterator():
+        types = attribute_types.get(attributes.get('type'), {})
+        for key, value in attributes.items():
+            if types.get(key) in ('number', 'integer') and isinstance(value, (int, float)) and not isinstance(value, bool):
+                rows.append(ProductVariantAttribute(variant_id=variant_id, key=key, number_value=value))
+            elif types.get(key) == 'string' and isinstance(value, str) and len(value) <= 255:
+                rows.append(ProductVariantAttribute(variant_id=variant_id, key=key, text_value=value))
+    ProductVariantAttribute.objects.using(db_alias).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductVariantAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, verbose_name='Key')),
+                ('number_value', models.FloatField(blank=True, null=True, verbose_name='Number value')),
+                ('text_value', models.CharField(blank=True, max_length=255, null=True, verbose_name='Text value')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indexed_attributes', to='products.productvariant', verbose_name='Product variant')),
+            ],
+            options={
+                'verbose_name': 'Product variant attribute',
+                'verbose_name_plural': 'Product variant attributes',
+                'indexes': [models.Index(fields=['key', 'number_value', 'variant'], name='products_pr_key_470b65_idx'), models.Index(fields=['key', 'text_value', 'variant'], name='products_pr_key_e1d039_idx')],
+                'constraints': [models.UniqueConstraint(fields=('variant', 'key'), name='unique_key_per_product_variant_attribute')],
+            },
+        ),
+        migrations.RunPython(populate_variant_attributes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productvariantattribute'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['product', 'sort_order', 'id'], name='products_pr_product_9625d5_idx'),
+        ),
+    ]
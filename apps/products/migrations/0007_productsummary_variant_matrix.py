@@ -0,0 +1,49 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+def is_option(key, value):
+    # Same rule as `apps.products.utils.is_variant_option()`.
+    return key != 'type' and isinstance(value, str | int | float) and not isinstance(value, bool)
+
+
+def populate_variant_matrix(apps, schema_editor):
+    ProductSummary = apps.get_model('products', 'ProductSummary')
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    db_alias = schema_editor.connection.alias
+    variants = {}
+    rows = ProductVariant.objects.using(db_alias).filter(is_active=True).order_by('product', 'sort_order', 'sku')
+    for product_id, *variant in rows.values_list('product_id', 'sku', 'price', 'stock', 'attributes').iterator():
+        variants.setdefault(product_id, []).append(variant)
+    summaries = []
+    for summary in ProductSummary.objects.using(db_alias).filter(product_id__in=variants):
+        values = {}
+        for *_, attributes in variants[summary.product_id]:
+            for key, value in attributes.items():
+                if is_option(key, value):
+                    values.setdefault(key, set()).add(value)
+        options = {key: sorted(values[key], key=lambda value: (isinstance(value, str), value)) for key in sorted(values)}
+        matrix = {}
+        for sku, price, stock, attributes in variants[summary.product_id]:
+            code = ':'.join(str(options[key].index(attributes[key])) if is_option(key, attributes.get(key)) else '' for key in options)
+            matrix[code] = {'sku': sku, 'price': str(price), 'stock': stock}
+        summary.variant_matrix = {'options': options, 'variants': matrix}
+        summaries.append(summary)
+    ProductSummary.objects.using(db_alias).bulk_update(summaries, ['variant_matrix'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_productimage_product_sort_order_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsummary',
+            name='variant_matrix',
+            field=models.JSONField(blank=True, default=dict, help_text='Active variants by attribute combination.', verbose_name='Variant matrix'),
+        ),
+        migrations.RunPython(populate_variant_matrix, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.3 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_productsummary_variant_matrix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the image, written by a background task.', verbose_name='Renditions'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -8,6 +9,7 @@ from django.db.models.functions import Lower
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django_jsonform.models.fields import JSONField
+from model_utils import FieldTracker
 from model_utils.models import TimeStampedModel
 from model_utils.models import UUIDModel
 
@@ -19,7 +21,10 @@ from .managers import AttributesSchemaManager
 from .managers import CategoryManager
 from .managers import ProductImageManager
 from .managers import ProductManager
+from .managers import ProductSummaryManager
+from .managers import ProductVariantAttributeManager
 from .managers import ProductVariantManager
+from .utils import format_price_range
 from .utils import get_attributes_schema
 from .utils import get_default_attributes_schema
 from .utils import get_product_image_upload_path
@@ -159,14 +164,24 @@ class Product(UUIDModel, TimeStampedModel):
         verbose_name=_("Active"),
         default=True,
     )
+    search_vector = SearchVectorField(
+        verbose_name=_("Search vector"),
+        null=True,
+        editable=False,
+    )
 
     objects = ProductManager()
+    # Read by the signals to drop the cached detail page of a renamed slug.
+    tracker = FieldTracker(fields=["slug"])
 
     class Meta:
         verbose_name = _("Product")
         verbose_name_plural = _("Products")
+        # Trigram indexes for autocomplete are created by migration 0004, on
+        # PostgreSQL only.
         indexes = [
             models.Index(fields=["is_active", "name"]),
+            GinIndex(fields=["search_vector"]),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -187,19 +202,71 @@ class Product(UUIDModel, TimeStampedModel):
     @property
     def price_range(self) -> str:
         """Return a formatted price range string from annotated min/max prices."""
-        min_price = getattr(self, "min_price", None)
-        max_price = getattr(self, "max_price", None)
-        if min_price is None or max_price is None:
-            return ""
-        if min_price == max_price:
-            return f"${min_price:.2f}"
-        return f"${min_price:.2f} - ${max_price:.2f}"
+        return format_price_range(
+            getattr(self, "min_price", None),
+            getattr(self, "max_price", None),
+        )
 
     @property
     def total_stock(self) -> int:
         """Return the annotated total stock, or 0 if not annotated."""
         return getattr(self, "_total_stock", 0)
 
+    @property
+    def variant_count(self) -> int:
+        """Return the annotated active variant count, or 0 if not annotated."""
+        return getattr(self, "_variant_count", 0)
+
+
+class ProductSummary(TimeStampedModel):
+    product = models.OneToOneField(
+        to=Product,
+        verbose_name=_("Product"),
+        related_name="summary",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    min_price = models.DecimalField(
+        verbose_name=_("Minimum price"),
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+    )
+    max_price = models.DecimalField(
+        verbose_name=_("Maximum price"),
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+    )
+    total_stock = models.PositiveIntegerField(
+        verbose_name=_("Total stock"),
+        default=0,
+    )
+    variant_count = models.PositiveIntegerField(
+        verbose_name=_("Active variants"),
+        default=0,
+    )
+    variant_matrix = models.JSONField(
+        verbose_name=_("Variant matrix"),
+        default=dict,
+        blank=True,
+        help_text=_("Active variants by attribute combination."),
+    )
+
+    objects = ProductSummaryManager()
+
+    class Meta:
+        verbose_name = _("Product summary")
+        verbose_name_plural = _("Product summaries")
+        indexes = [
+            models.Index(fields=["min_price", "product"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Summary for product {self.product_id}"
+
 
 class ProductVariant(UUIDModel, TimeStampedModel):
     product = models.ForeignKey(
@@ -238,10 +305,15 @@ class ProductVariant(UUIDModel, TimeStampedModel):
     )
 
     objects = ProductVariantManager()
+    # Read by the signals to refresh the summary of the product a variant
+    # moved from.
+    tracker = FieldTracker(fields=["product"])
 
     class Meta:
         verbose_name = _("Product variant")
         verbose_name_plural = _("Product variants")
+        # Trigram indexes for autocomplete are created by migration 0004, on
+        # PostgreSQL only.
         indexes = [
             models.Index(fields=["is_active", "sku"]),
             GinIndex(fields=["attributes"]),
@@ -258,6 +330,50 @@ class ProductVariant(UUIDModel, TimeStampedModel):
         return f"{self.product.name} (SKU: {self.sku})"
 
 
+class ProductVariantAttribute(models.Model):
+    variant = models.ForeignKey(
+        to=ProductVariant,
+        verbose_name=_("Product variant"),
+        related_name="indexed_attributes",
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(
+        verbose_name=_("Key"),
+        max_length=100,
+    )
+    number_value = models.FloatField(
+        verbose_name=_("Number value"),
+        null=True,
+        blank=True,
+    )
+    text_value = models.CharField(  # noqa: DJ001
+        verbose_name=_("Text value"),
+        max_length=255,
+        null=True,
+        blank=True,
+    )
+
+    objects = ProductVariantAttributeManager()
+
+    class Meta:
+        verbose_name = _("Product variant attribute")
+        verbose_name_plural = _("Product variant attributes")
+        indexes = [
+            models.Index(fields=["key", "number_value", "variant"]),
+            models.Index(fields=["key", "text_value", "variant"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["variant", "key"],
+                name="unique_key_per_product_variant_attribute",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        value = self.text_value if self.number_value is None else self.number_value
+        return f"{self.key}: {value}"
+
+
 class ProductImage(UUIDModel, TimeStampedModel):
     product = models.ForeignKey(
         to=Product,
@@ -287,6 +403,13 @@ class ProductImage(UUIDModel, TimeStampedModel):
         verbose_name=_("Active"),
         default=True,
     )
+    renditions = models.JSONField(
+        verbose_name=_("Renditions"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Resized copies of the image, written by a background task."),
+    )
 
     objects = ProductImageManager()
 
@@ -295,6 +418,7 @@ class ProductImage(UUIDModel, TimeStampedModel):
         verbose_name_plural = _("Product images")
         indexes = [
             models.Index(fields=["is_active", "id"]),
+            models.Index(fields=["product", "sort_order", "id"]),
         ]
         ordering = ["product", "sort_order", "id"]
 
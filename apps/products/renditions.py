@@ -0,0 +1,86 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image
+from PIL import ImageOps
+
+from .constants import PRODUCT_IMAGE_RENDITION_FORMATS
+from .constants import PRODUCT_IMAGE_RENDITION_WIDTHS
+
+# Product images are resized into fixed widths and encoded in every format of
+# `PRODUCT_IMAGE_RENDITION_FORMATS`, so that pages can offer a `srcset` instead
+# of the uploaded original. The renditions are recorded on the image with the
+# `source` name and the `width` and `height` of the original they were made
+# from, and the `formats` written, mapping each MIME type to the `[width, name]`
+# pairs of its files in ascending width.
+
+
+def get_rendition_formats() -> dict[str, tuple]:
+    """Return the rendition formats the installed Pillow can encode."""
+    Image.init()
+    return {
+        mime_type: spec
+        for mime_type, spec in PRODUCT_IMAGE_RENDITION_FORMATS.items()
+        if spec[0] in Image.SAVE
+    }
+
+
+def get_rendition_widths(width) -> list[int]:
+    """Return the rendition widths of an image `width` pixels wide.
+
+    Images are never upscaled: narrower images get a single rendition of their
+    own width.
+    """
+    return [w for w in PRODUCT_IMAGE_RENDITION_WIDTHS if w <= width] or [width]
+
+
+def to_rgb(image) -> Image.Image:
+    """Return `image` without transparency, over a white background."""
+    if image.mode == "RGB":
+        return image
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def create_renditions(file) -> dict:
+    """Write the renditions of the image `file` next to it and return them."""
+    with file.open("rb"), Image.open(file) as original:
+        image = ImageOps.exif_transpose(original)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    path = PurePosixPath(file.name)
+    formats = get_rendition_formats()
+    renditions = {
+        "source": file.name,
+        "width": image.width,
+        "height": image.height,
+        "formats": {mime_type: [] for mime_type in formats},
+    }
+    for width in get_rendition_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize(
+            (width, height),
+            Image.Resampling.LANCZOS,
+            reducing_gap=3.0,
+        )
+        for mime_type, (image_format, extension, options) in formats.items():
+            buffer = BytesIO()
+            if image_format == "JPEG":
+                to_rgb(resized).save(buffer, image_format, **options)
+            else:
+                resized.save(buffer, image_format, **options)
+            name = file.storage.save(
+                str(path.with_name(f"{path.stem}-{width}w.{extension}")),
+                ContentFile(buffer.getvalue()),
+            )
+            renditions["formats"][mime_type].append([width, name])
+    return renditions
+
+
+def delete_renditions(renditions, storage) -> None:
+    """Delete the files of `renditions` from `storage`."""
+    for files in renditions.get("formats", {}).values():
+        for _, name in files:
+            storage.delete(name)
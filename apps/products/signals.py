@@ -1,13 +1,155 @@
+from functools import partial
+
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from .constants import ATTRIBUTES_SCHEMA_CACHE_KEY
+from .constants import PRODUCT_SUMMARY_FIELDS
+from .constants import VARIANT_ATTRIBUTE_FIELDS
 from .models import AttributesSchema
+from .models import Category
+from .models import Product
+from .models import ProductImage
+from .models import ProductSummary
+from .models import ProductVariant
+from .models import ProductVariantAttribute
+from .tasks import render_product_image
+from .utils import bump_catalog_version
+from .utils import clear_product_detail_cache
+
+PRODUCT_SEARCH_FIELDS = {"name", "short_description", "full_description"}
 
 
 @receiver([post_save, post_delete], sender=AttributesSchema)
 def clear_attributes_schema_cache(sender, **kwargs):
     """Clear the attributes schema cache when a schema is saved or deleted."""
     cache.delete(ATTRIBUTES_SCHEMA_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=AttributesSchema)
+def refresh_variant_attributes_on_schema_change(sender, instance, **kwargs):
+    """Reindex the attributes of the variants bound to a changed schema."""
+    if kwargs.get("raw"):
+        return
+    const = instance.schema.get("properties", {}).get("type", {}).get("const")
+    if const is None:
+        return
+    variant_ids = ProductVariant.objects.filter(attributes__type=const).values_list(
+        "pk",
+        flat=True,
+    )
+    ProductVariantAttribute.objects.refresh(variant_ids)
+
+
+@receiver([post_save, post_delete], sender=AttributesSchema)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductImage)
+def bump_catalog_version_on_change(sender, **kwargs):
+    """Bump the catalog version once the change to the catalog is committed."""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def clear_product_detail_cache_on_product_change(sender, instance, **kwargs):
+    """Drop the cached detail page of a changed product, and of its former slug."""
+    slugs = {instance.slug, instance.tracker.previous("slug")} - {None}
+    transaction.on_commit(partial(clear_product_detail_cache, slugs))
+
+
+@receiver(post_save, sender=Category)
+def clear_product_detail_cache_on_category_change(sender, instance, **kwargs):
+    """Drop the cached detail pages of the products of a changed category."""
+    if kwargs.get("raw"):
+        return
+    slugs = list(instance.products.values_list("slug", flat=True))
+    transaction.on_commit(partial(clear_product_detail_cache, slugs))
+
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductImage)
+def clear_product_detail_cache_on_relation_change(sender, instance, **kwargs):
+    """Drop the cached detail page of the product of a changed variant or image.
+
+    The page of the product a variant moved from is dropped as well.
+    """
+    if kwargs.get("raw"):
+        return
+    product_ids = {instance.product_id}
+    tracker = getattr(instance, "tracker", None)
+    if tracker is not None and tracker.previous("product") is not None:
+        product_ids.add(tracker.previous("product"))
+    slugs = list(
+        Product.objects.filter(pk__in=product_ids).values_list("slug", flat=True),
+    )
+    transaction.on_commit(partial(clear_product_detail_cache, slugs))
+
+
+@receiver(post_save, sender=Product)
+def create_product_summary(sender, instance, created, **kwargs):
+    """Create an empty `ProductSummary` whenever a new `Product` is created."""
+    if created and not kwargs.get("raw"):
+        ProductSummary.objects.refresh([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Recompute the search vector when a product's searchable text changes."""
+    if kwargs.get("raw"):
+        return
+    if update_fields is not None and not PRODUCT_SEARCH_FIELDS & set(update_fields):
+        return
+    Product.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=ProductVariant)
+def refresh_product_summary_on_save(sender, instance, update_fields=None, **kwargs):
+    """Refresh the product summary when a variant's price or stock changes.
+
+    A variant moved to another product refreshes the summary of both.
+    """
+    if kwargs.get("raw"):
+        return
+    if update_fields is not None and not PRODUCT_SUMMARY_FIELDS & set(update_fields):
+        return
+    product_ids = {instance.product_id}
+    previous = instance.tracker.previous("product")
+    if previous is not None:
+        product_ids.add(previous)
+    ProductSummary.objects.refresh(product_ids)
+
+
+@receiver(post_delete, sender=ProductVariant)
+def refresh_product_summary_on_delete(sender, instance, origin=None, **kwargs):
+    """Refresh the product summary when a variant is deleted.
+
+    Skipped when the delete cascades from the product itself, whose summary is
+    removed in the same operation.
+    """
+    if isinstance(origin, Product) or getattr(origin, "model", None) is Product:
+        return
+    ProductSummary.objects.refresh([instance.product_id])
+
+
+@receiver(post_save, sender=ProductVariant)
+def refresh_variant_attributes_on_save(sender, instance, update_fields=None, **kwargs):
+    """Reindex the attributes of a variant when they change."""
+    if kwargs.get("raw"):
+        return
+    if update_fields is not None and not VARIANT_ATTRIBUTE_FIELDS & set(update_fields):
+        return
+    ProductVariantAttribute.objects.refresh([instance.pk])
+
+
+@receiver(post_save, sender=ProductImage)
+def render_product_image_on_save(sender, instance, **kwargs):
+    """Queue the rendering of a new or replaced image once committed."""
+    if kwargs.get("raw") or not instance.image:
+        return
+    if instance.renditions.get("source") == instance.image.name:
+        return
+    transaction.on_commit(partial(render_product_image.delay, str(instance.pk)))
@@ -0,0 +1,39 @@
+from celery import shared_task
+from django.db import DEFAULT_DB_ALIAS
+from django.db import transaction
+
+from .models import ProductImage
+from .renditions import create_renditions
+from .renditions import delete_renditions
+
+
+@shared_task
+def render_product_image(image_id, *, force=False):
+    """Write the renditions of a product image and record them on it.
+
+    Images whose renditions are current are skipped, unless `force` is set,
+    e.g. after changing the rendition widths or formats.
+
+    The image is read from the primary, since the task is queued as soon as
+    the image is committed, before a replica may have it. The renditions are
+    written outside of any transaction, then recorded only
+    if the image still has the same file; otherwise they are deleted, and the
+    task queued for the new file records its own. The files of the renditions
+    replaced are deleted once recorded.
+    """
+    images = ProductImage.objects.using(DEFAULT_DB_ALIAS)
+    image = images.filter(pk=image_id).first()
+    if image is None or not image.image:
+        return
+    source = image.image.name
+    if not force and image.renditions.get("source") == source:
+        return
+    renditions = create_renditions(image.image)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        image = images.select_for_update().filter(pk=image_id).first()
+        if image is None or image.image.name != source:
+            stale = renditions
+        else:
+            stale, image.renditions = image.renditions, renditions
+            image.save(update_fields=["renditions"])
+    delete_renditions(stale, ProductImage._meta.get_field("image").storage)  # noqa: SLF001
@@ -0,0 +1,58 @@
+from django import template
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from apps.core.metrics import record_cache_lookup
+from apps.products.constants import PRODUCT_CARD_CACHE_TIMEOUT
+from apps.products.utils import get_product_card_cache_key
+
+register = template.Library()
+
+
+class ProductCardsNode(template.Node):
+    def __init__(self, nodelist, cards, var_name):
+        self.nodelist = nodelist
+        self.cards = cards
+        self.var_name = var_name
+
+    def render(self, context) -> str:
+        cards = list(self.cards.resolve(context))
+        language = get_language()
+        keys = [get_product_card_cache_key(card, language) for card in cards]
+        fragments = cache.get_many(keys)
+        rendered = {}
+        for card, key in zip(cards, keys, strict=True):
+            record_cache_lookup("product_card", hit=key in fragments)
+            if key in fragments or key in rendered:
+                continue
+            with context.push(**{self.var_name: card}):
+                rendered[key] = self.nodelist.render(context)
+        if rendered:
+            cache.set_many(rendered, PRODUCT_CARD_CACHE_TIMEOUT)
+            fragments.update(rendered)
+        return "".join(fragments[key] for key in keys)
+
+
+@register.tag
+def productcards(parser, token) -> ProductCardsNode:
+    """Render the block once per product card, caching each rendered card.
+
+    Usage::
+
+        {% productcards products as product %}
+          ...
+        {% endproductcards %}
+
+    The cards of the whole list are read with a single `get_many()`, only the
+    missing ones are rendered, with the card bound to the given variable, and
+    they are written back with a single `set_many()`. Each entry is keyed on
+    the product, the `modified` time and content of its `ProductCard`, and the
+    active language, so the block must render nothing else than the card.
+    """
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != "as":  # noqa: PLR2004
+        msg = f"'{bits[0]}' tag requires the form: {{% {bits[0]} <cards> as <name> %}}"
+        raise template.TemplateSyntaxError(msg)
+    nodelist = parser.parse((f"end{bits[0]}",))
+    parser.delete_first_token()
+    return ProductCardsNode(nodelist, parser.compile_filter(bits[1]), bits[3])
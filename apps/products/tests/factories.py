@@ -46,7 +46,7 @@ class CategoryFactory(DjangoModelFactory):
             return
 
 
-def build_schema(index: int, n_attributes: int) -> dict:
+def build_schema(index: int | str, n_attributes: int) -> dict:
     schema = {
         "type": "object",
         "title": f"Attributes schema {index}",
@@ -71,6 +71,21 @@ def build_schema(index: int, n_attributes: int) -> dict:
     return schema
 
 
+def build_oring_schema() -> dict:
+    return {
+        "type": "object",
+        "title": "O-ring",
+        "required": ["type"],
+        "properties": {
+            "type": {"type": "string", "const": "oring", "widget": "hidden"},
+            "material": {"type": "string", "title": "Material"},
+            "hardness": {"type": "integer", "title": "Hardness"},
+            "inner_diameter": {"type": "number", "title": "Inner diameter"},
+        },
+        "additionalProperties": False,
+    }
+
+
 class AttributesSchemaFactory(DjangoModelFactory):
     index = Sequence(lambda n: n + 1)
     n_attributes = Faker("pyint", min_value=1, max_value=3)
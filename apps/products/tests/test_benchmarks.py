@@ -0,0 +1,75 @@
+# ruff: noqa: PLR2004
+import pytest
+from django.urls import reverse
+
+from apps.products.benchmarks import Measurement
+from apps.products.benchmarks import Scenario
+from apps.products.benchmarks import compare
+from apps.products.benchmarks import get
+from apps.products.benchmarks import get_scenarios
+from apps.products.benchmarks import measure
+from apps.products.benchmarks import to_json
+from apps.products.models import Category
+from apps.products.models import Product
+
+from .factories import CategoryFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def run(**measurements):
+    return to_json(
+        [
+            Measurement(name, wall_time, queries, sql_time)
+            for name, (wall_time, queries, sql_time) in measurements.items()
+        ],
+    )
+
+
+class TestMeasure:
+    def test_counts_the_queries_of_a_run(self):
+        def scenario():
+            list(Product.objects.all())
+            list(Category.objects.all())
+
+        measurement = measure(Scenario("lists", scenario), repeat=3)
+        assert measurement.name == "lists"
+        assert measurement.queries == 2
+        assert measurement.wall_time >= measurement.sql_time > 0
+
+    def test_get_fails_unless_the_page_is_found(self, client):
+        with pytest.raises(RuntimeError, match="answered 404"):
+            get(client, reverse("products:product_detail", args=["missing"]))
+
+
+class TestScenarios:
+    def test_every_scenario_runs(self, client, admin_client):
+        CategoryFactory.create_batch(2, products=2, products__variants=2)
+        scenarios = get_scenarios(client, admin_client)
+        names = [scenario.name for scenario in scenarios]
+        assert "product_list[ordering=-min_price,categories=half]" in names
+        assert "product_list_htmx[categories=one]" in names
+        assert names[-4:] == [
+            "product_detail",
+            "admin_product_changelist",
+            "admin_category_changelist",
+            "get_attributes_schema",
+        ]
+        for scenario in scenarios:
+            scenario.run()
+
+
+class TestCompare:
+    def test_reports_extra_queries_and_slower_times(self):
+        baseline = run(list=(10.0, 5, 2.0), detail=(5.0, 3, 1.0))
+        current = run(list=(15.0, 5, 2.5), detail=(5.0, 4, 1.0), new=(1.0, 1, 1.0))
+        regressions = compare(current, baseline, tolerance=0.25, min_delta=1.0)
+        assert [str(regression) for regression in regressions] == [
+            "list: wall_time 10 -> 15",
+            "detail: queries 3 -> 4",
+        ]
+
+    def test_ignores_small_changes(self):
+        baseline = run(list=(2.0, 5, 0.5))
+        current = run(list=(2.9, 5, 0.9))
+        assert compare(current, baseline, tolerance=0.25, min_delta=1.0) == []
@@ -0,0 +1,79 @@
+# ruff: noqa: PLR2004
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from apps.products.management.commands.create_test_products import FAKE_IMAGE_NAME
+from apps.products.models import Category
+from apps.products.models import Product
+from apps.products.models import ProductImage
+from apps.products.models import ProductSummary
+from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttribute
+
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def create_test_products(*args):
+    call_command(
+        "create_test_products",
+        "--categories=2",
+        "--products-per-category=3",
+        "--variants-per-product=2",
+        "--images-per-product=2",
+        "--fake-images",
+        *args,
+        stdout=io.StringIO(),
+    )
+
+
+class TestCreateTestProducts:
+    def test_creates_the_catalog_with_factories(self):
+        create_test_products()
+        assert Product.objects.count() == 6
+        assert ProductVariant.objects.count() == 12
+        assert set(ProductImage.objects.values_list("image", flat=True)) == {
+            FAKE_IMAGE_NAME,
+        }
+
+    def test_creates_the_catalog_in_bulk(self):
+        create_test_products("--bulk", "--batch-size=4")
+        assert Category.objects.count() == 2
+        assert Product.objects.count() == 6
+        assert ProductImage.objects.count() == 12
+        product = Product.objects.with_summary().order_by("name").first()
+        assert list(
+            product.variants.order_by("sku").values_list("sort_order", flat=True),
+        ) == [0, 1]
+        assert product.variant_count == 2
+        assert ProductSummary.objects.count() == 6
+        assert ProductVariantAttribute.objects.filter(
+            variant__product=product,
+        ).exists()
+
+    def test_bulk_mode_does_not_clash_with_existing_products(self):
+        ProductFactory()
+        create_test_products("--bulk")
+        create_test_products("--bulk")
+        assert Product.objects.count() == 13
+
+    def test_bulk_clean_deletes_the_catalog(self):
+        create_test_products("--bulk")
+        create_test_products("--bulk", "--clean")
+        assert Product.objects.count() == 6
+        assert ProductVariant.objects.count() == 12
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Worker processes cannot share an in-memory SQLite database.",
+)
+@pytest.mark.django_db(transaction=True)
+def test_bulk_mode_splits_products_across_workers():
+    create_test_products("--bulk", "--workers=2")
+    assert Product.objects.count() == 6
+    assert ProductSummary.objects.filter(variant_count=2).count() == 6
@@ -0,0 +1,122 @@
+# ruff: noqa: PLR2004
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.products.exports import EXPORT_COLUMNS
+from apps.products.exports import get_export_rows
+from apps.products.exports import stream_catalog
+from apps.products.exports import stream_csv
+from apps.products.models import Product
+
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def product():
+    return ProductFactory(
+        name="O-ring",
+        variants=[
+            {
+                "sku": "OR-1",
+                "price": Decimal("1.50"),
+                "stock": 3,
+                "attributes": {"type": "none"},
+            },
+            {
+                "sku": "OR-2",
+                "price": Decimal("2.00"),
+                "stock": 0,
+                "attributes": {"type": "none", "size": 2},
+            },
+        ],
+    )
+
+
+def read_csv(content):
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def read_jsonl(content):
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class TestStreamCatalog:
+    def test_csv_has_a_row_per_variant(self, product):
+        rows = read_csv("".join(stream_catalog(Product.objects.all(), "csv")))
+        assert [row["sku"] for row in rows] == ["OR-1", "OR-2"]
+        assert rows[0]["product_id"] == str(product.pk)
+        assert rows[0]["category_name"] == product.category.name
+        assert rows[0]["price"] == "1.50"
+        assert json.loads(rows[1]["attributes"]) == {"size": 2, "type": "none"}
+
+    def test_jsonl_has_a_line_per_variant(self, product):
+        lines = read_jsonl("".join(stream_catalog(Product.objects.all(), "jsonl")))
+        assert list(lines[0]) == list(EXPORT_COLUMNS)
+        assert [line["sku"] for line in lines] == ["OR-1", "OR-2"]
+        assert lines[1]["price"] == "2.00"
+        assert lines[1]["attributes"] == {"type": "none", "size": 2}
+
+    @pytest.mark.parametrize("export_format", ["csv", "jsonl"])
+    def test_product_without_variants_has_empty_variant_columns(
+        self,
+        export_format,
+    ):
+        ProductFactory(name="Gasket")
+        content = "".join(stream_catalog(Product.objects.all(), export_format))
+        rows = read_csv(content) if export_format == "csv" else read_jsonl(content)
+        assert len(rows) == 1
+        assert rows[0]["product_name"] == "Gasket"
+        assert not rows[0]["sku"]
+
+    def test_csv_is_yielded_in_batches(self, product):
+        chunks = list(stream_csv(get_export_rows(Product.objects.all()), batch_size=2))
+        assert len(chunks) == 2
+        assert len(read_csv("".join(chunks))) == 2
+
+    def test_unknown_format_is_rejected(self):
+        with pytest.raises(ValueError, match="xml"):
+            stream_catalog(Product.objects.all(), "xml")
+
+
+class TestExportCatalogCommand:
+    def test_writes_to_stdout(self, product):
+        stdout = io.StringIO()
+        call_command("export_catalog", "--format", "jsonl", stdout=stdout)
+        assert len(read_jsonl(stdout.getvalue())) == 2
+
+    def test_writes_to_file(self, product, tmp_path):
+        output = tmp_path / "catalog.csv"
+        call_command("export_catalog", "-o", str(output), stderr=io.StringIO())
+        assert len(read_csv(output.read_text(encoding="utf-8"))) == 2
+
+    def test_active_only(self, product):
+        ProductFactory(is_active=False, variants=1)
+        stdout = io.StringIO()
+        call_command("export_catalog", "--active-only", stdout=stdout)
+        assert {row["product_name"] for row in read_csv(stdout.getvalue())} == {
+            "O-ring",
+        }
+
+
+class TestProductAdminExport:
+    @pytest.mark.parametrize("export_format", ["csv", "jsonl"])
+    def test_streams_selected_products(self, admin_client, product, export_format):
+        ProductFactory(variants=1)
+        response = admin_client.post(
+            reverse("admin:products_product_changelist"),
+            {"action": f"export_{export_format}", "_selected_action": [product.pk]},
+        )
+        assert response.status_code == 200
+        assert response.streaming
+        assert f".{export_format}" in response.headers["Content-Disposition"]
+        content = b"".join(response.streaming_content).decode()
+        rows = read_csv(content) if export_format == "csv" else read_jsonl(content)
+        assert [row["sku"] for row in rows] == ["OR-1", "OR-2"]
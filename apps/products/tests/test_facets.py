@@ -0,0 +1,74 @@
+import pytest
+from django.db.models import Q
+
+from apps.products.facets import FacetValue
+from apps.products.facets import build_attribute_facets
+from apps.products.facets import build_category_facets
+from apps.products.facets import count_distinct_by_conditions
+from apps.products.facets import count_products_by
+from apps.products.models import Category
+from apps.products.models import Product
+
+from .factories import CategoryFactory
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCountProductsBy:
+    def test_counts_products_per_value_in_one_query(self, django_assert_num_queries):
+        first = CategoryFactory(products=3)
+        second = CategoryFactory(products=1)
+        with django_assert_num_queries(1):
+            counts = count_products_by(Product.objects.all(), "category")
+        assert counts == {first.pk: 3, second.pk: 1}
+
+    def test_respects_queryset_filters(self):
+        category = CategoryFactory(products=[{"is_active": True}, {"is_active": False}])
+        counts = count_products_by(Product.objects.active(), "category")
+        assert counts == {category.pk: 1}
+
+
+class TestBuildCategoryFacets:
+    def test_returns_values_with_counts_and_selection(self):
+        first = CategoryFactory(name="Alpha")
+        second = CategoryFactory(name="Beta")
+        facets = build_category_facets(
+            Category.objects.order_by("name"),
+            {first.pk: 4},
+            [second.slug],
+        )
+        assert facets == [
+            FacetValue(value=first.slug, label="Alpha", count=4, selected=False),
+            FacetValue(value=second.slug, label="Beta", count=0, selected=True),
+        ]
+
+
+class TestCountDistinctByConditions:
+    def test_counts_each_condition_in_one_query(self, django_assert_num_queries):
+        ProductFactory(name="Alpha", is_active=True)
+        ProductFactory(name="Beta", is_active=False)
+        with django_assert_num_queries(1):
+            counts = count_distinct_by_conditions(
+                Product.objects.all(),
+                "pk",
+                {"active": Q(is_active=True), "alpha": Q(name__startswith="A")},
+            )
+        assert counts == {"active": 1, "alpha": 1}
+
+    def test_returns_empty_dict_without_conditions(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert count_distinct_by_conditions(Product.objects.all(), "pk", {}) == {}
+
+
+class TestBuildAttributeFacets:
+    def test_returns_values_with_counts_and_selection(self):
+        facets = build_attribute_facets(
+            [("NBR", "NBR"), ("FKM", "FKM")],
+            {"NBR": 2},
+            ["FKM"],
+        )
+        assert facets == [
+            FacetValue(value="NBR", label="NBR", count=2, selected=False),
+            FacetValue(value="FKM", label="FKM", count=0, selected=True),
+        ]
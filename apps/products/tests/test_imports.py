@@ -0,0 +1,338 @@
+# ruff: noqa: PLR2004
+import io
+import json
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import NotSupportedError
+from django.db import connection
+
+from apps.products.exports import stream_catalog
+from apps.products.imports import AttributesValidator
+from apps.products.imports import clean_row
+from apps.products.imports import import_catalog
+from apps.products.imports import read_csv
+from apps.products.models import Category
+from apps.products.models import Product
+from apps.products.models import ProductSummary
+from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttribute
+
+from .factories import AttributesSchemaFactory
+from .factories import CategoryFactory
+from .factories import ProductFactory
+from .factories import ProductVariantFactory
+from .factories import build_oring_schema
+
+pytestmark = pytest.mark.django_db
+
+requires_postgresql = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="The catalog import requires PostgreSQL.",
+)
+
+
+def oring(material="NBR", hardness=70, inner_diameter=10.5):
+    return {
+        "type": "oring",
+        "material": material,
+        "hardness": hardness,
+        "inner_diameter": inner_diameter,
+    }
+
+
+def build_row(**overrides):
+    row = {
+        "category_name": "O-rings",
+        "category_slug": "o-rings",
+        "product_name": "NBR O-ring",
+        "product_slug": "nbr-o-ring",
+        "product_is_active": True,
+        "sku": "OR-1",
+        "price": "1.50",
+        "stock": 10,
+        "variant_is_active": True,
+        "attributes": oring(),
+    }
+    return {**row, **overrides}
+
+
+def to_jsonl(*rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+@pytest.fixture
+def _oring_schema():
+    AttributesSchemaFactory(schema=build_oring_schema())
+
+
+class TestCleanRow:
+    def test_converts_values(self):
+        values = clean_row(
+            build_row(price="2", stock="3", product_is_active="no", attributes=""),
+        )
+        assert values["price"] == Decimal(2)
+        assert values["stock"] == 3
+        assert values["product_is_active"] is False
+        assert values["attributes"] == {"type": "none"}
+
+    def test_reads_only_product_columns_without_sku(self):
+        values = clean_row(build_row(sku="", price="invalid"))
+        assert values["sku"] is None
+        assert "price" not in values
+
+    def test_lists_errors_of_every_column(self):
+        with pytest.raises(ValidationError) as excinfo:
+            clean_row(build_row(product_slug="not a slug", price="-1", stock=""))
+        messages = excinfo.value.messages
+        assert len(messages) == 2
+        assert messages[0].startswith("product_slug: ")
+        assert messages[1].startswith("price: ")
+
+    def test_rejects_attributes_that_are_not_an_object(self):
+        with pytest.raises(ValidationError, match="attributes: Enter a JSON object"):
+            clean_row(build_row(attributes="[1, 2]"))
+
+    def test_read_csv_requires_product_columns(self):
+        with pytest.raises(ValueError, match="category_slug, product_slug"):
+            list(read_csv(io.StringIO("category_name,product_name\n")))
+
+
+@pytest.mark.usefixtures("_oring_schema")
+class TestAttributesValidator:
+    def test_reports_invalid_and_unknown_attributes(self):
+        errors = AttributesValidator().get_errors(
+            [oring(), oring(hardness="hard"), {"type": "gasket"}, oring()],
+        )
+        assert errors[0] is None
+        assert errors[1].startswith("attributes: hardness: ")
+        assert errors[2] == "attributes: Unknown attributes type 'gasket'."
+        assert errors[3] is None
+
+    def test_validates_each_distinct_value_once(self):
+        validator = AttributesValidator()
+        validator.get_error = Mock(wraps=validator.get_error)
+        validator.get_errors([oring(), oring(), oring(hardness=90)])
+        assert validator.get_error.call_count == 2
+
+
+@requires_postgresql
+@pytest.mark.usefixtures("_oring_schema")
+class TestImportCatalog:
+    def test_creates_categories_products_and_variants(self):
+        result = import_catalog(
+            to_jsonl(
+                build_row(),
+                build_row(sku="OR-2", price="2.50", attributes=oring(hardness=90)),
+                build_row(product_name="FKM O-ring", product_slug="fkm-o-ring", sku=""),
+            ),
+            "jsonl",
+        )
+        assert result.rows == 3
+        assert not result.errors
+        assert result.created == {"categories": 1, "products": 2, "variants": 2}
+        product = Product.objects.get(slug="nbr-o-ring")
+        assert product.category.name == "O-rings"
+        assert list(
+            product.variants.order_by("sort_order").values_list("sku", "sort_order"),
+        ) == [("OR-1", 0), ("OR-2", 1)]
+        summary = ProductSummary.objects.get(product=product)
+        assert (summary.min_price, summary.max_price) == (
+            Decimal("1.50"),
+            Decimal("2.50"),
+        )
+        assert ProductSummary.objects.get(product__slug="fkm-o-ring").variant_count == 0
+        assert ProductVariantAttribute.objects.filter(key="hardness").count() == 2
+        assert Product.objects.filter(search_vector__isnull=True).count() == 0
+
+    def test_updates_by_slug_and_sku(self):
+        variant = ProductVariantFactory(sku="OR-1", attributes=oring())
+        product = variant.product
+        new = ProductFactory(slug="other", category=product.category)
+        result = import_catalog(
+            to_jsonl(
+                build_row(
+                    category_name=product.category.name,
+                    category_slug=product.category.slug,
+                    product_name="Renamed",
+                    product_slug=product.slug,
+                    price="9.99",
+                    attributes=oring(hardness=90),
+                ),
+                build_row(
+                    category_name=product.category.name,
+                    category_slug=product.category.slug,
+                    product_name=new.name,
+                    product_slug=new.slug,
+                    sku="OR-2",
+                ),
+            ),
+            "jsonl",
+        )
+        assert result.updated == {"categories": 0, "products": 1, "variants": 1}
+        assert result.created == {"categories": 0, "products": 0, "variants": 1}
+        variant.refresh_from_db()
+        assert variant.product.name == "Renamed"
+        assert variant.price == Decimal("9.99")
+        indexed = ProductVariantAttribute.objects.get(variant=variant, key="hardness")
+        assert indexed.number_value == 90
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.max_price == Decimal("9.99")
+
+    def test_indexes_attributes_like_the_refresh_method(self):
+        import_catalog(
+            to_jsonl(
+                build_row(attributes=oring(material="x" * 300)),
+                build_row(sku="OR-2", attributes=oring(hardness=90)),
+                build_row(sku="OR-3", variant_is_active=False),
+            ),
+            "jsonl",
+        )
+        fields = ("variant__sku", "key", "number_value", "text_value")
+        imported = sorted(ProductVariantAttribute.objects.values_list(*fields))
+        ProductVariantAttribute.objects.refresh(
+            ProductVariant.objects.values_list("pk", flat=True),
+        )
+        assert imported == sorted(ProductVariantAttribute.objects.values_list(*fields))
+        assert len(imported) == 5
+
+    def test_round_trips_an_export(self):
+        ProductFactory(
+            variants=[{"attributes": oring()}, {"attributes": oring(hardness=90)}],
+        )
+        ProductFactory(is_active=False)
+        for export_format in ("csv", "jsonl"):
+            content = "".join(stream_catalog(Product.objects.all(), export_format))
+            result = import_catalog(io.StringIO(content), export_format)
+            assert result.rows == 3
+            assert not result.errors
+            assert not any(result.created.values())
+            assert not any(result.updated.values())
+
+    def test_reports_invalid_rows_and_imports_the_rest(self):
+        result = import_catalog(
+            to_jsonl(
+                build_row(price="-1"),
+                build_row(sku="OR-2", attributes=oring(hardness="hard")),
+                build_row(sku="OR-3", attributes=oring(hardness=90)),
+            ),
+            "jsonl",
+        )
+        assert [error.line for error in result.errors] == [1, 2]
+        assert result.errors[0].message.startswith("price: ")
+        assert result.errors[1].message.startswith("attributes: hardness: ")
+        assert list(ProductVariant.objects.values_list("sku", flat=True)) == ["OR-3"]
+
+    def test_reports_invalid_json_lines(self):
+        file = io.StringIO(json.dumps(build_row()) + "\n{\n\n[]\n")
+        result = import_catalog(file, "jsonl")
+        assert [str(error) for error in result.errors] == [
+            "Line 2: The line is not a JSON object.",
+            "Line 4: The line is not a JSON object.",
+        ]
+        assert ProductVariant.objects.count() == 1
+
+    def test_imports_a_repeated_sku_from_its_last_line(self):
+        result = import_catalog(
+            to_jsonl(build_row(price="1.00"), build_row(price="2.00")),
+            "jsonl",
+        )
+        assert [str(error) for error in result.errors] == [
+            "Line 1: sku: Repeated on line 2.",
+        ]
+        assert ProductVariant.objects.get().price == Decimal("2.00")
+
+    def test_reports_name_conflicts(self):
+        CategoryFactory(name="O-rings", slug="orings")
+        ProductFactory(name="Gasket", slug="gasket", category__slug="gaskets")
+        result = import_catalog(
+            to_jsonl(
+                build_row(),
+                build_row(
+                    category_name="Gaskets",
+                    category_slug="gaskets",
+                    product_name="GASKET",
+                    product_slug="gasket-2",
+                    sku="GK-1",
+                ),
+                build_row(
+                    category_name="Gaskets",
+                    category_slug="gaskets",
+                    product_name="Flat gasket",
+                    product_slug="flat-gasket",
+                    sku="GK-2",
+                ),
+            ),
+            "jsonl",
+        )
+        assert [str(error) for error in result.errors] == [
+            'Line 1: category_name: Already the name of category "orings".',
+            'Line 2: product_name: Already the name of product "gasket" in the '
+            "category.",
+        ]
+        assert list(ProductVariant.objects.values_list("sku", flat=True)) == ["GK-2"]
+
+    def test_reports_attributes_conflicts(self):
+        variant = ProductVariantFactory(attributes=oring())
+        product = variant.product
+        result = import_catalog(
+            to_jsonl(
+                build_row(
+                    category_name=product.category.name,
+                    category_slug=product.category.slug,
+                    product_name=product.name,
+                    product_slug=product.slug,
+                    sku="OR-NEW",
+                ),
+            ),
+            "jsonl",
+        )
+        assert [str(error) for error in result.errors] == [
+            f'Line 1: attributes: Already the attributes of variant "{variant.sku}" '
+            "of the product.",
+        ]
+        assert ProductVariant.objects.count() == 1
+
+    def test_dry_run_rolls_back(self):
+        result = import_catalog(to_jsonl(build_row()), "jsonl", dry_run=True)
+        assert result.created["variants"] == 1
+        assert not Category.objects.exists()
+
+    def test_bumps_the_catalog_version_on_commit(
+        self,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks() as callbacks:
+            import_catalog(to_jsonl(build_row()), "jsonl")
+        assert len(callbacks) == 2
+
+    def test_command_reports_errors_and_counts(self, tmp_path):
+        path = tmp_path / "catalog.jsonl"
+        path.write_text(
+            to_jsonl(build_row(), build_row(sku="OR-2", price="")).getvalue(),
+            encoding="utf-8",
+        )
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_catalog", str(path), stdout=stdout, stderr=stderr)
+        assert stderr.getvalue() == "Line 2: price: This field is required.\n"
+        assert "Read 2 rows with 1 errors" in stdout.getvalue()
+        assert "1 created and 0 updated variants" in stdout.getvalue()
+
+    def test_command_requires_a_known_format(self, tmp_path):
+        path = tmp_path / "catalog.xlsx"
+        path.touch()
+        with pytest.raises(CommandError, match="--format"):
+            call_command("import_catalog", str(path))
+
+
+@pytest.mark.skipif(
+    connection.vendor == "postgresql",
+    reason="Checks the import is refused on other databases.",
+)
+def test_import_catalog_requires_postgresql():
+    with pytest.raises(NotSupportedError):
+        import_catalog(to_jsonl(build_row()), "jsonl")
@@ -2,16 +2,26 @@
 from decimal import Decimal
 
 import pytest
+from django.core.cache import cache
+from django.db import connection
 
+from apps.products.cards import ProductCard
+from apps.products.constants import IMAGE_STRATEGIES
 from apps.products.models import Category
 from apps.products.models import Product
 from apps.products.models import ProductImage
+from apps.products.models import ProductSummary
 from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttribute
+from apps.products.utils import get_catalog_version
+from apps.products.utils import get_product_detail_cache_key
 
+from .factories import AttributesSchemaFactory
 from .factories import CategoryFactory
 from .factories import ProductFactory
 from .factories import ProductImageFactory
 from .factories import ProductVariantFactory
+from .factories import build_oring_schema
 
 pytestmark = pytest.mark.django_db
 
@@ -166,7 +176,8 @@ class TestProductQuerySet:
             product_from_queryset = queryset.get(id=product.id)
             assert len(product_from_queryset.all_variants) == 10
 
-    def test_with_images_method_prefetches_active_images(self):
+    @pytest.mark.parametrize("strategy", IMAGE_STRATEGIES)
+    def test_with_images_method_prefetches_active_images(self, strategy):
         product = ProductFactory(
             images=[
                 {"is_active": True},
@@ -174,14 +185,15 @@ class TestProductQuerySet:
                 {"is_active": False},
             ],
         )
-        queryset = Product.objects.with_images(active_only=True)
+        queryset = Product.objects.with_images(active_only=True, strategy=strategy)
         product_from_queryset = queryset.get(id=product.id)
         assert hasattr(product_from_queryset, "active_images")
         assert len(product_from_queryset.active_images) == 2
         for image in product_from_queryset.active_images:
             assert image.is_active
 
-    def test_with_images_method_prefetches_all_images(self):
+    @pytest.mark.parametrize("strategy", IMAGE_STRATEGIES)
+    def test_with_images_method_prefetches_all_images(self, strategy):
         product = ProductFactory(
             images=[
                 {"is_active": True},
@@ -189,22 +201,28 @@ class TestProductQuerySet:
                 {"is_active": False},
             ],
         )
-        queryset = Product.objects.with_images(active_only=False)
+        queryset = Product.objects.with_images(active_only=False, strategy=strategy)
         product_from_queryset = queryset.get(id=product.id)
         assert hasattr(product_from_queryset, "all_images")
         assert len(product_from_queryset.all_images) == 3
         for image in product_from_queryset.all_images:
             assert image in product.images.all()
 
-    def test_with_images_method_prefetches_limited_images(self):
+    @pytest.mark.parametrize("strategy", IMAGE_STRATEGIES)
+    def test_with_images_method_prefetches_limited_images(self, strategy):
         product = ProductFactory(images=3)
-        queryset = Product.objects.with_images(active_only=False, limit=2)
+        queryset = Product.objects.with_images(
+            active_only=False,
+            limit=2,
+            strategy=strategy,
+        )
         product_from_queryset = queryset.get(id=product.id)
         assert len(product_from_queryset.all_images) == 2
         expected_images = list(product.images.all()[:2])
         assert product_from_queryset.all_images == expected_images
 
-    def test_with_images_method_orders_images_by_sort_order_and_id(self):
+    @pytest.mark.parametrize("strategy", IMAGE_STRATEGIES)
+    def test_with_images_method_orders_images_by_sort_order_and_id(self, strategy):
         product = ProductFactory(
             images=[
                 {"sort_order": 2},
@@ -212,7 +230,7 @@ class TestProductQuerySet:
                 {"sort_order": 1},
             ],
         )
-        queryset = Product.objects.with_images(active_only=False)
+        queryset = Product.objects.with_images(active_only=False, strategy=strategy)
         product_from_queryset = queryset.get(id=product.id)
         assert hasattr(product_from_queryset, "all_images")
         assert len(product_from_queryset.all_images) == 3
@@ -222,6 +240,38 @@ class TestProductQuerySet:
         )
         assert product_from_queryset.all_images == expected_order
 
+    @pytest.mark.parametrize("strategy", IMAGE_STRATEGIES)
+    def test_with_images_method_limits_images_per_product(
+        self,
+        strategy,
+        django_assert_max_num_queries,
+    ):
+        ProductFactory(images=4)
+        ProductFactory(images=1)
+        queryset = Product.objects.with_images(limit=3, strategy=strategy)
+        with django_assert_max_num_queries(2):
+            counts = sorted(len(product.active_images) for product in queryset)
+        assert counts == [1, 3]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="The subquery image strategy requires PostgreSQL.",
+    )
+    def test_with_images_method_subquery_strategy_uses_one_query(
+        self,
+        django_assert_num_queries,
+    ):
+        ProductFactory(images=2)
+        queryset = Product.objects.with_images(limit=3, strategy="subquery")
+        with django_assert_num_queries(1):
+            products = list(queryset.order_by("name")[:9])
+        assert len(products[0].active_images) == 2
+        assert products[0].active_images[0].image.url
+
+    def test_with_images_method_rejects_unknown_strategy(self):
+        with pytest.raises(ValueError, match="Unknown image strategy"):
+            Product.objects.with_images(strategy="lateral")
+
     def test_with_price_range_method_calculates_price_range_for_active_variants(self):
         product = ProductFactory(
             variants=[
@@ -278,6 +328,169 @@ class TestProductQuerySet:
         assert hasattr(product_from_queryset, "_total_stock")
         assert product_from_queryset._total_stock == 60  # noqa: SLF001
 
+    def test_with_summary_method_annotates_denormalized_values(self):
+        product = ProductFactory(
+            variants=[
+                {"price": Decimal("10.00"), "stock": 10, "is_active": True},
+                {"price": Decimal("20.00"), "stock": 20, "is_active": True},
+                {"price": Decimal("30.00"), "stock": 30, "is_active": False},
+            ],
+        )
+        product_from_queryset = Product.objects.with_summary().get(id=product.id)
+        assert product_from_queryset.min_price == Decimal("10.00")
+        assert product_from_queryset.max_price == Decimal("20.00")
+        assert product_from_queryset.total_stock == 30
+        assert product_from_queryset.variant_count == 2
+
+    def test_with_summary_method_orders_by_min_price(self):
+        cheap = ProductFactory(variants=[{"price": Decimal("5.00")}])
+        expensive = ProductFactory(variants=[{"price": Decimal("50.00")}])
+        queryset = Product.objects.with_summary().order_by("-min_price")
+        assert list(queryset.filter(min_price__isnull=False)) == [expensive, cheap]
+
+    def test_as_cards_method_builds_cards_from_rows(self):
+        product = ProductFactory(
+            name="Nitrile O-Ring",
+            variants=[
+                {"price": Decimal("10.00"), "is_active": True},
+                {"price": Decimal("20.00"), "is_active": True},
+            ],
+        )
+        (card,) = Product.objects.as_cards()
+        assert isinstance(card, ProductCard)
+        assert card.pk == product.pk
+        assert card.name == "Nitrile O-Ring"
+        assert card.url == product.get_absolute_url()
+        assert card.min_price == Decimal("10.00")
+        assert card.price_range == "$10.00 - $20.00"
+
+    def test_as_cards_method_resolves_first_active_image_urls(self):
+        product = ProductFactory()
+        first = ProductImageFactory(product=product, sort_order=1)
+        ProductImageFactory(product=product, sort_order=3)
+        ProductImageFactory(product=product, sort_order=0, is_active=False)
+        second = ProductImageFactory(product=product, sort_order=2)
+        (card,) = Product.objects.as_cards(image_limit=2)
+        assert [image.url for image in card.images] == [
+            first.image.url,
+            second.image.url,
+        ]
+        assert card.images[0].alt_text == first.alt_text
+
+    def test_as_cards_method_keeps_filters_ordering_and_slicing(
+        self,
+        django_assert_max_num_queries,
+    ):
+        ProductFactory(name="B", images=2)
+        ProductFactory(name="A", images=2)
+        ProductFactory(name="C", is_active=False)
+        queryset = Product.objects.active().as_cards().order_by("name")
+        with django_assert_max_num_queries(
+            1 if connection.vendor == "postgresql" else 2,
+        ):
+            cards = list(queryset.filter(name__lt="C")[:1])
+        assert [card.name for card in cards] == ["A"]
+        assert len(cards[0].images) == 2
+
+    def test_as_cards_method_keeps_search_rank(self):
+        ProductFactory(name="Nitrile O-Ring")
+        (card,) = Product.objects.as_cards().search("nitrile")
+        assert card.search_rank is not None
+
+    def test_search_method_matches_name_and_descriptions(self):
+        by_name = ProductFactory(name="Nitrile O-Ring")
+        by_short = ProductFactory(short_description="Ring made of nitrile rubber")
+        by_full = ProductFactory(full_description="Resistant nitrile compound")
+        ProductFactory(name="Silicone gasket")
+        queryset = Product.objects.search("nitrile")
+        assert set(queryset) == {by_name, by_short, by_full}
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Full-text search requires PostgreSQL.",
+    )
+    def test_search_method_ranks_name_matches_first(self):
+        by_full = ProductFactory(full_description="Sellos de nitrilo para bombas")
+        by_name = ProductFactory(name="Sello de nitrilo")
+        queryset = Product.objects.search("sellos").order_by("-search_rank")
+        assert list(queryset) == [by_name, by_full]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Full-text search requires PostgreSQL.",
+    )
+    def test_search_method_stems_spanish_and_english(self):
+        spanish = ProductFactory(name="Empaques hidráulicos")
+        english = ProductFactory(name="Hydraulic seals")
+        assert list(Product.objects.search("empaque")) == [spanish]
+        assert list(Product.objects.search("seal")) == [english]
+
+    def test_autocomplete_method_matches_name_substrings(self):
+        ring = ProductFactory(name="Nitrile O-Ring")
+        ProductFactory(name="Silicone gasket")
+        assert list(Product.objects.autocomplete("o-ri")) == [ring]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Trigram similarity requires PostgreSQL.",
+    )
+    def test_autocomplete_method_orders_by_similarity(self):
+        longer = ProductFactory(name="Viton ring for hydraulic pumps")
+        closer = ProductFactory(name="Viton ring")
+        assert list(Product.objects.autocomplete("viton ring")) == [closer, longer]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Full-text search requires PostgreSQL.",
+    )
+    def test_update_search_vector_method_refreshes_stale_vectors(self):
+        product = ProductFactory(name="Viton gasket")
+        Product.objects.filter(pk=product.pk).update(name="Neoprene gasket")
+        assert not Product.objects.search("neoprene").exists()
+        Product.objects.filter(pk=product.pk).update_search_vector()
+        assert list(Product.objects.search("neoprene")) == [product]
+
+
+class TestProductSummaryQuerySet:
+    def test_refresh_method_recomputes_stale_summaries(self):
+        product = ProductFactory(
+            variants=[{"price": Decimal("10.00"), "stock": 3}],
+        )
+        ProductSummary.objects.filter(product=product).update(
+            min_price=None,
+            total_stock=0,
+        )
+        ProductSummary.objects.refresh([product.id])
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price == Decimal("10.00")
+        assert summary.total_stock == 3
+
+    def test_refresh_method_creates_missing_summaries(self):
+        product = ProductFactory(variants=[{"price": Decimal("10.00")}])
+        ProductSummary.objects.filter(product=product).delete()
+        ProductSummary.objects.refresh([product.id])
+        assert ProductSummary.objects.get(product=product).variant_count == 1
+
+    def test_refresh_method_rebuilds_variant_matrix_from_active_variants(self):
+        product = ProductFactory(
+            variants=[
+                {"sku": "NBR-70", "attributes": {"material": "NBR"}, "stock": 2},
+                {
+                    "sku": "FKM-70",
+                    "attributes": {"material": "FKM"},
+                    "is_active": False,
+                },
+            ],
+        )
+        matrix = ProductSummary.objects.get(product=product).variant_matrix
+        assert matrix["options"] == {"material": ["NBR"]}
+        assert matrix["variants"]["0"]["sku"] == "NBR-70"
+        assert matrix["variants"]["0"]["stock"] == 2
+
+    def test_refresh_method_ignores_empty_input(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert ProductSummary.objects.refresh([]) == []
+
 
 class TestProductVariantQuerySet:
     def test_active_method_returns_only_active_variants(self):
@@ -296,6 +509,126 @@ class TestProductVariantQuerySet:
             variant_from_queryset = queryset.get(id=variant.id)
             assert variant_from_queryset.product == product
 
+    def test_autocomplete_method_matches_sku_substrings(self):
+        variant = ProductVariantFactory(sku="NBR-070-114")
+        ProductVariantFactory(sku="FKM-090-020")
+        assert list(ProductVariant.objects.autocomplete("070-1")) == [variant]
+
+    def test_bulk_create_method_indexes_attributes(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        product = ProductFactory()
+        ProductVariant.objects.bulk_create(
+            [
+                ProductVariant(
+                    product=product,
+                    sku=f"OR-{hardness}",
+                    price=Decimal("1.00"),
+                    attributes={"type": "oring", "hardness": hardness},
+                )
+                for hardness in (70, 90)
+            ],
+        )
+        values = ProductVariantAttribute.objects.values_list("number_value", flat=True)
+        assert sorted(values) == [70, 90]
+
+    def test_bulk_update_method_reindexes_attributes(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        variant = ProductVariantFactory(attributes={"type": "oring", "hardness": 70})
+        variant.attributes["hardness"] = 90
+        ProductVariant.objects.bulk_update([variant], ["attributes"])
+        indexed = ProductVariantAttribute.objects.get(variant=variant)
+        assert indexed.number_value == 90
+
+    def test_bulk_create_method_refreshes_the_summaries_and_caches(
+        self,
+        django_capture_on_commit_callbacks,
+    ):
+        product = ProductFactory()
+        cache.set(get_product_detail_cache_key(product.slug), "stale")
+        version = get_catalog_version()
+        with django_capture_on_commit_callbacks(execute=True):
+            ProductVariant.objects.bulk_create(
+                [
+                    ProductVariant(
+                        product=product,
+                        sku=f"BC-{price}",
+                        price=price,
+                        attributes={"type": "none", "size": str(price)},
+                    )
+                    for price in (Decimal("1.00"), Decimal("3.00"))
+                ],
+            )
+        summary = ProductSummary.objects.get(product=product)
+        assert (summary.min_price, summary.max_price) == (1, 3)
+        assert summary.variant_count == 2
+        assert get_catalog_version() > version
+        assert cache.get(get_product_detail_cache_key(product.slug)) is None
+
+    def test_bulk_update_method_refreshes_both_products_of_a_moved_variant(self):
+        source, target = ProductFactory(), ProductFactory()
+        variant = ProductVariantFactory(product=source, price=Decimal("2.00"))
+        variant.product = target
+        ProductVariant.objects.bulk_update([variant], ["product"])
+        assert ProductSummary.objects.get(product=source).variant_count == 0
+        assert ProductSummary.objects.get(product=target).min_price == 2
+
+    def test_bulk_update_method_skips_summaries_of_other_fields(
+        self,
+        django_assert_num_queries,
+    ):
+        variant = ProductVariantFactory()
+        with django_assert_num_queries(2):
+            ProductVariant.objects.bulk_update([variant], ["created"])
+
+
+class TestProductVariantAttributeQuerySet:
+    @pytest.fixture(autouse=True)
+    def _oring_schema(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+
+    def test_refresh_method_types_values_by_schema(self):
+        variant = ProductVariantFactory(
+            attributes={
+                "type": "oring",
+                "material": "NBR",
+                "hardness": 70,
+                "inner_diameter": 12.5,
+            },
+        )
+        ProductVariantAttribute.objects.all().delete()
+        ProductVariantAttribute.objects.refresh([variant.pk])
+        values = ProductVariantAttribute.objects.filter(variant=variant).values_list(
+            "key",
+            "number_value",
+            "text_value",
+        )
+        assert sorted(values) == [
+            ("hardness", 70, None),
+            ("inner_diameter", 12.5, None),
+            ("material", None, "NBR"),
+        ]
+
+    def test_refresh_method_skips_values_of_the_wrong_type(self):
+        variant = ProductVariantFactory(
+            attributes={"type": "oring", "material": 70, "hardness": "hard"},
+        )
+        assert not ProductVariantAttribute.objects.filter(variant=variant).exists()
+
+    def test_refresh_method_skips_inactive_variants(self):
+        variant = ProductVariantFactory(
+            attributes={"type": "oring", "hardness": 70},
+            is_active=False,
+        )
+        assert not ProductVariantAttribute.objects.filter(variant=variant).exists()
+
+    def test_in_range_method_filters_numeric_values(self):
+        for hardness in (50, 70, 90):
+            ProductVariantFactory(attributes={"type": "oring", "hardness": hardness})
+        queryset = ProductVariantAttribute.objects.in_range("hardness", 60, 80)
+        assert list(queryset.values_list("number_value", flat=True)) == [70]
+        queryset = ProductVariantAttribute.objects.in_range("hardness", start=60)
+        assert sorted(queryset.values_list("number_value", flat=True)) == [70, 90]
+
 
 class TestProductImageQuerySet:
     def test_active_method_returns_only_active_images(self):
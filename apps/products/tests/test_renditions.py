@@ -0,0 +1,191 @@
+# ruff: noqa: PLR2004
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import router
+from django.urls import reverse
+from PIL import Image
+
+from apps.core.routers import REPLICA_DB_ALIAS
+from apps.core.routers import reset_replica_state
+from apps.core.routers import start_replica_state
+from apps.products.models import Product
+from apps.products.models import ProductImage
+from apps.products.renditions import create_renditions
+from apps.products.renditions import get_rendition_formats
+from apps.products.renditions import get_rendition_widths
+from apps.products.tasks import render_product_image
+
+from .factories import ProductFactory
+from .factories import ProductImageFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def build_image_file(name, width, height, mode="RGB", image_format="JPEG"):
+    buffer = BytesIO()
+    Image.new(mode, (width, height), "red").save(buffer, image_format)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def create_image(width=1200, height=800, **kwargs):
+    return ProductImageFactory(
+        image=build_image_file("ring.jpg", width, height),
+        **kwargs,
+    )
+
+
+class TestCreateRenditions:
+    def test_writes_every_width_and_format_next_to_the_original(self):
+        image = create_image()
+        renditions = create_renditions(image.image)
+        assert renditions["source"] == image.image.name
+        assert (renditions["width"], renditions["height"]) == (1200, 800)
+        assert set(renditions["formats"]) == set(get_rendition_formats())
+        directory = image.image.name.rpartition("/")[0]
+        for files in renditions["formats"].values():
+            assert [width for width, _ in files] == [320, 640, 960]
+            for width, name in files:
+                assert name.startswith(f"{directory}/ring-{width}w.")
+                with image.image.storage.open(name) as file, Image.open(file) as file:
+                    assert file.size == (width, round(800 * width / 1200))
+
+    def test_flattens_transparent_images_for_jpeg(self):
+        image = ProductImageFactory(
+            image=build_image_file("ring.png", 400, 400, "RGBA", "PNG"),
+        )
+        renditions = create_renditions(image.image)
+        [(_, name)] = renditions["formats"]["image/jpeg"]
+        with image.image.storage.open(name) as file, Image.open(file) as file:
+            assert file.mode == "RGB"
+
+    def test_does_not_upscale_small_images(self):
+        assert get_rendition_widths(1000) == [320, 640, 960]
+        assert get_rendition_widths(500) == [320]
+        assert get_rendition_widths(200) == [200]
+
+
+class TestRenderProductImageTask:
+    def test_records_the_renditions(self):
+        image = create_image()
+        render_product_image(str(image.pk))
+        image.refresh_from_db()
+        assert image.renditions["source"] == image.image.name
+
+    def test_reads_the_image_from_the_primary(self, monkeypatch):
+        image = create_image()
+        monkeypatch.setattr("apps.core.routers.has_replica", lambda: True)
+        token = start_replica_state()
+        try:
+            assert router.db_for_read(ProductImage) == REPLICA_DB_ALIAS
+            render_product_image(str(image.pk))
+        finally:
+            reset_replica_state(token)
+        image.refresh_from_db()
+        assert image.renditions["source"] == image.image.name
+
+    def test_skips_current_renditions(self):
+        image = create_image()
+        render_product_image(str(image.pk))
+        with patch("apps.products.tasks.create_renditions") as create:
+            render_product_image(str(image.pk))
+        create.assert_not_called()
+
+    def test_force_replaces_and_deletes_the_renditions(self):
+        image = create_image()
+        render_product_image(str(image.pk))
+        image.refresh_from_db()
+        old = image.renditions["formats"]["image/jpeg"][0][1]
+        render_product_image(str(image.pk), force=True)
+        image.refresh_from_db()
+        assert image.renditions["formats"]["image/jpeg"][0][1] != old
+        assert not image.image.storage.exists(old)
+
+    def test_discards_the_renditions_of_a_replaced_file(self):
+        image = create_image()
+        written = []
+
+        def replace_file(file):
+            renditions = create_renditions(file)
+            written.extend(name for _, name in renditions["formats"]["image/jpeg"])
+            ProductImage.objects.filter(pk=image.pk).update(image="other.jpg")
+            return renditions
+
+        with patch("apps.products.tasks.create_renditions", replace_file):
+            render_product_image(str(image.pk))
+        image.refresh_from_db()
+        assert image.renditions == {}
+        assert not any(image.image.storage.exists(name) for name in written)
+
+
+class TestRenderProductImageSignal:
+    def test_renders_new_images_on_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = create_image()
+        image.refresh_from_db()
+        assert image.renditions["source"] == image.image.name
+
+    def test_ignores_changes_keeping_the_file(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = create_image()
+        image.refresh_from_db()
+        image.alt_text = "Changed"
+        with (
+            patch.object(render_product_image, "delay") as delay,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            image.save()
+        delay.assert_not_called()
+
+
+class TestCardImages:
+    def test_offer_the_renditions_in_a_srcset(self):
+        product = ProductFactory()
+        image = create_image(product=product)
+        render_product_image(str(image.pk))
+        [card] = Product.objects.as_cards()
+        [card_image] = card.images
+        assert card_image.url.endswith("ring-960w.jpg")
+        assert card_image.srcset.count("w, ") == 2
+        assert card_image.srcset.endswith("ring-960w.jpg 960w")
+        assert card_image.sizes == "375px"
+        assert [source.type for source in card_image.sources] == [
+            mime_type
+            for mime_type in get_rendition_formats()
+            if mime_type != "image/jpeg"
+        ]
+
+    def test_are_rendered_in_a_picture(self, client):
+        image = create_image()
+        render_product_image(str(image.pk))
+        content = client.get(reverse("products:product_list")).content.decode()
+        assert '<source type="image/webp"' in content
+        assert 'ring-960w.jpg 960w" sizes="375px"' in content
+
+    def test_fall_back_to_the_original_until_rendered(self):
+        product = ProductFactory()
+        image = create_image(product=product)
+        [card] = Product.objects.as_cards()
+        [card_image] = card.images
+        assert card_image.url == image.image.url
+        assert not card_image.srcset
+        assert not card_image.sources
+
+
+class TestRenderProductImagesCommand:
+    def test_queues_the_images_missing_renditions(self, capsys):
+        rendered = create_image()
+        render_product_image(str(rendered.pk))
+        missing = create_image()
+        with patch.object(render_product_image, "delay") as delay:
+            call_command("render_product_images")
+        delay.assert_called_once_with(str(missing.pk), force=False)
+        assert "Queued 1 product images." in capsys.readouterr().out
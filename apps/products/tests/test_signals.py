@@ -1,9 +1,22 @@
+# ruff: noqa: PLR2004
+from decimal import Decimal
+
 import pytest
 from django.core.cache import cache
+from django.db import connection
 
 from apps.products.constants import ATTRIBUTES_SCHEMA_CACHE_KEY
+from apps.products.models import Product
+from apps.products.models import ProductSummary
+from apps.products.models import ProductVariantAttribute
+from apps.products.utils import get_catalog_version
 
 from .factories import AttributesSchemaFactory
+from .factories import CategoryFactory
+from .factories import ProductFactory
+from .factories import ProductImageFactory
+from .factories import ProductVariantFactory
+from .factories import build_oring_schema
 
 pytestmark = pytest.mark.django_db
 
@@ -29,3 +42,190 @@ class TestClearAttributesSchemaCacheSignal:
         cache.set(ATTRIBUTES_SCHEMA_CACHE_KEY, "cached_value")
         schema.delete()
         assert cache.get(ATTRIBUTES_SCHEMA_CACHE_KEY) is None
+
+
+class TestProductSummarySignals:
+    def test_summary_created_on_product_create(self):
+        product = ProductFactory()
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price is None
+        assert summary.total_stock == 0
+        assert summary.variant_count == 0
+
+    def test_summary_refreshed_on_variant_create(self):
+        product = ProductFactory(
+            variants=[
+                {"price": Decimal("10.00"), "stock": 5},
+                {"price": Decimal("20.00"), "stock": 7},
+            ],
+        )
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price == Decimal("10.00")
+        assert summary.max_price == Decimal("20.00")
+        assert summary.total_stock == 12
+        assert summary.variant_count == 2
+
+    def test_summary_refreshed_on_variant_update(self):
+        product = ProductFactory(variants=[{"price": Decimal("10.00")}])
+        variant = product.variants.get()
+        variant.price = Decimal("15.00")
+        variant.save(update_fields=["price"])
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price == Decimal("15.00")
+
+    def test_summaries_refreshed_on_variant_move(self):
+        source = ProductFactory(variants=[{"price": Decimal("10.00"), "stock": 3}])
+        target = ProductFactory()
+        variant = source.variants.get()
+        variant.product = target
+        variant.save()
+        source_summary = ProductSummary.objects.get(product=source)
+        assert source_summary.min_price is None
+        assert source_summary.total_stock == 0
+        assert source_summary.variant_matrix["variants"] == {}
+        target_summary = ProductSummary.objects.get(product=target)
+        assert target_summary.min_price == Decimal("10.00")
+        assert target_summary.variant_count == 1
+
+    def test_variant_matrix_refreshed_on_sku_update(self):
+        product = ProductFactory(variants=[{"sku": "NBR-70"}])
+        variant = product.variants.get()
+        variant.sku = "NBR-80"
+        variant.save(update_fields=["sku"])
+        summary = ProductSummary.objects.get(product=product)
+        [entry] = summary.variant_matrix["variants"].values()
+        assert entry["sku"] == "NBR-80"
+
+    def test_variant_matrix_refreshed_on_attributes_update(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        product = ProductFactory(
+            variants=[{"attributes": {"type": "oring", "hardness": 70}}],
+        )
+        variant = product.variants.get()
+        variant.attributes["hardness"] = 80
+        variant.save(update_fields=["attributes"])
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.variant_matrix["options"]["hardness"] == [80]
+
+    def test_summary_ignores_inactive_variants(self):
+        product = ProductFactory(
+            variants=[
+                {"price": Decimal("10.00"), "stock": 5},
+                {"price": Decimal("20.00"), "stock": 7},
+            ],
+        )
+        variant = product.variants.get(price=Decimal("10.00"))
+        variant.is_active = False
+        variant.save()
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price == Decimal("20.00")
+        assert summary.total_stock == 7
+        assert summary.variant_count == 1
+
+    def test_summary_refreshed_on_variant_delete(self):
+        product = ProductFactory(variants=[{"price": Decimal("10.00")}])
+        product.variants.get().delete()
+        summary = ProductSummary.objects.get(product=product)
+        assert summary.min_price is None
+        assert summary.variant_count == 0
+
+    def test_summary_deleted_with_product(self):
+        product = ProductFactory(variants=2)
+        product_id = product.pk
+        product.delete()
+        assert not ProductSummary.objects.filter(product_id=product_id).exists()
+
+
+class TestBumpCatalogVersionSignal:
+    def setup_method(self):
+        cache.clear()
+
+    def test_version_bumped_on_commit(self, django_capture_on_commit_callbacks):
+        version = get_catalog_version()
+        with django_capture_on_commit_callbacks() as callbacks:
+            CategoryFactory()
+        assert get_catalog_version() == version
+        for callback in callbacks:
+            callback()
+        assert get_catalog_version() > version
+
+    @pytest.mark.parametrize(
+        "factory",
+        [CategoryFactory, ProductFactory, ProductImageFactory],
+    )
+    def test_version_bumped_on_save_and_delete(
+        self,
+        factory,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            instance = factory()
+        version = get_catalog_version()
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.save()
+        saved_version = get_catalog_version()
+        assert saved_version > version
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.delete()
+        assert get_catalog_version() > saved_version
+
+    def test_version_bumped_on_variant_update(self, django_capture_on_commit_callbacks):
+        product = ProductFactory(variants=1)
+        version = get_catalog_version()
+        with django_capture_on_commit_callbacks(execute=True):
+            product.variants.get().save()
+        assert get_catalog_version() > version
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Full-text search requires PostgreSQL.",
+)
+class TestUpdateProductSearchVectorSignal:
+    def test_vector_populated_on_product_create(self):
+        product = ProductFactory(name="Nitrile O-Ring")
+        assert list(Product.objects.search("nitrile")) == [product]
+
+    def test_vector_updated_on_description_change(self):
+        product = ProductFactory(full_description="Viton compound")
+        product.full_description = "Neoprene compound"
+        product.save(update_fields=["full_description"])
+        assert list(Product.objects.search("neoprene")) == [product]
+
+    def test_vector_kept_on_unrelated_update(self):
+        product = ProductFactory(name="Nitrile O-Ring")
+        Product.objects.filter(pk=product.pk).update(name="Silicone O-Ring")
+        product.is_active = False
+        product.save(update_fields=["is_active"])
+        assert list(Product.objects.search("nitrile")) == [product]
+
+
+class TestRefreshVariantAttributesSignals:
+    def setup_method(self):
+        cache.clear()
+
+    def test_attributes_indexed_on_variant_save(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        variant = ProductVariantFactory(attributes={"type": "oring", "hardness": 70})
+        variant.attributes["hardness"] = 80
+        variant.save(update_fields=["attributes"])
+        indexed = ProductVariantAttribute.objects.get(variant=variant)
+        assert indexed.number_value == 80
+
+    def test_attributes_removed_when_variant_deactivated(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        variant = ProductVariantFactory(attributes={"type": "oring", "hardness": 70})
+        variant.is_active = False
+        variant.save(update_fields=["is_active"])
+        assert not ProductVariantAttribute.objects.filter(variant=variant).exists()
+
+    def test_attributes_reindexed_on_schema_change(self):
+        schema = build_oring_schema()
+        schema["properties"]["hardness"]["type"] = "string"
+        attributes_schema = AttributesSchemaFactory(schema=schema)
+        variant = ProductVariantFactory(attributes={"type": "oring", "hardness": 70})
+        assert not ProductVariantAttribute.objects.filter(variant=variant).exists()
+        attributes_schema.schema = build_oring_schema()
+        attributes_schema.save()
+        indexed = ProductVariantAttribute.objects.get(variant=variant)
+        assert indexed.number_value == 70
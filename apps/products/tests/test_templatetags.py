@@ -0,0 +1,94 @@
+# ruff: noqa: PLR2004
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.template import Context
+from django.template import Template
+from django.template import TemplateSyntaxError
+from django.utils import translation
+
+from apps.products.models import Product
+from apps.products.utils import get_product_card_cache_key
+
+from .factories import ProductFactory
+from .factories import ProductImageFactory
+
+pytestmark = pytest.mark.django_db
+
+TEMPLATE = Template(
+    "{% load product_tags %}"
+    "{% productcards cards as card %}[{{ card.name }}]{% endproductcards %}",
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def get_cards():
+    return list(Product.objects.as_cards().order_by("name"))
+
+
+def render(cards) -> str:
+    return TEMPLATE.render(Context({"cards": cards}))
+
+
+class TestProductCardsTag:
+    def test_renders_the_block_for_each_card(self):
+        ProductFactory(name="Alpha")
+        ProductFactory(name="Beta")
+        assert render(get_cards()) == "[Alpha][Beta]"
+
+    def test_caches_each_card_with_a_single_read_and_write(self):
+        ProductFactory.create_batch(3)
+        cards = get_cards()
+        with (
+            patch.object(cache, "get_many", wraps=cache.get_many) as get_many,
+            patch.object(cache, "set_many", wraps=cache.set_many) as set_many,
+        ):
+            first = render(cards)
+            second = render(cards)
+        assert second == first
+        assert get_many.call_count == 2
+        assert set_many.call_count == 1
+        [(entries, _), _] = set_many.call_args
+        assert len(entries) == 3
+
+    def test_renders_only_the_missing_cards(self):
+        ProductFactory(name="Alpha")
+        ProductFactory(name="Beta")
+        cards = get_cards()
+        cache.set(get_product_card_cache_key(cards[0], "en"), "[Cached]")
+        with translation.override("en"):
+            assert render(cards) == "[Cached][Beta]"
+
+    def test_changed_product_invalidates_its_card(self):
+        product = ProductFactory(name="Old name")
+        render(get_cards())
+        product.name = "New name"
+        product.save()
+        assert render(get_cards()) == "[New name]"
+
+    def test_changed_images_invalidate_the_card(self):
+        product = ProductFactory()
+        [card] = get_cards()
+        ProductImageFactory(product=product)
+        [changed] = get_cards()
+        assert get_product_card_cache_key(card, "en") != (
+            get_product_card_cache_key(changed, "en")
+        )
+
+    def test_cards_are_cached_per_language(self):
+        ProductFactory()
+        [card] = get_cards()
+        assert get_product_card_cache_key(card, "en") != (
+            get_product_card_cache_key(card, "es")
+        )
+
+    def test_requires_a_variable_name(self):
+        with pytest.raises(TemplateSyntaxError, match="requires the form"):
+            Template(
+                "{% load product_tags %}{% productcards cards %}{% endproductcards %}",
+            )
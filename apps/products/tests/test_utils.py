@@ -1,14 +1,20 @@
 # ruff: noqa: PLR2004
+from decimal import Decimal
 from unittest.mock import Mock
 
 import pytest
 from django.core.cache import cache
 
 from apps.products.constants import ATTRIBUTES_SCHEMA_CACHE_KEY
+from apps.products.constants import CATALOG_VERSION_CACHE_KEY
 from apps.products.constants import NO_ATTRIBUTES_SCHEMA
 from apps.products.utils import build_attributes_schema
+from apps.products.utils import build_variant_matrix
+from apps.products.utils import bump_catalog_version
 from apps.products.utils import get_attributes_schema
+from apps.products.utils import get_catalog_version
 from apps.products.utils import get_default_attributes_schema
+from apps.products.utils import get_enum_attributes
 from apps.products.utils import get_product_image_upload_path
 
 from .factories import AttributesSchemaFactory
@@ -88,3 +94,106 @@ class TestGetProductImageUploadPath:
         instance.product.slug = "gasket"
         result = get_product_image_upload_path(instance, "my image (1).png")
         assert result == "products/products/gasket/my image (1).png"
+
+
+class TestCatalogVersion:
+    def setup_method(self):
+        cache.clear()
+
+    def test_version_is_stable_until_bumped(self):
+        version = get_catalog_version()
+        assert get_catalog_version() == version
+        bump_catalog_version()
+        assert get_catalog_version() == version + 1
+
+    def test_bump_reseeds_a_missing_version(self):
+        bump_catalog_version()
+        assert cache.get(CATALOG_VERSION_CACHE_KEY) is not None
+
+    def test_version_does_not_go_back_after_eviction(self):
+        version = get_catalog_version()
+        cache.delete(CATALOG_VERSION_CACHE_KEY)
+        assert get_catalog_version() > version
+
+
+class TestGetEnumAttributes:
+    def setup_method(self):
+        cache.clear()
+
+    def test_merges_enum_values_across_schemas(self):
+        for index, values in enumerate([["NBR", "FKM"], ["FKM", "EPDM"]]):
+            AttributesSchemaFactory(
+                schema={
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "const": f"schema_{index}"},
+                        "material": {
+                            "type": "string",
+                            "title": "Material",
+                            "enum": values,
+                        },
+                        "notes": {"type": "string", "title": "Notes"},
+                    },
+                },
+            )
+        assert get_enum_attributes() == {
+            "material": {"title": "Material", "values": ["NBR", "FKM", "EPDM"]},
+        }
+
+
+class TestBuildVariantMatrix:
+    def test_maps_combinations_to_variants(self):
+        matrix = build_variant_matrix(
+            [
+                ("NBR-90", Decimal("2.50"), 4, {"material": "NBR", "hardness": 90}),
+                ("NBR-70", Decimal("2.00"), 0, {"material": "NBR", "hardness": 70}),
+                ("FKM-70", Decimal("5.00"), 8, {"material": "FKM", "hardness": 70}),
+            ],
+        )
+        assert matrix == {
+            "options": {"hardness": [70, 90], "material": ["FKM", "NBR"]},
+            "variants": {
+                "1:1": {"sku": "NBR-90", "price": "2.50", "stock": 4},
+                "0:1": {"sku": "NBR-70", "price": "2.00", "stock": 0},
+                "0:0": {"sku": "FKM-70", "price": "5.00", "stock": 8},
+            },
+        }
+
+    def test_ignores_type_and_non_scalar_values(self):
+        matrix = build_variant_matrix(
+            [("A", Decimal("1.00"), 1, {"type": "oring", "tags": ["a"], "size": 3})],
+        )
+        assert matrix["options"] == {"size": [3]}
+        assert matrix["variants"] == {"0": {"sku": "A", "price": "1.00", "stock": 1}}
+
+    def test_leaves_null_values_empty(self):
+        matrix = build_variant_matrix(
+            [
+                ("A", Decimal("1.00"), 1, {"type": "x", "size": 10}),
+                ("B", Decimal("1.00"), 1, {"type": "x", "size": None}),
+            ],
+        )
+        assert matrix["options"] == {"size": [10]}
+        assert set(matrix["variants"]) == {"0", ""}
+
+    def test_ignores_boolean_values(self):
+        matrix = build_variant_matrix(
+            [
+                ("A", Decimal("1.00"), 1, {"size": 1, "coated": True}),
+                ("B", Decimal("1.00"), 1, {"size": 1, "coated": 1}),
+            ],
+        )
+        assert matrix["options"] == {"coated": [1], "size": [1]}
+        assert set(matrix["variants"]) == {":0", "0:0"}
+
+    def test_leaves_missing_keys_empty(self):
+        matrix = build_variant_matrix(
+            [
+                ("A", Decimal("1.00"), 1, {"size": 3}),
+                ("B", Decimal("1.00"), 1, {"color": "red", "size": 3}),
+            ],
+        )
+        assert set(matrix["variants"]) == {":0", "0:0"}
+
+    def test_returns_empty_matrix_without_variants(self):
+        assert build_variant_matrix([]) == {"options": {}, "variants": {}}
@@ -0,0 +1,830 @@
+# ruff: noqa: PLR2004
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.urls import reverse
+from django_htmx.middleware import HtmxDetails
+
+from apps.core.querybudgets import assert_query_budget
+from apps.products.models import AttributesSchema
+from apps.products.views import AsyncProductDetailView
+from apps.products.views import AsyncProductListView
+from apps.products.views import ProductDetailView
+from apps.store.views import AsyncHomeView
+
+from .factories import AttributesSchemaFactory
+from .factories import CategoryFactory
+from .factories import ProductFactory
+from .factories import ProductImageFactory
+from .factories import ProductVariantFactory
+from .factories import build_oring_schema
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+
+
+def forge_cursor(cursor, index, value) -> str:
+    """Return `cursor` with the value at `index` of its position replaced."""
+    payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    payload["p"][index] = value
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+MISTYPED_CURSORS = [
+    pytest.param("name", 1, "not-a-uuid", id="pk"),
+    pytest.param("min_price", 0, "not-a-price", id="min_price"),
+]
+
+
+def walk_pages(client, url, params=None):
+    """Follow `next_cursor` links from the first page and collect all products."""
+    params = dict(params or {})
+    names = []
+    while True:
+        response = client.get(url, params)
+        assert response.status_code == 200
+        names.extend(product.name for product in response.context["products"])
+        page = response.context["page_obj"]
+        if not page.has_next():
+            return names
+        params["cursor"] = page.next_cursor
+
+
+class TestProductListViewPagination:
+    url = reverse("products:product_list")
+
+    def test_first_page_has_no_previous_cursor(self, client):
+        category = CategoryFactory(products=12)
+        response = client.get(self.url, {"category": category.slug})
+        page = response.context["page_obj"]
+        assert len(page) == 9
+        assert page.has_next()
+        assert not page.has_previous()
+
+    def test_walks_all_products_in_name_order(self, client):
+        CategoryFactory(products=[{"name": f"Product {i:02d}"} for i in range(20)])
+        names = walk_pages(client, self.url)
+        assert names == [f"Product {i:02d}" for i in range(20)]
+
+    def test_walks_all_products_in_descending_name_order(self, client):
+        CategoryFactory(products=[{"name": f"Product {i:02d}"} for i in range(20)])
+        names = walk_pages(client, self.url, {"ordering": "-name"})
+        assert names == [f"Product {i:02d}" for i in reversed(range(20))]
+
+    @pytest.mark.parametrize("ordering", ["min_price", "-min_price"])
+    def test_walks_products_with_ties_and_missing_prices(self, client, ordering):
+        category = CategoryFactory()
+        for i in range(12):
+            ProductFactory(
+                category=category,
+                variants=[{"price": Decimal(10 + i % 3)}] if i % 4 else None,
+            )
+        names = walk_pages(client, self.url, {"ordering": ordering})
+        assert sorted(names) == sorted(p.name for p in category.products.all())
+        assert len(names) == len(set(names))
+
+    def test_previous_cursor_returns_preceding_page(self, client):
+        CategoryFactory(products=[{"name": f"Product {i:02d}"} for i in range(25)])
+        first = client.get(self.url).context["page_obj"]
+        second = client.get(self.url, {"cursor": first.next_cursor})
+        third = client.get(
+            self.url,
+            {"cursor": second.context["page_obj"].next_cursor},
+        )
+        previous = client.get(
+            self.url,
+            {"cursor": third.context["page_obj"].previous_cursor},
+        )
+        assert [p.name for p in previous.context["products"]] == [
+            p.name for p in second.context["products"]
+        ]
+
+    def test_previous_cursor_near_start_returns_full_first_page(self, client):
+        CategoryFactory(products=[{"name": f"Product {i:02d}"} for i in range(12)])
+        first = client.get(self.url).context["page_obj"]
+        second = client.get(self.url, {"cursor": first.next_cursor})
+        previous = client.get(
+            self.url,
+            {"cursor": second.context["page_obj"].previous_cursor},
+        )
+        page = previous.context["page_obj"]
+        assert len(page) == 9
+        assert not page.has_previous()
+
+    def test_malformed_cursor_returns_404(self, client):
+        response = client.get(self.url, {"cursor": "not-a-cursor"})
+        assert response.status_code == 404
+
+    def test_cursor_from_another_ordering_returns_404(self, client):
+        CategoryFactory(products=12)
+        page = client.get(self.url, {"ordering": "name"}).context["page_obj"]
+        response = client.get(
+            self.url,
+            {"ordering": "-min_price", "cursor": page.next_cursor},
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize(("ordering", "index", "value"), MISTYPED_CURSORS)
+    def test_mistyped_cursor_returns_404(self, client, ordering, index, value):
+        CategoryFactory(products=12)
+        params = {"ordering": ordering}
+        page = client.get(self.url, params).context["page_obj"]
+        params["cursor"] = forge_cursor(page.next_cursor, index, value)
+        assert client.get(self.url, params).status_code == 404
+
+    def test_htmx_fragment_links_to_next_cursor(self, client):
+        CategoryFactory(products=12)
+        response = client.get(self.url, headers={"HX-Request": "true"})
+        page = response.context["page_obj"]
+        assert f"cursor={page.next_cursor}" in response.content.decode()
+
+
+class TestProductListViewFacets:
+    url = reverse("products:product_list")
+
+    def test_category_facets_count_active_products(self, client):
+        category = CategoryFactory(
+            name="Seals",
+            products=[{"is_active": True}, {"is_active": True}, {"is_active": False}],
+        )
+        CategoryFactory(name="Gaskets")
+        response = client.get(self.url)
+        facets = response.context["filter"].facets["category"]
+        assert [(f.label, f.count) for f in facets] == [("Gaskets", 0), ("Seals", 2)]
+        assert facets[1].value == category.slug
+
+    def test_category_facets_ignore_their_own_selection(self, client):
+        seals = CategoryFactory(name="Seals", products=2)
+        CategoryFactory(name="Gaskets", products=3)
+        response = client.get(self.url, {"category": seals.slug})
+        facets = response.context["filter"].facets["category"]
+        assert [(f.label, f.count, f.selected) for f in facets] == [
+            ("Gaskets", 3, False),
+            ("Seals", 2, True),
+        ]
+
+    def test_category_facets_render_labels_and_counts(self, client):
+        CategoryFactory(name="O-Rings", products=4)
+        response = client.get(self.url)
+        content = response.content.decode()
+        assert '<span class="text-nav">O-Rings</span>' in content
+        assert '<span class="fs-xs text-body-secondary ms-auto">4</span>' in content
+
+
+SEAL_SCHEMA = {
+    "type": "object",
+    "title": "Seal",
+    "required": ["type"],
+    "properties": {
+        "type": {"type": "string", "const": "seal", "widget": "hidden"},
+        "material": {
+            "type": "string",
+            "title": "Material",
+            "enum": ["NBR", "FKM", "EPDM"],
+        },
+        "hardness": {"type": "integer", "title": "Hardness", "enum": [70, 90]},
+    },
+    "additionalProperties": False,
+}
+
+
+def seal(material, hardness):
+    return {"attributes": {"type": "seal", "material": material, "hardness": hardness}}
+
+
+class TestProductListViewAttributeFacets:
+    url = reverse("products:product_list")
+
+    @pytest.fixture(autouse=True)
+    def _seal_schema(self):
+        AttributesSchemaFactory(name="Seal", schema=SEAL_SCHEMA)
+
+    def get_facets(self, response, name):
+        facets = response.context["filter"].facets[name]
+        return {facet.label: facet.count for facet in facets}
+
+    def test_filters_by_attribute_value(self, client):
+        category = CategoryFactory()
+        nbr = ProductFactory(category=category, variants=[seal("NBR", 70)])
+        ProductFactory(category=category, variants=[seal("FKM", 70)])
+        response = client.get(self.url, {"attr_material": "NBR"})
+        assert [p.pk for p in response.context["products"]] == [nbr.pk]
+
+    def test_matches_integer_values(self, client):
+        hard = ProductFactory(variants=[seal("NBR", 90)])
+        ProductFactory(variants=[seal("NBR", 70)])
+        response = client.get(self.url, {"attr_hardness": "90"})
+        assert [p.pk for p in response.context["products"]] == [hard.pk]
+
+    def test_selected_values_must_match_the_same_variant(self, client):
+        ProductFactory(variants=[seal("NBR", 70), seal("FKM", 90)])
+        both = ProductFactory(variants=[seal("FKM", 70)])
+        response = client.get(self.url, {"attr_material": "FKM", "attr_hardness": "70"})
+        assert [p.pk for p in response.context["products"]] == [both.pk]
+
+    def test_facet_counts_products_per_value(self, client):
+        ProductFactory(variants=[seal("NBR", 70), seal("NBR", 90)])
+        ProductFactory(variants=[seal("FKM", 70)])
+        response = client.get(self.url)
+        assert self.get_facets(response, "attr_material") == {
+            "NBR": 1,
+            "FKM": 1,
+            "EPDM": 0,
+        }
+        assert self.get_facets(response, "attr_hardness") == {"70": 2, "90": 1}
+
+    def test_facet_counts_ignore_their_own_selection(self, client):
+        ProductFactory(variants=[seal("NBR", 70)])
+        ProductFactory(variants=[seal("FKM", 90)])
+        response = client.get(self.url, {"attr_material": "NBR"})
+        assert self.get_facets(response, "attr_material") == {
+            "NBR": 1,
+            "FKM": 1,
+            "EPDM": 0,
+        }
+        assert self.get_facets(response, "attr_hardness") == {"70": 1, "90": 0}
+
+    def test_attribute_facet_counts_use_one_query(
+        self,
+        client,
+        django_assert_num_queries,
+    ):
+        ProductFactory(variants=[seal("NBR", 70)])
+        response = client.get(self.url)
+        product_filter = response.context["filter"]
+        del product_filter.facets
+        with django_assert_num_queries(1):
+            product_filter.get_attribute_facets()
+
+    def test_category_facets_apply_attribute_filters(self, client):
+        category = CategoryFactory(name="Seals")
+        ProductFactory(category=category, variants=[seal("NBR", 70)])
+        ProductFactory(category=category, variants=[seal("FKM", 70)])
+        response = client.get(self.url, {"attr_material": "NBR"})
+        assert self.get_facets(response, "category") == {"Seals": 1}
+
+    def test_renders_attribute_facets(self, client):
+        ProductFactory(variants=[seal("NBR", 70)])
+        content = client.get(self.url).content.decode()
+        assert '<h3 class="h5 mt-4">Material</h3>' in content
+        assert 'name="attr_material"' in content
+
+
+def oring(hardness, inner_diameter, material="NBR"):
+    return {
+        "attributes": {
+            "type": "oring",
+            "material": material,
+            "hardness": hardness,
+            "inner_diameter": inner_diameter,
+        },
+    }
+
+
+class TestProductListViewAttributeRanges:
+    url = reverse("products:product_list")
+
+    @pytest.fixture(autouse=True)
+    def _oring_schema(self):
+        AttributesSchemaFactory(name="O-ring", schema=build_oring_schema())
+
+    def test_filters_by_numeric_range(self, client):
+        soft = ProductFactory(name="Soft", variants=[oring(60, 10)])
+        ProductFactory(name="Hard", variants=[oring(90, 10)])
+        response = client.get(
+            self.url,
+            {"range_hardness_min": "50", "range_hardness_max": "70"},
+        )
+        assert [p.pk for p in response.context["products"]] == [soft.pk]
+
+    def test_filters_by_open_range(self, client):
+        ProductFactory(name="Small", variants=[oring(70, 8)])
+        large = ProductFactory(name="Large", variants=[oring(70, 25.5)])
+        response = client.get(self.url, {"range_inner_diameter_min": "10"})
+        assert [p.pk for p in response.context["products"]] == [large.pk]
+
+    def test_ranges_must_match_the_same_variant(self, client):
+        ProductFactory(name="Mixed", variants=[oring(60, 30), oring(90, 10)])
+        both = ProductFactory(name="Both", variants=[oring(60, 10)])
+        response = client.get(
+            self.url,
+            {"range_hardness_max": "70", "range_inner_diameter_max": "20"},
+        )
+        assert [p.pk for p in response.context["products"]] == [both.pk]
+
+    def test_keeps_the_values_of_attributes_enumerated_elsewhere(self, client):
+        AttributesSchemaFactory(name="Seal", schema=SEAL_SCHEMA)
+        seal_product = ProductFactory(name="Seal", variants=[seal("NBR", 70)])
+        ProductFactory(name="O-ring", variants=[oring(60, 10)])
+        product_filter = client.get(self.url).context["filter"]
+        assert "attr_hardness" in product_filter.attribute_filters
+        assert "range_hardness" in product_filter.range_filters
+        response = client.get(
+            self.url,
+            {"attr_hardness": "70", "range_hardness_min": "65"},
+        )
+        assert [p.pk for p in response.context["products"]] == [seal_product.pk]
+
+    def test_renders_range_inputs(self, client):
+        content = client.get(self.url).content.decode()
+        assert 'name="range_hardness_min"' in content
+        assert 'name="range_inner_diameter_max"' in content
+
+
+class TestProductListViewSearch:
+    url = reverse("products:product_list")
+
+    def test_search_filters_products(self, client):
+        CategoryFactory(products=[{"name": "Nitrile O-Ring"}, {"name": "Silicone"}])
+        response = client.get(self.url, {"q": "nitrile"})
+        assert [p.name for p in response.context["products"]] == ["Nitrile O-Ring"]
+
+    def test_search_updates_category_facets(self, client):
+        CategoryFactory(name="Seals", products=[{"name": "Nitrile seal"}])
+        CategoryFactory(name="Gaskets", products=[{"name": "Cork gasket"}])
+        response = client.get(self.url, {"q": "nitrile"})
+        facets = response.context["filter"].facets["category"]
+        assert [(f.label, f.count) for f in facets] == [("Gaskets", 0), ("Seals", 1)]
+
+    def test_relevance_without_search_orders_by_name(self, client):
+        CategoryFactory(products=[{"name": "B"}, {"name": "A"}])
+        response = client.get(self.url, {"ordering": "relevance"})
+        assert [p.name for p in response.context["products"]] == ["A", "B"]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Full-text search requires PostgreSQL.",
+    )
+    def test_relevance_orders_by_search_rank(self, client):
+        CategoryFactory(
+            products=[
+                {"name": "Bomba", "full_description": "Incluye sellos de nitrilo"},
+                {"name": "Sello de nitrilo"},
+            ],
+        )
+        response = client.get(self.url, {"q": "sello", "ordering": "relevance"})
+        names = [p.name for p in response.context["products"]]
+        assert names == ["Sello de nitrilo", "Bomba"]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Full-text search requires PostgreSQL.",
+    )
+    def test_walks_all_search_results_in_relevance_order(self, client):
+        CategoryFactory(
+            products=[
+                {"name": f"Sello {i:02d}", "full_description": "sello " * (i % 3)}
+                for i in range(20)
+            ],
+        )
+        names = walk_pages(client, self.url, {"q": "sello", "ordering": "relevance"})
+        assert sorted(names) == [f"Sello {i:02d}" for i in range(20)]
+
+    def test_htmx_fragment_refreshes_category_facets(self, client):
+        CategoryFactory(name="Seals", products=[{"name": "Nitrile seal"}])
+        response = client.get(
+            self.url,
+            {"q": "nitrile"},
+            headers={"HX-Request": "true"},
+        )
+        content = response.content.decode()
+        assert '<div id="facets" hx-swap-oob="true">' in content
+
+
+class TestProductListViewFragmentCache:
+    url = reverse("products:product_list")
+    headers = {"HX-Request": "true"}
+
+    def test_htmx_fragment_served_from_cache(self, client):
+        category = CategoryFactory(products=3)
+        params = {"category": category.slug, "ordering": "name"}
+        first = client.get(self.url, params, headers=self.headers)
+        second = client.get(self.url, params, headers=self.headers)
+        assert second.status_code == 200
+        assert not hasattr(second, "context_data")
+        assert second.content == first.content
+
+    def test_cache_key_ignores_parameter_order_and_empty_values(self, client):
+        category = CategoryFactory(products=3)
+        client.get(
+            self.url,
+            {"category": category.slug, "ordering": "name"},
+            headers=self.headers,
+        )
+        response = client.get(
+            f"{self.url}?ordering=name&cursor=&category={category.slug}",
+            headers=self.headers,
+        )
+        assert not hasattr(response, "context_data")
+
+    def test_cache_key_ignores_unknown_parameters(self, client):
+        CategoryFactory(products=3)
+        client.get(self.url, {"ordering": "name"}, headers=self.headers)
+        response = client.get(
+            self.url,
+            {"ordering": "name", "utm_source": "newsletter", "_": "1"},
+            headers=self.headers,
+        )
+        assert not hasattr(response, "context_data")
+
+    def test_unknown_parameters_do_not_leak_into_cached_links(self, client):
+        CategoryFactory(products=12)
+        client.get(
+            self.url,
+            {"ordering": "name", "utm_source": "newsletter"},
+            headers=self.headers,
+        )
+        response = client.get(self.url, {"ordering": "name"}, headers=self.headers)
+        content = response.content.decode()
+        assert not hasattr(response, "context_data")
+        assert "cursor=" in content
+        assert "ordering=name" in content
+        assert "utm_source" not in content
+
+    def test_cache_key_reads_the_range_and_cursor_parameters(self, client):
+        AttributesSchemaFactory(name="O-ring", schema=build_oring_schema())
+        CategoryFactory(products=12)
+        cursor = client.get(self.url).context["page_obj"].next_cursor
+        client.get(self.url, headers=self.headers)
+        for params in ({"range_hardness_min": "50"}, {"cursor": cursor}):
+            response = client.get(self.url, params, headers=self.headers)
+            assert hasattr(response, "context_data")
+
+    def test_full_page_is_not_cached(self, client):
+        CategoryFactory(products=3)
+        client.get(self.url)
+        response = client.get(self.url)
+        assert "filter" in response.context
+
+    def test_catalog_change_invalidates_cache(
+        self,
+        client,
+        django_capture_on_commit_callbacks,
+    ):
+        category = CategoryFactory(products=[{"name": "Old name"}])
+        client.get(self.url, headers=self.headers)
+        product = category.products.get()
+        product.name = "New name"
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+        response = client.get(self.url, headers=self.headers)
+        assert "New name" in response.content.decode()
+
+    def test_invalid_cursor_is_not_cached(self, client):
+        client.get(self.url, {"cursor": "not-a-cursor"}, headers=self.headers)
+        response = client.get(
+            self.url,
+            {"cursor": "not-a-cursor"},
+            headers=self.headers,
+        )
+        assert response.status_code == 404
+
+
+class TestProductAutocompleteView:
+    url = reverse("products:product_autocomplete")
+    headers = {"HX-Request": "true"}
+
+    def test_suggests_products_and_skus(self, client):
+        product = ProductFactory(name="Nitrile O-Ring", variants=[{"sku": "NBR-001"}])
+        ProductFactory(name="Silicone gasket", variants=[{"sku": "NBR-002"}])
+        response = client.get(self.url, {"q": "nbr"}, headers=self.headers)
+        assert list(response.context["products"]) == []
+        assert [v.sku for v in response.context["variants"]] == ["NBR-001", "NBR-002"]
+        response = client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        assert list(response.context["products"]) == [product]
+
+    def test_renders_fragment_only(self, client):
+        ProductFactory(name="Nitrile O-Ring")
+        response = client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        content = response.content.decode()
+        assert "Nitrile O-Ring" in content
+        assert "<html" not in content
+
+    def test_short_terms_return_nothing(self, client):
+        ProductFactory(name="O-Ring")
+        response = client.get(self.url, {"q": "o-"}, headers=self.headers)
+        assert "products" not in response.context
+        assert response.content.decode().strip() == ""
+
+    def test_results_are_capped(self, client):
+        CategoryFactory(products=[{"name": f"Seal {i:02d}"} for i in range(12)])
+        response = client.get(self.url, {"q": "seal"}, headers=self.headers)
+        assert len(response.context["products"]) == 8
+
+    def test_excludes_inactive_products(self, client):
+        ProductFactory(
+            name="Nitrile O-Ring",
+            is_active=False,
+            variants=[{"sku": "N-1"}],
+        )
+        response = client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        assert list(response.context["products"]) == []
+
+    def test_suggestions_served_from_cache(self, client):
+        ProductFactory(name="Nitrile O-Ring")
+        first = client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        second = client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        assert not hasattr(second, "context_data")
+        assert second.content == first.content
+
+    def test_suggestions_cached_by_term_only(self, client):
+        ProductFactory(name="Nitrile O-Ring")
+        client.get(self.url, {"q": "nitrile"}, headers=self.headers)
+        response = client.get(
+            self.url,
+            {"q": "nitrile", "page": "2"},
+            headers=self.headers,
+        )
+        assert not hasattr(response, "context_data")
+        response = client.get(self.url, {"q": "o-ring"}, headers=self.headers)
+        assert hasattr(response, "context_data")
+
+
+class TestProductDetailView:
+    def get_object(self, rf, product):
+        view = ProductDetailView()
+        view.setup(rf.get(product.get_absolute_url()), slug=product.slug)
+        return view.get_object()
+
+    def test_renders_active_product(self, client):
+        product = ProductFactory()
+        response = client.get(product.get_absolute_url())
+        assert response.status_code == 200
+        assert response.context["product"] == product
+
+    def test_embeds_variant_matrix(self, client):
+        product = ProductFactory(
+            variants=[
+                {
+                    "sku": "NBR-70",
+                    "price": Decimal("2.00"),
+                    "stock": 0,
+                    "attributes": {},
+                },
+            ],
+        )
+        response = client.get(product.get_absolute_url())
+        assert response.context["product"].variant_matrix == {
+            "options": {},
+            "variants": {"": {"sku": "NBR-70", "price": "2.00", "stock": 0}},
+        }
+        assert 'id="variant-matrix"' in response.content.decode()
+
+    def test_inactive_product_is_not_found(self, client):
+        product = ProductFactory(is_active=False)
+        response = client.get(product.get_absolute_url())
+        assert response.status_code == 404
+
+    def test_fetches_relations_within_query_budget(
+        self,
+        rf,
+        django_assert_num_queries,
+    ):
+        product = ProductFactory(variants=3, images=3)
+        with django_assert_num_queries(3):
+            obj = self.get_object(rf, product)
+            assert obj.category.name
+            assert len(obj.active_variants) == 3
+            assert len(obj.active_images) == 3
+            assert obj.price_range
+
+    def test_cached_product_costs_no_query(self, rf, django_assert_num_queries):
+        product = ProductFactory(variants=2, images=2)
+        self.get_object(rf, product)
+        with django_assert_num_queries(0):
+            obj = self.get_object(rf, product)
+            assert len(obj.active_variants) == 2
+            assert len(obj.active_images) == 2
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda product: ProductVariantFactory(product=product),
+            lambda product: ProductImageFactory(product=product),
+            lambda product: product.variants.first().delete(),
+            lambda product: product.category.save(),
+            lambda product: product.save(),
+        ],
+        ids=["variant", "image", "variant_delete", "category", "product"],
+    )
+    def test_change_invalidates_cached_product(
+        self,
+        rf,
+        change,
+        django_capture_on_commit_callbacks,
+        django_assert_num_queries,
+    ):
+        product = ProductFactory(variants=1)
+        self.get_object(rf, product)
+        with django_capture_on_commit_callbacks(execute=True):
+            change(product)
+        with django_assert_num_queries(3):
+            self.get_object(rf, product)
+
+    def test_slug_change_invalidates_cached_product(
+        self,
+        client,
+        django_capture_on_commit_callbacks,
+    ):
+        product = ProductFactory()
+        old_url = product.get_absolute_url()
+        assert client.get(old_url).status_code == 200
+        product.slug = "renamed"
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+        assert client.get(old_url).status_code == 404
+        assert client.get(product.get_absolute_url()).status_code == 200
+
+
+class TestConditionalGet:
+    headers = {"HX-Request": "true"}
+
+    @pytest.fixture
+    def product(self):
+        return ProductFactory()
+
+    @pytest.fixture(params=["list", "detail"])
+    def url(self, request, product):
+        if request.param == "list":
+            return reverse("products:product_list")
+        return product.get_absolute_url()
+
+    def test_response_carries_etag(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        assert "HX-Request" in response.headers["Vary"]
+
+    def test_matching_etag_returns_not_modified(self, client, url):
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.content
+
+    def test_htmx_request_has_separate_etag(self, client, url):
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, headers={**self.headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        fragment_etag = response.headers["ETag"]
+        response = client.get(
+            url,
+            headers={**self.headers, "If-None-Match": fragment_etag},
+        )
+        assert response.status_code == 304
+
+    def test_query_string_changes_etag(self, client):
+        url = reverse("products:product_list")
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, {"q": "ring"}, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_catalog_change_invalidates_etag(
+        self,
+        client,
+        url,
+        product,
+        django_capture_on_commit_callbacks,
+    ):
+        etag = client.get(url).headers["ETag"]
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+class TestAsyncViews:
+    @pytest.fixture
+    def get(self, async_rf):
+        def get(view_class, path, headers=None, **kwargs):
+            request = async_rf.get(path, headers=headers)
+            request.htmx = HtmxDetails(request)
+            request.user = AnonymousUser()
+
+            async def auser():
+                return request.user
+
+            request.auser = auser
+            response = async_to_sync(view_class.as_view())(request, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+        return get
+
+    @pytest.mark.parametrize(
+        "view_class",
+        [AsyncHomeView, AsyncProductListView, AsyncProductDetailView],
+    )
+    def test_view_is_async(self, view_class):
+        assert view_class.view_is_async
+
+    @pytest.mark.parametrize("headers", [{}, {"HX-Request": "true"}])
+    def test_list_matches_sync_view(self, client, get, headers):
+        ProductFactory.create_batch(12, images=1)
+        url = reverse("products:product_list")
+        response = get(AsyncProductListView, url, headers)
+        assert response.status_code == 200
+        expected = client.get(url, headers=headers).context["products"]
+        assert [card.pk for card in response.context_data["products"]] == [
+            card.pk for card in expected
+        ]
+        cursor = response.context_data["page_obj"].next_cursor
+        response = get(AsyncProductListView, f"{url}?cursor={cursor}", headers)
+        assert len(response.context_data["products"]) == 3
+
+    @pytest.mark.parametrize(("ordering", "index", "value"), MISTYPED_CURSORS)
+    def test_mistyped_cursor_raises_404(self, client, get, ordering, index, value):
+        ProductFactory.create_batch(12)
+        url = reverse("products:product_list")
+        page = client.get(url, {"ordering": ordering}).context["page_obj"]
+        cursor = forge_cursor(page.next_cursor, index, value)
+        with pytest.raises(Http404):
+            get(AsyncProductListView, f"{url}?ordering={ordering}&cursor={cursor}")
+
+    def test_cached_fragment_is_served(self, get, django_assert_num_queries):
+        ProductFactory()
+        url = reverse("products:product_list")
+        headers = {"HX-Request": "true"}
+        content = get(AsyncProductListView, url, headers).content
+        with django_assert_num_queries(0):
+            assert get(AsyncProductListView, url, headers).content == content
+
+    def test_detail_is_served_and_cached(self, get, django_assert_num_queries):
+        product = ProductFactory(variants=2, images=1)
+        url = product.get_absolute_url()
+        response = get(AsyncProductDetailView, url, slug=product.slug)
+        assert response.status_code == 200
+        assert response.context_data["product"] == product
+        with django_assert_num_queries(0):
+            response = get(
+                AsyncProductDetailView,
+                url,
+                {"If-None-Match": response.headers["ETag"]},
+                slug=product.slug,
+            )
+        assert response.status_code == 304
+
+    def test_missing_product_is_not_found(self, get):
+        with pytest.raises(Http404):
+            get(AsyncProductDetailView, "/products/missing/", slug="missing")
+
+    def test_home_is_served(self, get):
+        assert get(AsyncHomeView, "/").status_code == 200
+
+
+class TestQueryBudgets:
+    @pytest.fixture
+    def product(self):
+        AttributesSchemaFactory(schema=build_oring_schema())
+        categories = CategoryFactory.create_batch(
+            3,
+            products=12,
+            products__variants=3,
+            products__images=3,
+        )
+        return categories[0].products.first()
+
+    @pytest.mark.parametrize(
+        ("url_name", "data"),
+        [
+            ("products:product_list", {}),
+            ("products:product_list", {"ordering": "-min_price", "q": "product"}),
+            ("products:product_autocomplete", {"q": "product"}),
+        ],
+    )
+    def test_catalog_views(self, client, url_name, data):
+        ProductFactory.create_batch(12, variants=3, images=3)
+        for headers in ({}, {"HX-Request": "true"}):
+            cache.clear()
+            assert_query_budget(client.get(reverse(url_name), data, headers=headers))
+
+    def test_product_detail(self, client, product):
+        assert_query_budget(client.get(product.get_absolute_url()))
+
+    @pytest.mark.parametrize("model", ["product", "category", "attributesschema"])
+    def test_admin_views(self, admin_client, product, model):
+        objects = {
+            "product": product,
+            "category": product.category,
+            "attributesschema": AttributesSchema.objects.first(),
+        }
+        for url in (
+            reverse(f"admin:products_{model}_changelist"),
+            reverse(f"admin:products_{model}_add"),
+            reverse(f"admin:products_{model}_change", args=[objects[model].pk]),
+        ):
+            assert_query_budget(admin_client.get(url))
@@ -1,19 +1,35 @@
+from django.conf import settings
 from django.urls import path
 
+from .views import AsyncProductDetailView
+from .views import AsyncProductListView
+from .views import ProductAutocompleteView
 from .views import ProductDetailView
 from .views import ProductListView
 
 app_name = "products"
 
+if settings.ASYNC_VIEWS:
+    list_view = AsyncProductListView.as_view()
+    detail_view = AsyncProductDetailView.as_view()
+else:
+    list_view = ProductListView.as_view()
+    detail_view = ProductDetailView.as_view()
+
 urlpatterns = [
     path(
         route="",
-        view=ProductListView.as_view(),
+        view=list_view,
         name="product_list",
     ),
+    path(
+        route="autocomplete/",
+        view=ProductAutocompleteView.as_view(),
+        name="product_autocomplete",
+    ),
     path(
         route="<slug:slug>/",
-        view=ProductDetailView.as_view(),
+        view=detail_view,
         name="product_detail",
     ),
 ]
@@ -1,8 +1,19 @@
+import hashlib
+import json
+import time
+from dataclasses import astuple
+
 from django.apps import apps
 from django.core.cache import cache
 
+from apps.core.metrics import record_cache_lookup
+
 from .constants import ATTRIBUTES_SCHEMA_CACHE_KEY
+from .constants import CATALOG_VERSION_CACHE_KEY
 from .constants import NO_ATTRIBUTES_SCHEMA
+from .constants import NUMERIC_ATTRIBUTE_TYPES
+from .constants import PRODUCT_CARD_CACHE_KEY
+from .constants import PRODUCT_DETAIL_CACHE_KEY
 
 
 def get_default_attributes_schema() -> dict:
@@ -19,13 +30,181 @@ def build_attributes_schema() -> dict:
 
 def get_attributes_schema(instance=None):
     """Return the cached attributes schema, building it if not cached."""
-    return cache.get_or_set(
-        ATTRIBUTES_SCHEMA_CACHE_KEY,
-        build_attributes_schema,
-        timeout=None,
+    schema = cache.get(ATTRIBUTES_SCHEMA_CACHE_KEY)
+    record_cache_lookup("attributes_schema", hit=schema is not None)
+    if schema is None:
+        schema = cache.get_or_set(
+            ATTRIBUTES_SCHEMA_CACHE_KEY,
+            build_attributes_schema,
+            timeout=None,
+        )
+    return schema
+
+
+def get_enum_attributes() -> dict[str, dict]:
+    """Return the enumerated attributes declared by the schemas, by key.
+
+    Each entry holds the attribute `title` and the union of its `enum` values
+    across every schema declaring it, in declaration order.
+    """
+    attributes = {}
+    for schema in get_attributes_schema()["oneOf"]:
+        for key, prop in schema.get("properties", {}).items():
+            if key == "type" or "enum" not in prop:
+                continue
+            attribute = attributes.setdefault(
+                key,
+                {"title": prop.get("title", key), "values": []},
+            )
+            attribute["values"].extend(
+                value for value in prop["enum"] if value not in attribute["values"]
+            )
+    return attributes
+
+
+def get_range_attributes() -> dict[str, dict]:
+    """Return the numeric attributes declared by the schemas without an enum.
+
+    These attributes are filtered by range through `ProductVariantAttribute`
+    instead of by value. Each entry holds the attribute `title`, by key.
+    """
+    attributes = {}
+    for schema in get_attributes_schema()["oneOf"]:
+        for key, prop in schema.get("properties", {}).items():
+            if prop.get("type") in NUMERIC_ATTRIBUTE_TYPES and "enum" not in prop:
+                attributes.setdefault(key, {"title": prop.get("title", key)})
+    return attributes
+
+
+def get_attribute_types() -> dict[str, dict[str, str]]:
+    """Return the property types of each schema, by schema `type` constant."""
+    types = {}
+    for schema in get_attributes_schema()["oneOf"]:
+        properties = schema.get("properties", {})
+        const = properties.get("type", {}).get("const")
+        types[const] = {
+            key: prop.get("type") for key, prop in properties.items() if key != "type"
+        }
+    return types
+
+
+def get_catalog_version() -> int:
+    """Return the current catalog version, initializing it if not cached."""
+    version = cache.get(CATALOG_VERSION_CACHE_KEY)
+    record_cache_lookup("catalog_version", hit=version is not None)
+    if version is None:
+        version = cache.get_or_set(
+            CATALOG_VERSION_CACHE_KEY,
+            time.time_ns,
+            timeout=None,
+        )
+    return version
+
+
+async def aget_catalog_version() -> int:
+    """See `get_catalog_version()`."""
+    version = await cache.aget(CATALOG_VERSION_CACHE_KEY)
+    record_cache_lookup("catalog_version", hit=version is not None)
+    if version is None:
+        version = await cache.aget_or_set(
+            CATALOG_VERSION_CACHE_KEY,
+            time.time_ns,
+            timeout=None,
+        )
+    return version
+
+
+def bump_catalog_version() -> None:
+    """Invalidate every cache entry versioned with the catalog version.
+
+    The counter is seeded from the current time, so a counter lost to eviction
+    or a cache restart never falls back to a version that is still cached.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+def get_product_detail_cache_key(slug) -> str:
+    """Return the cache key of the product shown at the detail page of `slug`."""
+    return PRODUCT_DETAIL_CACHE_KEY.format(slug=slug)
+
+
+def get_product_card_cache_key(card, language) -> str:
+    """Return the cache key of the rendered `card` in `language`.
+
+    Besides the product and the `modified` time of the card, the key covers its
+    URL and images: images changing leave the product untouched.
+    """
+    data = json.dumps(
+        [
+            card.modified.isoformat() if card.modified else None,
+            card.url,
+            [astuple(image) for image in card.images],
+        ],
+    )
+    digest = hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+    return PRODUCT_CARD_CACHE_KEY.format(pk=card.pk, language=language, digest=digest)
+
+
+def clear_product_detail_cache(slugs) -> None:
+    """Delete the cached detail page products of `slugs`."""
+    cache.delete_many([get_product_detail_cache_key(slug) for slug in slugs])
+
+
+def is_variant_option(key, value) -> bool:
+    """Return whether an attribute is offered as an option of the variant matrix.
+
+    Only scalar values are options. Booleans are excluded, since `True` and `1`
+    would collapse into a single option.
+    """
+    return (
+        key != "type"
+        and isinstance(value, str | int | float)
+        and not isinstance(value, bool)
     )
 
 
+def build_variant_matrix(variants) -> dict:
+    """Return the lookup from attribute combinations to the variants of a product.
+
+    `variants` is a list of `(sku, price, stock, attributes)` rows. `options`
+    holds the sorted scalar values of every attribute key, and `variants` maps
+    each combination, written as the indexes of its values in `options` joined
+    by `:` (empty for a missing key or a value that is not an option, such as
+    `null`), to the SKU, price and stock of a variant.
+    """
+    values = {}
+    for *_, attributes in variants:
+        for key, value in attributes.items():
+            if is_variant_option(key, value):
+                values.setdefault(key, set()).add(value)
+    options = {
+        key: sorted(values[key], key=lambda value: (isinstance(value, str), value))
+        for key in sorted(values)
+    }
+    matrix = {}
+    for sku, price, stock, attributes in variants:
+        code = ":".join(
+            str(options[key].index(attributes[key]))
+            if is_variant_option(key, attributes.get(key))
+            else ""
+            for key in options
+        )
+        matrix[code] = {"sku": sku, "price": str(price), "stock": stock}
+    return {"options": options, "variants": matrix}
+
+
+def format_price_range(min_price, max_price) -> str:
+    """Return a formatted price range, or an empty string if a bound is missing."""
+    if min_price is None or max_price is None:
+        return ""
+    if min_price == max_price:
+        return f"${min_price:.2f}"
+    return f"${min_price:.2f} - ${max_price:.2f}"
+
+
 def get_product_image_upload_path(instance, filename) -> str:
     """Return the upload path for a product image."""
     return f"products/products/{instance.product.slug}/{filename}"
@@ -1,33 +1,169 @@
+from django.db import transaction
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView
+from django.views.generic import TemplateView
 from django_filters.views import FilterView
 
+from apps.core.viewmixins import AsyncConditionalGetMixin
+from apps.core.viewmixins import AsyncDetailViewMixin
+from apps.core.viewmixins import AsyncFilterViewMixin
+from apps.core.viewmixins import AsyncHtmxFragmentCacheMixin
+from apps.core.viewmixins import ConditionalGetMixin
+from apps.core.viewmixins import CursorPaginationMixin
+from apps.core.viewmixins import HtmxFragmentCacheMixin
 from apps.core.viewmixins import HtmxTemplateMixin
+from apps.core.viewmixins import ObjectCacheMixin
 
 from .filters import ProductFilter
 from .models import Product
+from .models import ProductVariant
+from .utils import aget_catalog_version
+from .utils import get_catalog_version
+from .utils import get_product_detail_cache_key
 
 
-class ProductListView(HtmxTemplateMixin, FilterView):
+class ProductListMixin:
+    """The configuration shared by the sync and async product list views."""
+
     model = Product
     filterset_class = ProductFilter
     template_name = "products/product_list.html"
     htmx_template_name = "#product-grid"
     context_object_name = "products"
     paginate_by = 9
+    query_budget = 8
+
+    def get_queryset(self):
+        return super().get_queryset().active().as_cards(image_limit=3).order_by("name")
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class ProductListView(
+    ProductListMixin,
+    ConditionalGetMixin,
+    HtmxFragmentCacheMixin,
+    HtmxTemplateMixin,
+    CursorPaginationMixin,
+    FilterView,
+):
+    def get_etag_version(self) -> int:
+        return get_catalog_version()
+
+    def get_fragment_cache_version(self) -> int:
+        return get_catalog_version()
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class AsyncProductListView(
+    ProductListMixin,
+    AsyncConditionalGetMixin,
+    AsyncHtmxFragmentCacheMixin,
+    HtmxTemplateMixin,
+    AsyncFilterViewMixin,
+    CursorPaginationMixin,
+    FilterView,
+):
+    """`ProductListView` served from an async `get()`, for ASGI deployments.
+
+    The catalog version and the cached fragments are read with the async cache
+    API and the page of cards with the async ORM.
+    """
+
+    async def aget_etag_version(self) -> int:
+        return await aget_catalog_version()
+
+    async def aget_fragment_cache_version(self) -> int:
+        return await aget_catalog_version()
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class ProductAutocompleteView(HtmxFragmentCacheMixin, TemplateView):
+    """Suggest products by name and variants by SKU for the search box."""
+
+    template_name = "products/product_autocomplete.html"
+    fragment_cache_timeout = 60
+    fragment_cache_params = ("q",)
+    min_length = 3
+    limit = 8
+    query_budget = 3
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        term = self.request.GET.get("q", "").strip()
+        if len(term) < self.min_length:
+            return context
+        context["products"] = (
+            Product.objects.active()
+            .autocomplete(term)
+            .only("id", "name", "slug")[: self.limit]
+        )
+        context["variants"] = (
+            ProductVariant.objects.active()
+            .filter(product__is_active=True)
+            .autocomplete(term)
+            .with_product()
+            .only("id", "sku", "product__name", "product__slug")[: self.limit]
+        )
+        return context
+
+    def get_fragment_cache_version(self) -> int:
+        return get_catalog_version()
+
+
+class ProductDetailMixin:
+    """The configuration shared by the sync and async product detail views."""
+
+    model = Product
+    template_name = "products/product_detail.html"
+    context_object_name = "product"
+    query_budget = 4
 
     def get_queryset(self):
         return (
             super()
             .get_queryset()
             .active()
-            .with_images(limit=3)
+            .with_category()
+            .with_variants()
+            .with_images()
             .with_price_range()
-            .only("id", "name", "slug")
-            .order_by("name")
+            .with_variant_matrix()
         )
 
+    def get_object_cache_key(self) -> str:
+        return get_product_detail_cache_key(self.kwargs[self.slug_url_kwarg])
 
-class ProductDetailView(DetailView):
-    model = Product
-    template_name = "products/product_detail.html"
-    context_object_name = "product"
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class ProductDetailView(
+    ProductDetailMixin,
+    ConditionalGetMixin,
+    ObjectCacheMixin,
+    DetailView,
+):
+    """Show an active product with its category, variants and images.
+
+    The product and its relations are fetched in a fixed number of queries and
+    cached by slug; the signals of the product, its category, variants and
+    images delete the entry when any of them changes.
+
+    The variant matrix precomputed in the product summary is embedded in the
+    page as JSON, so choosing options does not need a request per selection.
+    """
+
+    def get_etag_version(self) -> int:
+        return get_catalog_version()
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class AsyncProductDetailView(
+    ProductDetailMixin,
+    AsyncConditionalGetMixin,
+    ObjectCacheMixin,
+    AsyncDetailViewMixin,
+    DetailView,
+):
+    """`ProductDetailView` served from an async `get()`, for ASGI deployments."""
+
+    async def aget_etag_version(self) -> int:
+        return await aget_catalog_version()
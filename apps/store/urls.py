@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.urls import path
 
+from .views import AsyncHomeView
 from .views import HomeView
 
 app_name = "store"
 
+home_view = AsyncHomeView if settings.ASYNC_VIEWS else HomeView
+
 urlpatterns = [
     path(
         route="",
-        view=HomeView.as_view(),
+        view=home_view.as_view(),
         name="home",
     ),
 ]
@@ -1,5 +1,16 @@
+from django.db import transaction
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
 
 class HomeView(TemplateView):
     template_name = "store/home.html"
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class AsyncHomeView(HomeView):
+    """`HomeView` served from an async `get()`, for ASGI deployments."""
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        return self.render_to_response(context)
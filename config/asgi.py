@@ -0,0 +1,16 @@
+"""ASGI config for Elastómeros Ecuatorianos project."""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "apps"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+# Under ASGI the catalog is served by its async views, which await the cache and
+# the database without holding a worker; under WSGI they would only add overhead.
+os.environ.setdefault("DJANGO_ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
@@ -2,6 +2,8 @@ import os
 
 from celery import Celery
 from celery.signals import setup_logging
+from celery.signals import task_postrun
+from celery.signals import task_prerun
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
 app = Celery("apps")
@@ -17,4 +19,18 @@ def config_loggers(*args, **kwargs):
     dictConfig(settings.LOGGING)
 
 
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    from apps.core.metrics import record_task_start  # noqa: PLC0415
+
+    record_task_start(task_id)
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    from apps.core.metrics import record_task_end  # noqa: PLC0415
+
+    record_task_end(task_id, task.name, state)
+
+
 app.autodiscover_tasks()
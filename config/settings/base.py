@@ -48,6 +48,12 @@ DATABASES = {
     ),
 }
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+if env("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["apps.core.routers.ReplicaRouter"]
+# Seconds the reads of a client stay on the primary after it writes.
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", 10)
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # -----------------------------------------------------------------------------
@@ -55,6 +61,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # -----------------------------------------------------------------------------
 ROOT_URLCONF = "config.urls"
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+# Serve the catalog from its async views, set by the ASGI entry point.
+ASYNC_VIEWS = env.bool("DJANGO_ASYNC_VIEWS", False)
 
 # -----------------------------------------------------------------------------
 # APPS
@@ -144,11 +153,14 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.core.middleware.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "apps.core.middleware.HtmxMessagesMiddleware",
+    "apps.core.middleware.ServerTimingMiddleware",
+    "apps.core.middleware.QueryBudgetMiddleware",
 ]
 
 # -----------------------------------------------------------------------------
@@ -206,6 +218,15 @@ FIXTURE_DIRS = (str(BASE_DIR / "fixtures"),)
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY = True
 X_FRAME_OPTIONS = "DENY"
+# Networks allowed to read the metrics endpoint besides staff users. They are
+# matched against REMOTE_ADDR, which must be the address of the client: behind
+# a proxy on the same host, every request comes from 127.0.0.1.
+METRICS_ALLOWED_NETWORKS = env.list(
+    "DJANGO_METRICS_ALLOWED_NETWORKS",
+    default=["127.0.0.1/32", "::1/128"],
+)
+# A token scrapers may send as `Authorization: Bearer <token>` instead.
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN", default="")
 
 # -----------------------------------------------------------------------------
 # EMAIL
@@ -23,7 +23,31 @@ CSRF_TRUSTED_ORIGINS = env.list(
 # -----------------------------------------------------------------------------
 # DATABASES
 # -----------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# Connections are borrowed from a psycopg pool per process instead of kept open
+# by every thread, and CONN_HEALTH_CHECKS checks them as they are handed out.
+# Pooled connections cannot be persistent, so CONN_MAX_AGE only applies with
+# DATABASE_POOL=False.
+DATABASE_POOL = env.bool("DATABASE_POOL", default=True)
+# Behind pgbouncer in transaction mode, server-side cursors and prepared
+# statements would outlive the server connection they were created on.
+DATABASE_PGBOUNCER = env.bool("DATABASE_PGBOUNCER", default=False)
+for database in DATABASES.values():
+    database["CONN_HEALTH_CHECKS"] = env.bool("CONN_HEALTH_CHECKS", default=True)
+    options = database.setdefault("OPTIONS", {})
+    if DATABASE_POOL:
+        database["CONN_MAX_AGE"] = 0
+        options["pool"] = {
+            "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=10),
+            "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+            "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=300.0),
+            "max_lifetime": env.float("DATABASE_POOL_MAX_LIFETIME", default=3600.0),
+        }
+    else:
+        database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+    if DATABASE_PGBOUNCER:
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+        options["prepare_threshold"] = None
 
 # -----------------------------------------------------------------------------
 # CACHES
@@ -52,6 +76,10 @@ SECURE_HSTS_SECONDS = 518400
 SECURE_HSTS_INCLUDE_SUBDOMAINS = env.bool("DJANGO_SECURE_HSTS_INCLUDE_SUBDOMAINS", True)
 SECURE_HSTS_PRELOAD = env.bool("DJANGO_SECURE_HSTS_PRELOAD", True)
 SECURE_CONTENT_TYPE_NOSNIFF = env.bool("DJANGO_SECURE_CONTENT_TYPE_NOSNIFF", True)
+# The TLS-terminating proxy runs on the same host, so every request comes from
+# 127.0.0.1: no network is trusted by default and scrapers send the
+# DJANGO_METRICS_TOKEN instead.
+METRICS_ALLOWED_NETWORKS = env.list("DJANGO_METRICS_ALLOWED_NETWORKS", default=[])
 
 # -----------------------------------------------------------------------------
 # STORAGES
@@ -29,3 +29,9 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True
 # MEDIA
 # -----------------------------------------------------------------------------
 MEDIA_URL = "http://media.testserver/"
+
+# -----------------------------------------------------------------------------
+# celery
+# -----------------------------------------------------------------------------
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
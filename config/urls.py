@@ -5,12 +5,15 @@ from django.urls import include
 from django.urls import path
 from django.views import defaults as default_views
 
+from apps.core.views import MetricsView
+
 urlpatterns = [
     path(settings.ADMIN_URL, admin.site.urls),
     path("accounts/", include("allauth.urls")),
     path("", include("apps.store.urls", namespace="store")),
     path("users/", include("apps.users.urls", namespace="users")),
     path("products/", include("apps.products.urls", namespace="products")),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
 ]
 